@@ -0,0 +1,10 @@
+""" Benchmarks of the client-side hot paths of the examples.
+
+The benchmarks run against the fake CARLA server in ../fake_carla and do
+not need a simulator. See README.md for usage.
+"""
+
+from .main import main
+
+if __name__ == "__main__":
+    main()
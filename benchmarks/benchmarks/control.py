@@ -0,0 +1,17 @@
+from agents.navigation.controller import VehiclePIDController
+
+from .fixtures import scene
+from .harness import benchmark
+
+# Gains of the LocalPlanner defaults at 20 Hz
+ARGS_LATERAL = {"K_P": 1.95, "K_I": 0.05, "K_D": 0.2, "dt": 0.05}
+ARGS_LONGITUDINAL = {"K_P": 1.0, "K_I": 0.05, "K_D": 0, "dt": 0.05}
+
+
+@benchmark("pid_controller.run_step")
+def pid_controller_run_step():
+    s = scene()
+    vehicle = s.player.actor
+    waypoint = s.world.get_map().get_waypoint(vehicle.get_location()).next(5.0)[0]
+    controller = VehiclePIDController(vehicle, ARGS_LATERAL, ARGS_LONGITUDINAL)
+    return lambda: controller.run_step(30.0, waypoint)
@@ -0,0 +1,116 @@
+import functools
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import fake_carla
+import pygame
+
+# The benchmarked code is taken from this example
+EXAMPLE_DIR = Path(__file__).resolve().parents[2] / "drive_and_log"
+
+# Perception code of the agents is taken from this example
+AGENT_EXAMPLE_DIR = Path(__file__).resolve().parents[2] / "mountain_driving"
+
+# The bird's-eye view is taken from this example
+SURROUND_EXAMPLE_DIR = Path(__file__).resolve().parents[2] / "multi_view"
+
+# Display size of the HUD and the camera manager
+DISPLAY_SIZE = (1280, 720)
+
+# Ticks run after spawning so that the hero is moving and sensors have data
+WARMUP_TICKS = 20
+
+
+def setup():
+    """
+    Install the fake `carla` module and make the examples importable. Must be
+    called before the benchmark modules are imported.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    fake_carla.install()
+    sys.path.insert(0, str(AGENT_EXAMPLE_DIR))
+    sys.path.insert(0, str(EXAMPLE_DIR))
+    # Appended, so that the `agents` package of drive_and_log comes first
+    sys.path.append(str(SURROUND_EXAMPLE_DIR))
+    pygame.init()
+    pygame.font.init()
+
+
+@dataclass
+class Scene:
+    world: object
+    hud: object
+    player: object
+    state: object
+    clock: pygame.time.Clock
+
+
+@functools.lru_cache(maxsize=None)
+def scene(num_vehicles: int = 0) -> Scene:
+    """
+    Load a fake world with background traffic and spawn the hero vehicle of
+    drive_and_log with all its sensors, as its game loop does.
+    """
+    import carla
+    from drive_and_log.config import NPC3_ROUTE, WORLD
+    from drive_and_log.loop import update_hud
+    from drive_and_log.state import State
+    from drive_and_log.ui import HUD
+    from drive_and_log.vehicle import Vehicle
+
+    fake_carla.configure(num_vehicles=num_vehicles)
+    client = carla.Client("127.0.0.1", 2000)
+    world = client.load_world(WORLD)
+    settings = world.get_settings()
+    settings.synchronous_mode = True
+    settings.fixed_delta_seconds = 0.05
+    world.apply_settings(settings)
+
+    # Refresh the info text on every call, so that update_hud does all its work.
+    hud = HUD(*DISPLAY_SIZE, info_rate=0)
+    hud.nearby_vehicles.rate = 0
+    world.on_tick(hud.on_world_tick)
+    state = State()
+
+    # The camera manager creates its output directory in the working directory.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            player = Vehicle("hero", world, hud, state, NPC3_ROUTE, speed=10)
+        finally:
+            os.chdir(cwd)
+
+    clock = pygame.time.Clock()
+    for _ in range(WARMUP_TICKS):
+        world.tick()
+        clock.tick()
+        player.tick()
+        update_hud(state, hud, player, world, clock)
+
+    return Scene(world, hud, player, state, clock)
+
+
+def capture(kind: str, attributes: dict):
+    """Spawn a sensor on the hero vehicle and return its measurement of one tick."""
+    import carla
+
+    world = scene().world
+    bp = world.get_blueprint_library().find(kind)
+    for name, value in attributes.items():
+        bp.set_attribute(name, str(value))
+
+    transform = carla.Transform(carla.Location(x=1.5, z=2.4))
+    sensor = world.spawn_actor(bp, transform, attach_to=scene().player.actor)
+    measurements = list()
+    sensor.listen(measurements.append)
+    try:
+        world.tick()
+    finally:
+        sensor.stop()
+        sensor.destroy()
+
+    return measurements[0]
@@ -0,0 +1,173 @@
+import fnmatch
+import functools
+import gc
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Statuses of a comparison against the baseline
+OK = "ok"
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+NEW = "new"
+FIXED = "fixed"
+BROKEN = "broken"
+ERROR = "error"
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # Prepares the inputs and returns the function to be timed
+    setup: Callable[[], Callable[[], object]]
+
+
+_REGISTRY: List[Benchmark] = list()
+
+
+def benchmark(name: str, params: Optional[List[dict]] = None):
+    """
+    Register the decorated function as a benchmark. The function prepares
+    the inputs and returns a callable without arguments, which is timed.
+
+    With params, a benchmark is registered for every dict of keyword
+    arguments, and the name is formatted with it, e.g.
+    `@benchmark("rgb.{width}x{height}", [dict(width=640, height=360)])`.
+    """
+
+    def decorator(setup):
+        for kwargs in params or [dict()]:
+            _REGISTRY.append(Benchmark(name.format(**kwargs), functools.partial(setup, **kwargs)))
+        return setup
+
+    return decorator
+
+
+def registered(patterns: Optional[List[str]] = None) -> List[Benchmark]:
+    """Return the registered benchmarks whose names match any of the glob patterns."""
+    if not patterns:
+        return list(_REGISTRY)
+    return [b for b in _REGISTRY if any(fnmatch.fnmatchcase(b.name, p) for p in patterns)]
+
+
+def _time(fn: Callable[[], object], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - start
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2, warmup: int = 1) -> dict:
+    """
+    Time fn as timeit does. The number of calls per sample is doubled until
+    a sample takes at least min_time seconds. The garbage collector is
+    disabled while timing. Times are in microseconds per call.
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while _time(fn, loops) < min_time:
+            loops *= 2
+        samples = [_time(fn, loops) / loops * 1e6 for _ in range(repeat)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        "status": OK,
+        "loops": loops,
+        "repeat": repeat,
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "mean_us": statistics.mean(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run(benchmarks: List[Benchmark], repeat: int = 5, min_time: float = 0.2, warmup: int = 1) -> dict:
+    """
+    Run the benchmarks and return the results document. A benchmark that
+    raises is recorded with an "error" status instead of aborting the run.
+    """
+    results = dict()
+
+    for bench in benchmarks:
+        try:
+            fn = bench.setup()
+            result = measure(fn, repeat, min_time, warmup)
+            print("%-48s %12.1f us" % (bench.name, result["median_us"]), file=sys.stderr)
+        except Exception as e:
+            result = {"status": ERROR, "error": "%s: %s" % (type(e).__name__, e)}
+            print("%-48s %15s  %s" % (bench.name, "error", result["error"]), file=sys.stderr)
+        results[bench.name] = result
+
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "system": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> Dict[str, dict]:
+    """
+    Compare the median times of two results documents. A benchmark regresses
+    if it is slower than the baseline by more than threshold, e.g. 0.25 for
+    25%, or if it fails while it succeeded in the baseline.
+    """
+    base_results = baseline["results"]
+    comparison = dict()
+
+    for name, result in results["results"].items():
+        base = base_results.get(name)
+
+        if result["status"] != OK:
+            status = BROKEN if base is not None and base["status"] == OK else ERROR
+            comparison[name] = {"status": status, "ratio": None}
+        elif base is None:
+            comparison[name] = {"status": NEW, "ratio": None}
+        elif base["status"] != OK:
+            comparison[name] = {"status": FIXED, "ratio": None}
+        else:
+            ratio = result["median_us"] / base["median_us"]
+            if ratio > 1.0 + threshold:
+                status = REGRESSION
+            elif ratio < 1.0 / (1.0 + threshold):
+                status = IMPROVEMENT
+            else:
+                status = OK
+            comparison[name] = {"status": status, "ratio": ratio}
+
+    return comparison
+
+
+def print_comparison(results: dict, baseline: dict, comparison: Dict[str, dict]):
+    print("%-48s %12s %12s %8s  %s" % ("benchmark", "baseline us", "current us", "ratio", "status"))
+    for name, cmp in comparison.items():
+        base = baseline["results"].get(name)
+        current = results["results"][name]
+        print(
+            "%-48s %12s %12s %8s  %s"
+            % (
+                name,
+                "%.1f" % base["median_us"] if base is not None and base["status"] == OK else "-",
+                "%.1f" % current["median_us"] if current["status"] == OK else "-",
+                "%.2fx" % cmp["ratio"] if cmp["ratio"] is not None else "-",
+                cmp["status"],
+            )
+        )
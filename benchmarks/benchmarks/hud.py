@@ -0,0 +1,43 @@
+import pygame
+from drive_and_log.loop import render, update_hud
+
+from .fixtures import DISPLAY_SIZE, scene
+from .harness import benchmark
+
+TRAFFIC = [
+    dict(vehicles=20),
+    dict(vehicles=200),
+]
+
+
+@benchmark("hud.update_hud.{vehicles}vehicles", TRAFFIC)
+def hud_update_hud(vehicles: int):
+    s = scene(vehicles)
+    return lambda: update_hud(s.state, s.hud, s.player, s.world, s.clock)
+
+
+@benchmark("hud.nearby_vehicles.{vehicles}vehicles", TRAFFIC)
+def hud_nearby_vehicles(vehicles: int):
+    s = scene(vehicles)
+    location = s.player.actor.get_location()
+    return lambda: s.hud.nearby_vehicles.update(s.world, s.player.actor, location)
+
+
+@benchmark("hud.render.{vehicles}vehicles", TRAFFIC)
+def hud_render(vehicles: int):
+    s = scene(vehicles)
+    display = pygame.Surface(DISPLAY_SIZE)
+    return lambda: render(s.hud, s.player, display)
+
+
+@benchmark("hud.render_refresh.{vehicles}vehicles", TRAFFIC)
+def hud_render_refresh(vehicles: int):
+    s = scene(vehicles)
+    display = pygame.Surface(DISPLAY_SIZE)
+
+    def run():
+        # Redraw the info text as on the frames that follow a refresh.
+        s.hud._info_dirty = True
+        render(s.hud, s.player, display)
+
+    return run
@@ -0,0 +1,98 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import fixtures, harness
+
+# Next to pyproject.toml
+DEFAULT_BASELINE = Path(__file__).resolve().parents[1] / "baseline.json"
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the examples against the fake CARLA server")
+    argparser.add_argument(
+        "-k",
+        "--filter",
+        metavar="PATTERN",
+        action="append",
+        help="run the benchmarks matching this glob pattern, e.g. 'parse_image.*' (repeatable)",
+    )
+    argparser.add_argument(
+        "-o",
+        "--output",
+        metavar="FILE",
+        default="results.json",
+        help="file to write the results to (default: results.json)",
+    )
+    argparser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        default=str(DEFAULT_BASELINE),
+        help="results to compare against (default: baseline.json)",
+    )
+    argparser.add_argument(
+        "--threshold",
+        default=0.25,
+        type=float,
+        help="fail if a benchmark is slower than the baseline by this ratio (default: 0.25)",
+    )
+    argparser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results to the baseline file instead of comparing",
+    )
+    argparser.add_argument("--repeat", default=5, type=int, help="timed samples per benchmark (default: 5)")
+    argparser.add_argument(
+        "--min-time",
+        default=0.2,
+        type=float,
+        help="minimum duration of a sample in seconds (default: 0.2)",
+    )
+    argparser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = argparser.parse_args()
+
+    # The benchmark modules import the examples, which import carla.
+    fixtures.setup()
+    from . import sensors, control, planning, hud, perception, surround  # noqa: F401
+
+    benchmarks = harness.registered(args.filter)
+    if args.list:
+        for bench in benchmarks:
+            print(bench.name)
+        return
+    if not benchmarks:
+        sys.exit("no benchmark matches %s" % args.filter)
+
+    results = harness.run(benchmarks, args.repeat, args.min_time)
+
+    if args.update_baseline:
+        _write(args.baseline, results)
+        print("baseline written to %s" % args.baseline)
+        return
+
+    _write(args.output, results)
+
+    if not Path(args.baseline).exists():
+        print("no baseline at %s, run with --update-baseline to create it" % args.baseline)
+        return
+
+    with open(args.baseline) as fp:
+        baseline = json.load(fp)
+    comparison = harness.compare(results, baseline, args.threshold)
+    harness.print_comparison(results, baseline, comparison)
+
+    failures = [
+        name
+        for name, cmp in comparison.items()
+        if cmp["status"] in (harness.REGRESSION, harness.BROKEN)
+    ]
+    if failures:
+        print("%d benchmark(s) regressed beyond %.0f%%" % (len(failures), args.threshold * 100))
+        sys.exit(1)
+
+
+def _write(path: str, results: dict):
+    with open(path, "w") as fp:
+        json.dump(results, fp, indent=2)
+        fp.write("\n")
@@ -0,0 +1,86 @@
+import numpy as np
+from carla import Location, Transform
+from mountain_driving.fusion import LidarCameraProjection
+from mountain_driving.lidar_obstacles import LidarObstaclePipeline, cluster, voxel_downsample
+
+from .fixtures import capture
+from .harness import benchmark
+
+# A full revolution per measurement, subsampled to a fixed number of points
+LIDAR_POINTS = [
+    dict(points=100000),
+]
+
+LIDAR_RANGE = 50.0
+
+
+def _sweep(points: int) -> np.ndarray:
+    measurement = capture(
+        "sensor.lidar.ray_cast",
+        {"points_per_second": 2200000, "rotation_frequency": 20, "range": LIDAR_RANGE},
+    )
+    cloud = np.frombuffer(measurement.raw_data, dtype=np.float32).reshape(-1, 4)
+    rows = np.random.default_rng(0).choice(len(cloud), points, replace=False)
+    return cloud[np.sort(rows)]
+
+
+def _projection() -> LidarCameraProjection:
+    # Mounted together, as RgbCamera and LidarSensor are
+    mount = Transform(Location(x=1.5, z=2.4))
+    return LidarCameraProjection(1920, 1080, 90.0, mount, mount)
+
+
+def _pipeline(**kwargs) -> LidarObstaclePipeline:
+    # The fake lidar of the hero vehicle is mounted 2.9 m above the ground.
+    return LidarObstaclePipeline(ground_z=-2.9, **kwargs)
+
+
+# ==============================================================================
+# -- Lidar obstacles -----------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("lidar_obstacles.pipeline.{points}pts", LIDAR_POINTS)
+def lidar_obstacles_pipeline(points: int):
+    cloud = _sweep(points)
+    pipeline = _pipeline()
+    return lambda: pipeline(cloud)
+
+
+@benchmark("lidar_obstacles.pipeline_ransac.{points}pts", LIDAR_POINTS)
+def lidar_obstacles_pipeline_ransac(points: int):
+    cloud = _sweep(points)
+    pipeline = _pipeline(ground="ransac")
+    return lambda: pipeline(cloud)
+
+
+@benchmark("lidar_obstacles.voxel_downsample.{points}pts", LIDAR_POINTS)
+def lidar_obstacles_voxel_downsample(points: int):
+    cloud = _sweep(points)
+    return lambda: voxel_downsample(cloud[:, :3], 0.2)
+
+
+@benchmark("lidar_obstacles.cluster.{points}pts", LIDAR_POINTS)
+def lidar_obstacles_cluster(points: int):
+    voxels, _ = voxel_downsample(_sweep(points)[:, :3], 0.2)
+    return lambda: cluster(voxels, 0.5)
+
+
+# ==============================================================================
+# -- Camera-lidar fusion -------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("fusion.depth_image.1920x1080.{points}pts", LIDAR_POINTS)
+def fusion_depth_image(points: int):
+    cloud = _sweep(points)
+    projection = _projection()
+    return lambda: projection.depth_image(cloud)
+
+
+@benchmark("fusion.overlay.1920x1080.{points}pts", LIDAR_POINTS)
+def fusion_overlay(points: int):
+    cloud = _sweep(points)
+    projection = _projection()
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    return lambda: projection.overlay(image, cloud)
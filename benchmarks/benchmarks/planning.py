@@ -0,0 +1,25 @@
+from agents.navigation.global_route_planner import GlobalRoutePlanner
+
+from .fixtures import scene
+from .harness import benchmark
+
+# Sampling resolution of BasicAgent
+SAMPLING_RESOLUTION = 2.0
+
+
+@benchmark("route_planner.build")
+def route_planner_build():
+    wmap = scene().world.get_map()
+    return lambda: GlobalRoutePlanner(wmap, SAMPLING_RESOLUTION)
+
+
+@benchmark("route_planner.trace_route")
+def route_planner_trace_route():
+    wmap = scene().world.get_map()
+    planner = GlobalRoutePlanner(wmap, SAMPLING_RESOLUTION)
+
+    # The pair of spawn points farthest apart
+    points = wmap.get_spawn_points()
+    origin = points[0].location
+    destination = max(points, key=lambda p: p.location.distance(origin)).location
+    return lambda: planner.trace_route(origin, destination)
@@ -0,0 +1,267 @@
+import math
+import os
+import weakref
+
+import cv2
+from carla import ColorConverter as CC
+from drive_and_log.sensor import (
+    DepthCamera,
+    DepthDecoder,
+    DvsRenderer,
+    EventWriter,
+    FlowDecoder,
+    FlowWriter,
+    LidarSensor,
+    RgbCamera,
+    decode_flow,
+    instance_ids,
+    label_stats,
+    semantic_tags,
+)
+from drive_and_log.sensor.segmentation import NUM_INSTANCES, NUM_TAGS
+from drive_and_log.sensor.buffer_pool import BufferPools
+from drive_and_log.sensor.camera_manager import CameraManager, ImageSurface
+from drive_and_log.ui import HUD
+
+from .fixtures import DISPLAY_SIZE, capture, scene
+from .harness import benchmark
+
+RESOLUTIONS = [
+    dict(width=640, height=360),
+    dict(width=1280, height=720),
+    dict(width=1920, height=1080),
+]
+
+LIDAR_RATES = [
+    dict(pps=100000),
+    dict(pps=500000),
+    dict(pps=1300000),
+]
+
+LIDAR_RANGE = 50.0
+
+
+def _camera(kind: str, width: int, height: int):
+    return capture(kind, {"image_size_x": width, "image_size_y": height})
+
+
+def _lidar(pps: int):
+    return capture("sensor.lidar.ray_cast", {"points_per_second": pps, "range": LIDAR_RANGE})
+
+
+def _parse_image(kind: str, cc, data, width: int, height: int):
+    hud = HUD(width, height)
+    image_surface = ImageSurface()
+    buffer_pools = BufferPools()
+    event_renderer = DvsRenderer()
+    return lambda: CameraManager._parse_image(
+        kind,
+        cc,
+        data,
+        hud,
+        False,
+        LIDAR_RANGE,
+        lambda: None,
+        image_surface,
+        buffer_pools,
+        event_renderer,
+    )
+
+
+# ==============================================================================
+# -- CameraManager._parse_image ------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("parse_image.rgb.{width}x{height}", RESOLUTIONS)
+def parse_image_rgb(width: int, height: int):
+    image = _camera("sensor.camera.rgb", width, height)
+    return _parse_image("sensor.camera.rgb", CC.Raw, image, width, height)
+
+
+@benchmark("parse_image.dvs.{width}x{height}", RESOLUTIONS)
+def parse_image_dvs(width: int, height: int):
+    events = _camera("sensor.camera.dvs", width, height)
+    return _parse_image("sensor.camera.dvs", CC.Raw, events, width, height)
+
+
+@benchmark("parse_image.optical_flow.{width}x{height}", RESOLUTIONS)
+def parse_image_optical_flow(width: int, height: int):
+    image = _camera("sensor.camera.optical_flow", width, height)
+    # CARLA color-codes the flow in C++. Code it once so that the fake's
+    # NumPy implementation is not timed.
+    coded = image.get_color_coded_flow()
+    image.get_color_coded_flow = lambda: coded
+    return _parse_image("sensor.camera.optical_flow", CC.Raw, image, width, height)
+
+
+@benchmark("parse_image.segmentation.{width}x{height}", RESOLUTIONS)
+def parse_image_segmentation(width: int, height: int):
+    image = _camera("sensor.camera.semantic_segmentation", width, height)
+    return _parse_image(
+        "sensor.camera.semantic_segmentation", CC.CityScapesPalette, image, width, height
+    )
+
+
+@benchmark("parse_image.lidar.{pps}pps", LIDAR_RATES)
+def parse_image_lidar(pps: int):
+    measurement = _lidar(pps)
+    return _parse_image("sensor.lidar.ray_cast", None, measurement, *DISPLAY_SIZE)
+
+
+# ==============================================================================
+# -- Sensor callbacks ----------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("rgb_camera.callback.{width}x{height}", RESOLUTIONS)
+def rgb_camera_callback(width: int, height: int):
+    image = _camera("sensor.camera.rgb", width, height)
+    camera = RgbCamera(scene().player.actor)
+    camera.set_callback(lambda array: None)
+    weak_camera = weakref.ref(camera)
+
+    def run():
+        # Keep the camera alive as long as the benchmark.
+        assert camera is not None
+        RgbCamera._private_callback(weak_camera, image)
+
+    return run
+
+
+@benchmark("rgb_camera.callback_hsv.{width}x{height}", RESOLUTIONS)
+def rgb_camera_callback_hsv(width: int, height: int):
+    # The callback with a consumer that converts the image, as the agent of
+    # mountain_driving does.
+    image = _camera("sensor.camera.rgb", width, height)
+    camera = RgbCamera(scene().player.actor)
+    camera.set_callback(lambda array: cv2.cvtColor(array, cv2.COLOR_BGR2HSV))
+    weak_camera = weakref.ref(camera)
+
+    def run():
+        assert camera is not None
+        RgbCamera._private_callback(weak_camera, image)
+
+    return run
+
+
+@benchmark("lidar_sensor.callback.{pps}pps", LIDAR_RATES)
+def lidar_sensor_callback(pps: int):
+    measurement = _lidar(pps)
+    lidar = LidarSensor(scene().player.actor)
+    lidar.set_callback(lambda points: None)
+    weak_lidar = weakref.ref(lidar)
+
+    def run():
+        assert lidar is not None
+        LidarSensor._private_callback(weak_lidar, measurement)
+
+    return run
+
+
+@benchmark("lidar_sensor.callback_compensated.{pps}pps", LIDAR_RATES)
+def lidar_sensor_callback_compensated(pps: int):
+    # Half a revolution per measurement, moved to the pose of the last one
+    measurement = _lidar(pps)
+    lidar = LidarSensor(scene().player.actor, motion_compensation=True)
+    lidar.set_callback(lambda points: None)
+    weak_lidar = weakref.ref(lidar)
+    angles = [measurement.horizontal_angle, measurement.horizontal_angle + math.pi]
+    index = [0]
+
+    def run():
+        assert lidar is not None
+        index[0] = 1 - index[0]
+        measurement.horizontal_angle = angles[index[0]]
+        LidarSensor._private_callback(weak_lidar, measurement)
+
+    return run
+
+
+# ==============================================================================
+# -- Depth camera --------------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("depth_camera.callback.{width}x{height}", RESOLUTIONS)
+def depth_camera_callback(width: int, height: int):
+    image = _camera("sensor.camera.depth", width, height)
+    camera = DepthCamera(scene().player.actor)
+    camera.set_callback(lambda depth: None)
+    weak_camera = weakref.ref(camera)
+
+    def run():
+        assert camera is not None
+        DepthCamera._private_callback(weak_camera, image)
+
+    return run
+
+
+@benchmark("depth_decoder.point_cloud.{width}x{height}", RESOLUTIONS)
+def depth_decoder_point_cloud(width: int, height: int):
+    image = _camera("sensor.camera.depth", width, height)
+    decoder = DepthDecoder()
+    return lambda: decoder.point_cloud(image)
+
+
+@benchmark("depth_decoder.point_cloud_stride4.{width}x{height}", RESOLUTIONS)
+def depth_decoder_point_cloud_stride4(width: int, height: int):
+    # Every 4th pixel in each direction, without the sky
+    image = _camera("sensor.camera.depth", width, height)
+    decoder = DepthDecoder()
+    return lambda: decoder.point_cloud(image, stride=4, max_depth=100.0)
+
+
+# ==============================================================================
+# -- Segmentation --------------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("segmentation.tag_stats.{width}x{height}", RESOLUTIONS)
+def segmentation_tag_stats(width: int, height: int):
+    image = _camera("sensor.camera.semantic_segmentation", width, height)
+    return lambda: label_stats(semantic_tags(image), NUM_TAGS)
+
+
+@benchmark("segmentation.instance_stats.{width}x{height}", RESOLUTIONS)
+def segmentation_instance_stats(width: int, height: int):
+    image = _camera("sensor.camera.instance_segmentation", width, height)
+    return lambda: label_stats(instance_ids(image), NUM_INSTANCES)
+
+
+# ==============================================================================
+# -- Optical flow --------------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("optical_flow.stats.{width}x{height}", RESOLUTIONS)
+def optical_flow_stats(width: int, height: int):
+    image = _camera("sensor.camera.optical_flow", width, height)
+    decoder = FlowDecoder()
+    return lambda: decoder.stats(decode_flow(image))
+
+
+@benchmark("optical_flow.stats_downsample4.{width}x{height}", RESOLUTIONS)
+def optical_flow_stats_downsample4(width: int, height: int):
+    image = _camera("sensor.camera.optical_flow", width, height)
+    decoder = FlowDecoder()
+    return lambda: decoder.stats(decoder.downsample(decode_flow(image), 4))
+
+
+@benchmark("optical_flow.write.{width}x{height}", RESOLUTIONS)
+def optical_flow_write(width: int, height: int):
+    image = _camera("sensor.camera.optical_flow", width, height)
+    writer = FlowWriter(os.devnull, width, height)
+    return lambda: writer.write(image)
+
+
+# ==============================================================================
+# -- DVS events ----------------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("dvs.write_events.{width}x{height}", RESOLUTIONS)
+def dvs_write_events(width: int, height: int):
+    events = _camera("sensor.camera.dvs", width, height)
+    writer = EventWriter(os.devnull, width, height)
+    return lambda: writer.write(events)
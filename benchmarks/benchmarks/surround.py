@@ -0,0 +1,47 @@
+import tempfile
+
+from carla import Vector3D
+from multi_view.sensor.birds_eye import BirdsEyeView, CameraLayout, load_tables
+from multi_view.sensor.camera_manager import VIDEO_RESOLUTION, generate_vehicle_transforms
+
+from .fixtures import capture
+from .harness import benchmark
+
+# Bounding box extent of a Tesla Model 3, on which the cameras are mounted
+VEHICLE_EXTENT = Vector3D(2.4, 1.0, 0.75)
+
+# The view fills the height of the front tile of a 1280x768 window.
+VIEW_SIZE = (460, 460)
+METERS_PER_PIXEL = 24.0 / VIEW_SIZE[0]
+
+
+def _cameras():
+    width, height = VIDEO_RESOLUTION
+    transforms = generate_vehicle_transforms(VEHICLE_EXTENT)
+    return [CameraLayout(transform, width, height, 90.0) for transform, _ in transforms]
+
+
+# ==============================================================================
+# -- Bird's-eye view -----------------------------------------------------------
+# ==============================================================================
+
+
+@benchmark("birds_eye.update.1920x1080")
+def birds_eye_update():
+    width, height = VIDEO_RESOLUTION
+    image = capture("sensor.camera.rgb", {"image_size_x": width, "image_size_y": height})
+    view = BirdsEyeView(_cameras(), VIEW_SIZE, METERS_PER_PIXEL, cache_dir=None)
+
+    def update():
+        for index in range(len(view.tables)):
+            view.update(index, image)
+
+    return update
+
+
+@benchmark("birds_eye.load_tables")
+def birds_eye_load_tables():
+    cache_dir = tempfile.mkdtemp()
+    cameras = _cameras()
+    load_tables(cameras, VIEW_SIZE, METERS_PER_PIXEL, cache_dir=cache_dir)
+    return lambda: load_tables(cameras, VIEW_SIZE, METERS_PER_PIXEL, cache_dir=cache_dir)
@@ -1,9 +1,8 @@
 from carla import Actor, Image, VehicleControl, VehicleLightState, Location
 import numpy as np
 from .ui import HUD
-from .utils import get_actor_display_name
+from .utils import CollisionHistory, get_actor_display_name
 import math
-from collections import defaultdict
 from .state import State
 from agents.navigation.basic_agent import BasicAgent
 from typing import List
@@ -11,7 +10,7 @@ from typing import List
 
 class TaAgent:
     hud = None
-    collision_history = list()
+    collision_history: CollisionHistory = None
     state: State = None
     agent: BasicAgent = None
 
@@ -30,16 +29,14 @@ class TaAgent:
 
         self.hud = hud
         self.state = state
+        self.collision_history = CollisionHistory()
         self.actor = actor
         self.agent = agent
         self.points = points
         self.next_index = 0
 
-    def get_collision_history(self):
-        history = defaultdict(int)
-        for frame, intensity in self.collision_history:
-            history[frame] += intensity
-        return history
+    def get_collision_history(self) -> CollisionHistory:
+        return self.collision_history
 
     def step(self) -> VehicleControl:
         if self.agent.done():
@@ -64,9 +61,7 @@ class TaAgent:
         self.hud.notification("Collision with %r" % actor_type)
         impulse = event.normal_impulse
         intensity = math.sqrt(impulse.x**2 + impulse.y**2 + impulse.z**2)
-        self.collision_history.append((event.frame, intensity))
-        if len(self.collision_history) > 4000:
-            self.history.pop(0)
+        self.collision_history.add(event.frame, intensity)
 
     def on_lane_invasion(self, event):
         self.state.lane_invasion_count += 1
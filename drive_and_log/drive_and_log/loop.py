@@ -5,12 +5,13 @@ from .config import (
     WORLD,
     NPC3_ROUTE,
 )
-from .ui import HUD
+from .ui import HUD, DisplayThread
 from .keyboard_control import KeyboardControl
 from .vehicle import Vehicle
 from .utils import get_actor_display_name
 import math
 import datetime
+import time
 from pygame.time import Clock
 from .state import State
 
@@ -20,6 +21,7 @@ def game_loop(args):
     pygame.font.init()
     world = None
     original_settings = None
+    display_thread = None
 
     try:
         # Initialize world
@@ -51,8 +53,11 @@ def game_loop(args):
         )
         display.fill((0, 0, 0))
         pygame.display.flip()
+        if args.threaded_display:
+            display_thread = DisplayThread(display)
+            display_thread.start()
 
-        hud = HUD(args.width, args.height)
+        hud = HUD(args.width, args.height, args.hud_rate)
 
         # Create a vehicle
         state = State()
@@ -89,9 +94,7 @@ def game_loop(args):
                 return
 
             tick(State, hud, player, sim_world, clock)
-            render(hud, player, display)
-
-            pygame.display.flip()
+            show(hud, player, display, display_thread)
 
     finally:
         if original_settings:
@@ -100,6 +103,9 @@ def game_loop(args):
         if world and world.recording_enabled:
             client.stop_recorder()
 
+        if display_thread is not None:
+            display_thread.stop()
+
         pygame.quit()
 
 
@@ -110,7 +116,7 @@ def tick(state: State, hud: HUD, player: Vehicle, world: carla.World, clock):
 
 def update_hud(state: State, hud: HUD, player: Vehicle, world: carla.World, clock):
     hud._notifications.tick(world, clock)
-    if not hud._show_info:
+    if not hud._show_info or not hud.info_due():
         return
     t = player.actor.get_transform()
     v = player.actor.get_velocity()
@@ -120,14 +126,19 @@ def update_hud(state: State, hud: HUD, player: Vehicle, world: carla.World, cloc
     heading += "S" if 90.5 < compass < 269.5 else ""
     heading += "E" if 0.5 < compass < 179.5 else ""
     heading += "W" if 180.5 < compass < 359.5 else ""
-    colhist = player.get_collision_history()
-    collision = [colhist[x + hud.frame - 200] for x in range(0, 200)]
-    max_col = max(1.0, max(collision))
-    collision = [x / max_col for x in collision]
-    vehicles = world.get_actors().filter("vehicle.*")
+    collision = player.get_collision_history().window(hud.frame, 200)
+    max_col = max(1.0, collision.max())
+    collision = (collision / max_col).tolist()
+    nearby = hud.nearby_vehicles
+    nearby.update(world, player.actor, t.location)
     hud._info_text = [
         "Server:  % 16.0f FPS" % hud.server_fps,
         "Client:  % 16.0f FPS" % clock.get_fps(),
+        "HUD:     % 17.2f ms" % hud.render_time,
+    ]
+    if hud.display_fps is not None:
+        hud._info_text += ["Display: % 16.0f FPS" % hud.display_fps]
+    hud._info_text += [
         "",
         "Vehicle: % 20s" % get_actor_display_name(player.actor, truncate=20),
         "Map:     % 20s" % world.get_map().name.split("/")[-1],
@@ -168,73 +179,92 @@ def update_hud(state: State, hud: HUD, player: Vehicle, world: carla.World, cloc
         "Collision:",
         collision,
         "",
-        "Number of vehicles: % 8d" % len(vehicles),
+        "Number of vehicles: % 8d" % nearby.total,
     ]
-    if len(vehicles) > 1:
+    if nearby.total > 1:
         hud._info_text += ["Nearby vehicles:"]
-        distance = lambda l: math.sqrt(
-            (l.x - t.location.x) ** 2
-            + (l.y - t.location.y) ** 2
-            + (l.z - t.location.z) ** 2
-        )
-        vehicles = [
-            (distance(x.get_location()), x) for x in vehicles if x.id != player.actor.id
-        ]
-        for d, vehicle in sorted(vehicles, key=lambda vehicles: vehicles[0]):
-            if d > 200.0:
-                break
-            vehicle_type = get_actor_display_name(vehicle, truncate=22)
+        for d, vehicle_type in nearby.vehicles:
             hud._info_text.append("% 4dm %s" % (d, vehicle_type))
 
 
+def show(hud: HUD, player: Vehicle, display, display_thread: DisplayThread):
+    if display_thread is None:
+        render(hud, player, display)
+        pygame.display.flip()
+    else:
+        render(hud, player, display_thread.surface)
+        display_thread.present()
+        hud.display_fps = display_thread.fps
+
+
 def render(hud: HUD, player: Vehicle, display):
     player.render(display)
 
+    start = time.perf_counter()
     if hud._show_info:
-        info_surface = pygame.Surface((220, hud.dim[1]))
-        info_surface.set_alpha(100)
-        display.blit(info_surface, (0, 0))
-        v_offset = 4
-        bar_h_offset = 100
-        bar_width = 106
-        for item in hud._info_text:
-            if v_offset + 18 > hud.dim[1]:
-                break
-            if isinstance(item, list):
-                if len(item) > 1:
-                    points = [
-                        (x + 8, v_offset + 8 + (1.0 - y) * 30)
-                        for x, y in enumerate(item)
-                    ]
-                    pygame.draw.lines(display, (255, 136, 0), False, points, 2)
-                item = None
-                v_offset += 18
-            elif isinstance(item, tuple):
-                if isinstance(item[1], bool):
-                    rect = pygame.Rect((bar_h_offset, v_offset + 8), (6, 6))
+        if hud._info_dirty:
+            draw_info(hud)
+            hud._info_dirty = False
+        display.blit(hud._info_background, (0, 0))
+        display.blit(hud._info_layer, hud._info_rect, hud._info_rect)
+    hud._notifications.render(display)
+    hud.help.render(display)
+    hud.add_render_time(time.perf_counter() - start)
+
+
+def draw_info(hud: HUD):
+    # Text is blitted with BLEND_RGBA_MAX so that its alpha is kept on the
+    # transparent layer instead of being blended with it.
+    layer = hud._info_layer
+    layer.fill((0, 0, 0, 0), hud._info_rect)
+    drawn = list()
+    v_offset = 4
+    bar_h_offset = 100
+    bar_width = 106
+    for item in hud._info_text:
+        if v_offset + 18 > hud.dim[1]:
+            break
+        if isinstance(item, list):
+            if len(item) > 1:
+                points = [
+                    (x + 8, v_offset + 8 + (1.0 - y) * 30)
+                    for x, y in enumerate(item)
+                ]
+                drawn.append(pygame.draw.lines(layer, (255, 136, 0), False, points, 2))
+            item = None
+            v_offset += 18
+        elif isinstance(item, tuple):
+            if isinstance(item[1], bool):
+                rect = pygame.Rect((bar_h_offset, v_offset + 8), (6, 6))
+                drawn.append(
                     pygame.draw.rect(
-                        display, (255, 255, 255), rect, 0 if item[1] else 1
+                        layer, (255, 255, 255), rect, 0 if item[1] else 1
+                    )
+                )
+            else:
+                rect_border = pygame.Rect(
+                    (bar_h_offset, v_offset + 8), (bar_width, 6)
+                )
+                drawn.append(pygame.draw.rect(layer, (255, 255, 255), rect_border, 1))
+                f = (item[1] - item[2]) / (item[3] - item[2])
+                if item[2] < 0.0:
+                    rect = pygame.Rect(
+                        (bar_h_offset + f * (bar_width - 6), v_offset + 8),
+                        (6, 6),
                     )
                 else:
-                    rect_border = pygame.Rect(
-                        (bar_h_offset, v_offset + 8), (bar_width, 6)
+                    rect = pygame.Rect(
+                        (bar_h_offset, v_offset + 8), (f * bar_width, 6)
                     )
-                    pygame.draw.rect(display, (255, 255, 255), rect_border, 1)
-                    f = (item[1] - item[2]) / (item[3] - item[2])
-                    if item[2] < 0.0:
-                        rect = pygame.Rect(
-                            (bar_h_offset + f * (bar_width - 6), v_offset + 8),
-                            (6, 6),
-                        )
-                    else:
-                        rect = pygame.Rect(
-                            (bar_h_offset, v_offset + 8), (f * bar_width, 6)
-                        )
-                    pygame.draw.rect(display, (255, 255, 255), rect)
-                item = item[0]
-            if item:  # At this point has to be a str.
-                surface = hud._font_mono.render(item, True, (255, 255, 255))
-                display.blit(surface, (8, v_offset))
-            v_offset += 18
-    hud._notifications.render(display)
-    hud.help.render(display)
+                drawn.append(pygame.draw.rect(layer, (255, 255, 255), rect))
+            item = item[0]
+        if item:  # At this point has to be a str.
+            drawn.append(
+                layer.blit(
+                    hud.render_line(item),
+                    (8, v_offset),
+                    special_flags=pygame.BLEND_RGBA_MAX,
+                )
+            )
+        v_offset += 18
+    hud._info_rect = pygame.Rect(0, 0, 0, 0).unionall(drawn)
@@ -5,4 +5,12 @@ from .imu import IMUSensor
 from .lane_invasion import LaneInvasionSensor
 from .radar import RadarSensor
 from .lidar import LidarSensor
+from .lidar_sweep import LidarSweep, SweepAssembler
 from .rgb_camera import RgbCamera
+from .depth import DepthDecoder
+from .depth_camera import DepthCamera
+from .segmentation import LabelStats, colorize, instance_ids, label_stats, semantic_tags
+from .optical_flow import FlowDecoder, FlowStats, FlowWriter, decode_flow, read_flow
+from .optical_flow_camera import OpticalFlowCamera
+from .dvs import DvsRenderer, EventWriter, decode_events, read_events, read_resolution
+from .buffer_pool import BufferPool, BufferPools
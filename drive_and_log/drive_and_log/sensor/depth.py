@@ -0,0 +1,99 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import carla
+import numpy as np
+
+# Depth of the largest 24-bit code of a depth camera, in meters
+MAX_DEPTH = 1000.0
+DEPTH_SCALE = MAX_DEPTH / (256**3 - 1)
+
+
+class DepthDecoder(object):
+    """
+    Decode the images of a sensor.camera.depth to metric depth and point
+    clouds in reused buffers.
+
+    The depth of a pixel is (R + G * 256 + B * 65536) / (256**3 - 1) * 1000
+    meters. Read as big-endian 32-bit integers, the BGRA bytes of a pixel
+    are B << 24 | G << 16 | R << 8 | A, so the 24-bit code is a single
+    shift of that, which is then scaled into a float32 buffer. Both steps
+    write to buffers kept per resolution.
+
+    Points are back-projected with ray grids built once per resolution,
+    field of view and stride. With a stride, only every stride-th pixel in
+    each direction is decoded.
+
+    The returned arrays are overwritten by the next call with the same
+    resolution and stride; copy them to keep them.
+    """
+
+    def __init__(self):
+        self._codes: Dict[Tuple[int, int], np.ndarray] = dict()
+        self._depths: Dict[Tuple[int, int], np.ndarray] = dict()
+        self._points: Dict[Tuple[int, int], np.ndarray] = dict()
+        self._rays: Dict[Tuple[int, int, float, int], Tuple[np.ndarray, np.ndarray]] = dict()
+
+    def decode(self, image: carla.Image, stride: int = 1) -> np.ndarray:
+        """Return the depth in meters as an HxW float32 array."""
+        codes = np.frombuffer(image.raw_data, dtype=np.dtype(">u4"))
+        codes = codes.reshape(image.height, image.width)[::stride, ::stride]
+
+        shape = codes.shape
+        code = self._codes.get(shape)
+        depth = self._depths.get(shape)
+        if code is None:
+            code = self._codes[shape] = np.empty(shape, np.uint32)
+            depth = self._depths[shape] = np.empty(shape, np.float32)
+
+        np.right_shift(codes, 8, out=code)
+        np.multiply(code, np.float32(DEPTH_SCALE), out=depth)
+        return depth
+
+    def rays(
+        self, width: int, height: int, fov: float, stride: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the lateral and vertical slopes of the rays through the
+        pixels, so that the point of a pixel at depth d is
+        (d, d * right, d * up) in the camera frame, x forward, y right and
+        z up. fov is the horizontal field of view in degrees.
+        """
+        key = (width, height, float(fov), stride)
+        rays = self._rays.get(key)
+        if rays is None:
+            focal = width / (2.0 * math.tan(math.radians(fov) / 2.0))
+            u = (np.arange(0, width, stride, dtype=np.float32) - width / 2.0) / focal
+            v = (np.arange(0, height, stride, dtype=np.float32) - height / 2.0) / focal
+            right = np.broadcast_to(u[None, :], (len(v), len(u)))
+            up = np.broadcast_to(-v[:, None], (len(v), len(u)))
+            rays = self._rays[key] = (right, up)
+        return rays
+
+    def point_cloud(
+        self,
+        image: carla.Image,
+        stride: int = 1,
+        max_depth: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Return the points of the pixels as an Nx3 float32 array in the
+        camera frame. Pixels at max_depth or farther, e.g. the sky at
+        MAX_DEPTH, are dropped when max_depth is given, which copies the
+        points. Otherwise the array has a row per decoded pixel.
+        """
+        depth = self.decode(image, stride)
+        right, up = self.rays(image.width, image.height, image.fov, stride)
+
+        shape = depth.shape
+        points = self._points.get(shape)
+        if points is None:
+            points = self._points[shape] = np.empty(shape + (3,), np.float32)
+        points[:, :, 0] = depth
+        np.multiply(depth, right, out=points[:, :, 1])
+        np.multiply(depth, up, out=points[:, :, 2])
+
+        points = points.reshape(-1, 3)
+        if max_depth is not None:
+            points = points[depth.reshape(-1) < max_depth]
+        return points
@@ -11,6 +11,8 @@ from carla import (
 import weakref
 import math
 from ..utils import get_actor_bounding_extent
+from .buffer_pool import BufferPools
+import cv2
 import numpy as np
 
 
@@ -38,12 +40,19 @@ class RgbCamera(object):
         sensor.listen(lambda image: RgbCamera._private_callback(weak_self, image))
 
         self.sensor = sensor
+        # Mounting pose relative to the vehicle
+        self.transform = trans
+        self.buffer_pools = BufferPools()
         self._parent = actor
 
     def __del__(self):
         self.sensor.destroy()
 
     def set_callback(self, callback):
+        """
+        Set the function called with every image as an HxWx3 BGR array. The
+        array is recycled after the callback returns; copy it to keep it.
+        """
         self.callback = callback
 
     @staticmethod
@@ -53,12 +62,17 @@ class RgbCamera(object):
         if not me:
             return
 
-        # Parse point cloud data into Nx4 array
+        if me.callback is None:
+            return
+
+        # Parse image data into HxWx4 array
         image.convert(ColorConverter.Raw)
         array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
         array = np.reshape(array, (image.height, image.width, 4))
-        array = array[:, :, :3]
 
-        # Invoke callback
-        if me.callback is not None:
-            me.callback(array)
+        # Copy the BGR channels into a recycled, contiguous buffer and invoke
+        # callback. cv2 drops the alpha channel much faster than NumPy does.
+        pool = me.buffer_pools.get("image", (image.height, image.width, 3), np.uint8)
+        with pool.borrow() as buffer:
+            cv2.cvtColor(array, cv2.COLOR_BGRA2BGR, dst=buffer)
+            me.callback(buffer)
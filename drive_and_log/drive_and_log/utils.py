@@ -1,4 +1,7 @@
 import re
+import time
+from typing import Dict, List, Tuple
+import numpy as np
 from carla import WeatherParameters, Vector3D, Actor, World, Location
 
 
@@ -51,3 +54,118 @@ def get_actor_bounding_extent(actor: Actor) -> Vector3D:
     orig_extent = actor.bounding_box.extent
     new_extent = Vector3D(orig_extent.x + 0.5, orig_extent.y + 0.5, orig_extent.z + 0.5)
     return new_extent
+
+
+class CollisionHistory(object):
+    """
+    Collision intensities of the last `size` frames, summed per frame. The
+    intensities are kept in a ring buffer indexed by frame % size, so adding
+    an event takes constant time and memory does not grow with the length
+    of the run. The buffer is stored twice in a row, so that every window of
+    up to `size` frames is a contiguous view.
+    """
+
+    def __init__(self, size: int = 4000):
+        self._size = size
+        self._buffer = np.zeros(2 * size, dtype=np.float64)
+        self._frame = -1
+
+    def add(self, frame: int, intensity: float):
+        self._advance(frame)
+        if frame <= self._frame - self._size:
+            return
+
+        slot = frame % self._size
+        self._buffer[slot] += intensity
+        self._buffer[slot + self._size] += intensity
+
+    def window(self, frame: int, length: int = 200) -> np.ndarray:
+        """
+        Return a read-only view of the intensities of the `length` frames
+        before `frame`, from oldest to newest.
+        """
+        assert length <= self._size
+        self._advance(frame - 1)
+        start = (frame - length) % self._size
+        view = self._buffer[start : start + length]
+        view.flags.writeable = False
+        return view
+
+    def _advance(self, frame: int):
+        # Clear the slots of the frames that have passed since the last call.
+        if frame <= self._frame:
+            return
+        slots = np.arange(max(self._frame + 1, frame - self._size + 1), frame + 1)
+        slots %= self._size
+        self._buffer[slots] = 0.0
+        self._buffer[slots + self._size] = 0.0
+        self._frame = frame
+
+
+class NearbyVehicles(object):
+    """
+    The closest vehicles to the player within `radius` meters, as
+    (distance, display name) pairs, refreshed `rate` times per second, or on
+    every call if `rate` is not positive.
+
+    The vehicle positions are read from a single world snapshot, and only the
+    `count` closest vehicles are sorted. The vehicle list and the display
+    names are kept until the number of actors in the world changes.
+    """
+
+    def __init__(self, radius: float = 200.0, count: int = 20, rate: float = 2.0):
+        self.radius = radius
+        self.count = count
+        self.rate = rate
+        self.total = 0
+        self.vehicles: List[Tuple[float, str]] = []
+        self._snapshot_size = -1
+        self._ids: List[int] = []
+        self._names: Dict[int, str] = dict()
+        self._refreshed_at = None
+
+    def update(self, world: World, player: Actor, location: Location):
+        now = time.monotonic()
+        if (
+            self.rate > 0
+            and self._refreshed_at is not None
+            and now - self._refreshed_at < 1.0 / self.rate
+        ):
+            return
+        self._refreshed_at = now
+
+        snapshot = world.get_snapshot()
+        if len(snapshot) != self._snapshot_size:
+            self._snapshot_size = len(snapshot)
+            self._list_vehicles(world, player)
+
+        positions = []
+        for actor_id in self._ids:
+            actor_snapshot = snapshot.find(actor_id)
+            if actor_snapshot is None:
+                # Destroyed while another actor was spawned; list again next time.
+                self._snapshot_size = -1
+                positions.append((np.inf, np.inf, np.inf))
+                continue
+            l = actor_snapshot.get_transform().location
+            positions.append((l.x, l.y, l.z))
+        positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        positions -= (location.x, location.y, location.z)
+        distances = np.sqrt(np.einsum("ij,ij->i", positions, positions))
+
+        nearby = np.flatnonzero(distances <= self.radius)
+        if len(nearby) > self.count:
+            closest = np.argpartition(distances[nearby], self.count - 1)
+            nearby = nearby[closest[: self.count]]
+        nearby = nearby[np.argsort(distances[nearby])]
+        self.vehicles = [(float(distances[i]), self._names[self._ids[i]]) for i in nearby]
+
+    def _list_vehicles(self, world: World, player: Actor):
+        vehicles = world.get_actors().filter("vehicle.*")
+        self.total = len(vehicles)
+        self._ids = [x.id for x in vehicles if x.id != player.id]
+        self._names = {
+            x.id: self._names.get(x.id) or get_actor_display_name(x, truncate=22)
+            for x in vehicles
+            if x.id != player.id
+        }
@@ -0,0 +1,94 @@
+""" A fake CARLA server for benchmarks and tests without a simulator.
+
+The package implements the subset of the `carla` Python API used by the
+examples: a client, a world that advances in ticks, kinematic vehicles and
+walkers, and sensors that deliver synthetic data with the layout and size of
+real measurements. Importing it in place of `carla` lets the examples run
+headless with deterministic, configurable load.
+
+    import fake_carla
+    fake_carla.configure(num_vehicles=100, camera_size=(1920, 1080))
+    fake_carla.install()  # `import carla` now returns fake_carla
+
+    import carla
+    client = carla.Client("127.0.0.1", 2000)
+    world = client.load_world("Town10HD_Opt")
+
+To run an example end-to-end, see `python -m fake_carla --help`.
+"""
+
+import sys
+
+from .actor import Actor, ActorList, Sensor, TrafficLight, Vehicle, Walker
+from .blueprint import ActorAttribute, ActorBlueprint, BlueprintLibrary
+from .client import Client, TrafficManager
+from .config import CONFIG, Config
+from .control import (
+    GearPhysicsControl,
+    VehicleControl,
+    VehiclePhysicsControl,
+    WalkerControl,
+    WeatherParameters,
+    WheelPhysicsControl,
+    WorldSettings,
+)
+from .enums import (
+    ActorState,
+    AttachmentType,
+    CityObjectLabel,
+    ColorConverter,
+    LaneChange,
+    LaneMarkingColor,
+    LaneMarkingType,
+    LaneType,
+    MapLayer,
+    TrafficLightState,
+    VehicleDoor,
+    VehicleLightState,
+)
+from .geometry import (
+    BoundingBox,
+    GeoLocation,
+    Location,
+    Rotation,
+    Transform,
+    Vector2D,
+    Vector3D,
+)
+from .map import LaneMarking, Map, Waypoint
+from .sensor_data import (
+    CollisionEvent,
+    Color,
+    DVSEvent,
+    DVSEventArray,
+    GnssMeasurement,
+    Image,
+    IMUMeasurement,
+    LaneInvasionEvent,
+    LidarDetection,
+    LidarMeasurement,
+    OpticalFlowImage,
+    OpticalFlowPixel,
+    RadarDetection,
+    RadarMeasurement,
+    SemanticLidarDetection,
+    SemanticLidarMeasurement,
+    SensorData,
+)
+from .world import ActorSnapshot, DebugHelper, Timestamp, World, WorldSnapshot
+
+
+def configure(**kwargs):
+    """
+    Set the load of the worlds loaded afterwards. See Config for the options.
+    Unknown options raise a TypeError.
+    """
+    for key, value in kwargs.items():
+        if not hasattr(CONFIG, key):
+            raise TypeError("unknown fake_carla option '%s'" % key)
+        setattr(CONFIG, key, value)
+
+
+def install():
+    """Make `import carla` return this package. Call it before importing the examples."""
+    sys.modules["carla"] = sys.modules[__name__]
@@ -0,0 +1,59 @@
+import argparse
+import importlib
+import sys
+import time
+
+import fake_carla
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Run a CARLA client against the fake server",
+        usage="python -m fake_carla [options] MODULE[:FUNCTION] [-- ARGS...]",
+    )
+    argparser.add_argument("--vehicles", default=0, type=int, help="background vehicles (default: 0)")
+    argparser.add_argument("--walkers", default=0, type=int, help="background walkers (default: 0)")
+    argparser.add_argument(
+        "--camera-res", metavar="WIDTHxHEIGHT", default=None, help="override the resolution of every camera")
+    argparser.add_argument(
+        "--lidar-pps", default=None, type=int, help="override the points per second of every lidar")
+    argparser.add_argument("--map", default=None, help="map exported by export_map (default: synthetic town)")
+    argparser.add_argument("--seed", default=0, type=int, help="random seed (default: 0)")
+    argparser.add_argument("--max-ticks", default=None, type=int, help="stop after this many world ticks")
+    argparser.add_argument("target", help="module to run, e.g. multi_view or follow_a_car:main")
+    argparser.add_argument("args", nargs=argparse.REMAINDER, help="arguments passed to the target")
+    args = argparser.parse_args()
+
+    fake_carla.configure(
+        num_vehicles=args.vehicles,
+        num_walkers=args.walkers,
+        camera_size=tuple(int(x) for x in args.camera_res.split("x")) if args.camera_res else None,
+        lidar_points_per_second=args.lidar_pps,
+        map_file=args.map,
+        seed=args.seed,
+        max_ticks=args.max_ticks,
+    )
+    fake_carla.install()
+
+    module_name, _, function_name = args.target.partition(":")
+    target_args = args.args[1:] if args.args[:1] == ["--"] else args.args
+    sys.argv = [module_name] + target_args
+
+    module = importlib.import_module(module_name)
+    entry = getattr(module, function_name or "main")
+
+    start = time.perf_counter()
+    try:
+        entry()
+    finally:
+        elapsed = time.perf_counter() - start
+        ticks = max((world._frame for world in fake_carla.Client._worlds.values()), default=0)
+        print(
+            "fake_carla: %d ticks in %.2f s (%.1f ticks/s)"
+            % (ticks, elapsed, ticks / elapsed if elapsed > 0 else 0.0),
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+import fnmatch
+import math
+from typing import Callable, List, Optional
+
+from .control import VehicleControl, VehiclePhysicsControl, WalkerControl
+from .enums import AttachmentType, CityObjectLabel, TrafficLightState, VehicleLightState
+from .geometry import BoundingBox, Location, Rotation, Transform, Vector3D, compose
+
+# Longitudinal limits of the kinematic vehicle model, in m/s^2
+_MAX_ACCELERATION = 4.0
+_MAX_DECELERATION = 8.0
+_MAX_SPEED = 50.0
+# Steering angle of the front wheels at full steer, in degrees
+_MAX_STEER_ANGLE = 70.0
+# Cruise speed of vehicles on autopilot, in m/s
+_AUTOPILOT_SPEED = 30.0 / 3.6
+
+
+class Actor(object):
+    def __init__(self, world, actor_id: int, type_id: str, attributes: dict, transform: Transform,
+                 parent=None, attachment_type=AttachmentType.Rigid):
+        self._world = world
+        self.id = actor_id
+        self.type_id = type_id
+        self.attributes = attributes
+        self.parent = parent
+        self.attachment_type = attachment_type
+        self.semantic_tags: List[int] = []
+        self.is_alive = True
+        self.bounding_box = BoundingBox()
+
+        # The pose is relative to the parent when attached
+        loc, rot = transform.location, transform.rotation
+        self._x, self._y, self._z = loc.x, loc.y, loc.z
+        self._pitch, self._yaw, self._roll = rot.pitch, rot.yaw, rot.roll
+        self._velocity = Vector3D()
+        self._angular_velocity = Vector3D()
+        self._acceleration = Vector3D()
+
+    def __repr__(self):
+        return "Actor(id=%d, type=%s)" % (self.id, self.type_id)
+
+    def __eq__(self, other):
+        return isinstance(other, Actor) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def get_world(self):
+        return self._world
+
+    def _relative_transform(self) -> Transform:
+        return Transform(
+            Location(self._x, self._y, self._z),
+            Rotation(pitch=self._pitch, yaw=self._yaw, roll=self._roll),
+        )
+
+    def get_transform(self) -> Transform:
+        if self.parent is not None:
+            return compose(self.parent.get_transform(), self._relative_transform())
+        return self._relative_transform()
+
+    def get_location(self) -> Location:
+        if self.parent is not None:
+            return self.get_transform().location
+        return Location(self._x, self._y, self._z)
+
+    def get_velocity(self) -> Vector3D:
+        if self.parent is not None:
+            return self.parent.get_velocity()
+        return Vector3D(self._velocity.x, self._velocity.y, self._velocity.z)
+
+    def get_angular_velocity(self) -> Vector3D:
+        if self.parent is not None:
+            return self.parent.get_angular_velocity()
+        return Vector3D(self._angular_velocity.x, self._angular_velocity.y, self._angular_velocity.z)
+
+    def get_acceleration(self) -> Vector3D:
+        if self.parent is not None:
+            return self.parent.get_acceleration()
+        return Vector3D(self._acceleration.x, self._acceleration.y, self._acceleration.z)
+
+    def set_transform(self, transform: Transform):
+        loc, rot = transform.location, transform.rotation
+        self._x, self._y, self._z = loc.x, loc.y, loc.z
+        self._pitch, self._yaw, self._roll = rot.pitch, rot.yaw, rot.roll
+
+    def set_location(self, location: Location):
+        self._x, self._y, self._z = location.x, location.y, location.z
+
+    def set_target_velocity(self, velocity: Vector3D):
+        self._velocity = Vector3D(velocity.x, velocity.y, velocity.z)
+
+    def set_target_angular_velocity(self, angular_velocity: Vector3D):
+        self._angular_velocity = Vector3D(angular_velocity.x, angular_velocity.y, angular_velocity.z)
+
+    def set_simulate_physics(self, enabled: bool = True):
+        pass
+
+    def set_enable_gravity(self, enabled: bool = True):
+        pass
+
+    def add_impulse(self, impulse: Vector3D):
+        pass
+
+    def add_force(self, force: Vector3D):
+        pass
+
+    def add_torque(self, torque: Vector3D):
+        pass
+
+    def destroy(self) -> bool:
+        if not self.is_alive:
+            return False
+        self.is_alive = False
+        return self._world._remove_actor(self)
+
+    def _step(self, dt: float):
+        pass
+
+
+class Vehicle(Actor):
+    def __init__(self, world, actor_id, type_id, attributes, transform, extent: Vector3D, **kwargs):
+        super().__init__(world, actor_id, type_id, attributes, transform, **kwargs)
+        self.bounding_box = BoundingBox(Location(0.0, 0.0, extent.z), extent)
+        self.semantic_tags = [int(CityObjectLabel.Car)]
+        self._control = VehicleControl()
+        self._physics = VehiclePhysicsControl()
+        self._mass = self._physics.mass
+        self._wheelbase = 1.2 * extent.x
+        self._speed = 0.0
+        self._light_state = VehicleLightState.NONE
+        self._constant_velocity: Optional[Vector3D] = None
+
+        # Lane following state of the autopilot
+        self._autopilot = False
+        self._lane: Optional[int] = None
+        self._lane_dist = 0.0
+        self._cruise_speed = _AUTOPILOT_SPEED
+
+    def __repr__(self):
+        return "Vehicle(id=%d, type=%s)" % (self.id, self.type_id)
+
+    def get_control(self) -> VehicleControl:
+        c = self._control
+        return VehicleControl(c.throttle, c.steer, c.brake, c.hand_brake, c.reverse, c.manual_gear_shift, c.gear)
+
+    def apply_control(self, control: VehicleControl):
+        self._control = VehicleControl(
+            min(max(control.throttle, 0.0), 1.0),
+            min(max(control.steer, -1.0), 1.0),
+            min(max(control.brake, 0.0), 1.0),
+            bool(control.hand_brake),
+            bool(control.reverse),
+            control.manual_gear_shift,
+            -1 if control.reverse else (control.gear if control.manual_gear_shift else 1),
+        )
+
+    def get_physics_control(self) -> VehiclePhysicsControl:
+        return self._physics
+
+    def apply_physics_control(self, physics_control: VehiclePhysicsControl):
+        self._physics = physics_control
+        self._mass = physics_control.mass
+
+    def set_autopilot(self, enabled: bool = True, tm_port: int = 8000):
+        self._autopilot = enabled
+        self._lane = None
+
+    def set_light_state(self, light_state):
+        self._light_state = VehicleLightState(int(light_state))
+
+    def get_light_state(self):
+        return self._light_state
+
+    def set_target_velocity(self, velocity: Vector3D):
+        super().set_target_velocity(velocity)
+        forward = Rotation(yaw=self._yaw).get_forward_vector()
+        self._speed = velocity.x * forward.x + velocity.y * forward.y
+
+    def enable_constant_velocity(self, velocity: Vector3D):
+        self._constant_velocity = Vector3D(velocity.x, velocity.y, velocity.z)
+
+    def disable_constant_velocity(self):
+        self._constant_velocity = None
+
+    def open_door(self, door):
+        pass
+
+    def close_door(self, door):
+        pass
+
+    def show_debug_telemetry(self, enabled: bool = True):
+        pass
+
+    def get_speed_limit(self) -> float:
+        return 30.0
+
+    def get_traffic_light_state(self):
+        return TrafficLightState.Green
+
+    def is_at_traffic_light(self) -> bool:
+        return False
+
+    def get_traffic_light(self):
+        return None
+
+    def get_wheel_steer_angle(self, wheel_location) -> float:
+        return self._control.steer * _MAX_STEER_ANGLE
+
+    def _step(self, dt: float):
+        old = self._velocity
+        if self._autopilot:
+            self._follow_lane(dt)
+        elif self._constant_velocity is not None:
+            # The constant velocity is given in the local frame of the vehicle
+            v = Transform(rotation=Rotation(yaw=self._yaw)).transform_vector(
+                Vector3D(self._constant_velocity.x, self._constant_velocity.y, self._constant_velocity.z))
+            self._x += v.x * dt
+            self._y += v.y * dt
+            self._velocity = v
+            self._speed = self._constant_velocity.x
+        else:
+            self._drive(dt)
+        self._acceleration = (self._velocity - old) / dt if dt > 0.0 else Vector3D()
+
+    def _drive(self, dt: float):
+        """Kinematic bicycle model driven by the last applied control."""
+        c = self._control
+        speed = self._speed
+        direction = -1.0 if c.reverse else 1.0
+        accel = direction * c.throttle * _MAX_ACCELERATION - 0.02 * speed - 0.0004 * speed * abs(speed)
+        speed += accel * dt
+
+        braking = (c.brake + (1.0 if c.hand_brake else 0.0)) * _MAX_DECELERATION * dt
+        if braking > 0.0:
+            speed = max(speed - braking, 0.0) if speed > 0.0 else min(speed + braking, 0.0)
+        speed = min(max(speed, -_MAX_SPEED), _MAX_SPEED)
+
+        steer_angle = math.radians(c.steer * _MAX_STEER_ANGLE)
+        yaw_rate = speed / self._wheelbase * math.tan(steer_angle)
+        self._yaw += math.degrees(yaw_rate * dt)
+        yaw = math.radians(self._yaw)
+        vx, vy = speed * math.cos(yaw), speed * math.sin(yaw)
+        self._x += vx * dt
+        self._y += vy * dt
+
+        self._speed = speed
+        self._velocity = Vector3D(vx, vy, 0.0)
+        self._angular_velocity = Vector3D(0.0, 0.0, math.degrees(yaw_rate))
+
+    def _follow_lane(self, dt: float):
+        """Drive along the lane centerlines, picking a random successor at each lane end."""
+        wmap = self._world.get_map()
+        if self._lane is None:
+            waypoint = wmap.get_waypoint(self.get_location())
+            if waypoint is None:
+                self._autopilot = False
+                return
+            self._lane, self._lane_dist = waypoint._lane, waypoint._dist
+
+        speed = min(self._speed + _MAX_ACCELERATION * dt, self._cruise_speed)
+        self._lane_dist += speed * dt
+        while self._lane_dist > wmap._lane_length[self._lane]:
+            successors = wmap._successors[self._lane]
+            if not successors:
+                self._lane_dist = wmap._lane_length[self._lane]
+                speed = 0.0
+                break
+            self._lane_dist -= wmap._lane_length[self._lane]
+            self._lane = successors[self._world._rng.integers(len(successors))]
+
+        transform = wmap._interpolate_transform(self._lane, self._lane_dist)
+        old_yaw = self._yaw
+        self._x, self._y = transform.location.x, transform.location.y
+        self._yaw = transform.rotation.yaw
+        yaw = math.radians(self._yaw)
+        self._speed = speed
+        self._velocity = Vector3D(speed * math.cos(yaw), speed * math.sin(yaw), 0.0)
+        yaw_change = (self._yaw - old_yaw + 180.0) % 360.0 - 180.0
+        self._angular_velocity = Vector3D(0.0, 0.0, yaw_change / dt if dt > 0.0 else 0.0)
+
+
+class Walker(Actor):
+    def __init__(self, world, actor_id, type_id, attributes, transform, **kwargs):
+        super().__init__(world, actor_id, type_id, attributes, transform, **kwargs)
+        self.bounding_box = BoundingBox(Location(0.0, 0.0, 0.9), Vector3D(0.25, 0.25, 0.9))
+        self.semantic_tags = [int(CityObjectLabel.Pedestrians)]
+        self._control = WalkerControl(speed=0.0)
+        self._mass = 80.0
+
+    def get_control(self) -> WalkerControl:
+        d = self._control.direction
+        return WalkerControl(Vector3D(d.x, d.y, d.z), self._control.speed, self._control.jump)
+
+    def apply_control(self, control: WalkerControl):
+        self._control = control
+
+    def _step(self, dt: float):
+        old = self._velocity
+        direction = self._control.direction.make_unit_vector()
+        v = direction * self._control.speed
+        self._x += v.x * dt
+        self._y += v.y * dt
+        if v.x or v.y:
+            self._yaw = math.degrees(math.atan2(v.y, v.x))
+        self._velocity = v
+        self._acceleration = (v - old) / dt if dt > 0.0 else Vector3D()
+
+
+class TrafficLight(Actor):
+    def __init__(self, world, actor_id, type_id, attributes, transform, **kwargs):
+        super().__init__(world, actor_id, type_id, attributes, transform, **kwargs)
+        self.state = TrafficLightState.Green
+
+    def get_state(self):
+        return self.state
+
+    def set_state(self, state):
+        self.state = state
+
+    def get_stop_waypoints(self):
+        return []
+
+    def get_affected_lane_waypoints(self):
+        return []
+
+
+class Sensor(Actor):
+    """
+    A sensor measures on the ticks when its sensor_tick period has elapsed.
+    Event sensors (collision, lane invasion) check on every tick and only
+    report when something happened. Callbacks run synchronously inside
+    World.tick(), so that measurements are reproducible.
+    """
+
+    def __init__(self, world, actor_id, type_id, attributes, transform, synth, **kwargs):
+        super().__init__(world, actor_id, type_id, attributes, transform, **kwargs)
+        self._synth = synth
+        self._callback: Optional[Callable] = None
+        self._period = float(attributes.get("sensor_tick", 0.0))
+        self._next_time = 0.0
+        self._last_time: Optional[float] = None
+        self.is_listening = False
+
+    def __repr__(self):
+        return "Sensor(id=%d, type=%s)" % (self.id, self.type_id)
+
+    def listen(self, callback: Callable):
+        self._callback = callback
+        self.is_listening = True
+
+    def stop(self):
+        self._callback = None
+        self.is_listening = False
+
+    def destroy(self) -> bool:
+        self.stop()
+        return super().destroy()
+
+    def _measure(self, frame: int, timestamp: float, dt: float):
+        if self._synth is None or self._callback is None:
+            return
+        if timestamp + 1e-9 < self._next_time:
+            return
+        period = dt if self._last_time is None else timestamp - self._last_time
+        self._last_time = timestamp
+        self._next_time = timestamp + self._period
+
+        data = self._synth.measure(self, frame, timestamp, period, self.get_transform())
+        if isinstance(data, list):
+            for event in data:
+                if self._callback is not None:
+                    self._callback(event)
+        elif data is not None:
+            self._callback(data)
+
+
+class ActorList(list):
+    def filter(self, wildcard_pattern: str) -> "ActorList":
+        return ActorList(actor for actor in self if fnmatch.fnmatch(actor.type_id, wildcard_pattern))
+
+    def find(self, actor_id: int) -> Optional[Actor]:
+        for actor in self:
+            if actor.id == actor_id:
+                return actor
+        return None
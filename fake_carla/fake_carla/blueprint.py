@@ -0,0 +1,294 @@
+import fnmatch
+from typing import Dict, Iterator, List, Sequence
+
+from .geometry import Vector3D
+
+
+class ActorAttribute(object):
+    def __init__(
+        self,
+        attr_id: str,
+        value: str,
+        recommended_values: Sequence[str] = (),
+        is_modifiable: bool = True,
+    ):
+        self.id = attr_id
+        self._value = str(value)
+        self.recommended_values = list(recommended_values)
+        self.is_modifiable = is_modifiable
+
+    def __repr__(self):
+        return "ActorAttribute(id=%s, value=%s)" % (self.id, self._value)
+
+    def __str__(self):
+        return self._value
+
+    def __int__(self):
+        return self.as_int()
+
+    def __float__(self):
+        return self.as_float()
+
+    def __bool__(self):
+        return self.as_bool()
+
+    def __eq__(self, other):
+        if isinstance(other, ActorAttribute):
+            return self._value == other._value
+        return self._value == str(other)
+
+    def as_bool(self) -> bool:
+        return self._value.lower() in ("true", "1")
+
+    def as_int(self) -> int:
+        return int(float(self._value))
+
+    def as_float(self) -> float:
+        return float(self._value)
+
+    def as_str(self) -> str:
+        return self._value
+
+
+class ActorBlueprint(object):
+    def __init__(self, bp_id: str, tags: Sequence[str], attributes: Dict[str, ActorAttribute]):
+        self.id = bp_id
+        self.tags = list(tags)
+        self._attributes = attributes
+
+    def __repr__(self):
+        return "ActorBlueprint(id=%s, tags=%s)" % (self.id, self.tags)
+
+    def __iter__(self) -> Iterator[ActorAttribute]:
+        return iter(self._attributes.values())
+
+    def __len__(self):
+        return len(self._attributes)
+
+    def copy(self) -> "ActorBlueprint":
+        return ActorBlueprint(
+            self.id,
+            self.tags,
+            {
+                key: ActorAttribute(
+                    attr.id, attr.as_str(), attr.recommended_values, attr.is_modifiable
+                )
+                for key, attr in self._attributes.items()
+            },
+        )
+
+    def has_tag(self, tag: str) -> bool:
+        return tag in self.tags
+
+    def match_tags(self, wildcard_pattern: str) -> bool:
+        return any(fnmatch.fnmatch(tag, wildcard_pattern) for tag in self.tags)
+
+    def has_attribute(self, attr_id: str) -> bool:
+        return attr_id in self._attributes
+
+    def get_attribute(self, attr_id: str) -> ActorAttribute:
+        try:
+            return self._attributes[attr_id]
+        except KeyError:
+            raise IndexError("blueprint '%s' has no attribute '%s'" % (self.id, attr_id))
+
+    def set_attribute(self, attr_id: str, value: str):
+        attr = self.get_attribute(attr_id)
+        if not attr.is_modifiable:
+            raise IndexError("attribute '%s' of '%s' is not modifiable" % (attr_id, self.id))
+        attr._value = str(value)
+
+    def attributes(self) -> Dict[str, str]:
+        return {key: attr.as_str() for key, attr in self._attributes.items()}
+
+
+class BlueprintLibrary(object):
+    def __init__(self, blueprints: List[ActorBlueprint]):
+        self._blueprints = blueprints
+
+    def __iter__(self) -> Iterator[ActorBlueprint]:
+        return iter(self._blueprints)
+
+    def __len__(self):
+        return len(self._blueprints)
+
+    def __getitem__(self, index: int) -> ActorBlueprint:
+        return self._blueprints[index]
+
+    def find(self, bp_id: str) -> ActorBlueprint:
+        for bp in self._blueprints:
+            if bp.id == bp_id:
+                # Return a copy so that callers do not share attribute values.
+                return bp.copy()
+        raise IndexError("blueprint '%s' not found" % bp_id)
+
+    def filter(self, wildcard_pattern: str) -> "BlueprintLibrary":
+        return BlueprintLibrary(
+            [
+                bp.copy()
+                for bp in self._blueprints
+                if fnmatch.fnmatch(bp.id, wildcard_pattern) or bp.match_tags(wildcard_pattern)
+            ]
+        )
+
+
+# Approximate bounding box extents (half sizes in meters) of the vehicle
+# models.
+VEHICLE_MODELS = {
+    "vehicle.tesla.model3": Vector3D(2.396, 1.082, 0.744),
+    "vehicle.lincoln.mkz_2020": Vector3D(2.446, 1.066, 0.738),
+    "vehicle.audi.tt": Vector3D(2.091, 0.996, 0.692),
+    "vehicle.toyota.prius": Vector3D(2.257, 1.007, 0.763),
+    "vehicle.nissan.patrol": Vector3D(2.306, 0.963, 0.928),
+    "vehicle.mercedes.coupe_2020": Vector3D(2.337, 1.014, 0.695),
+    "vehicle.carlamotors.carlacola": Vector3D(2.602, 1.306, 1.281),
+}
+
+_COLORS = ["17,37,103", "255,255,255", "0,0,0", "211,142,0", "135,0,0", "71,71,71"]
+
+
+def _attr(attr_id: str, value, recommended=(), modifiable=True) -> ActorAttribute:
+    return ActorAttribute(attr_id, str(value), [str(v) for v in recommended], modifiable)
+
+
+def _camera_attrs(**extra) -> Dict[str, ActorAttribute]:
+    attrs = [
+        _attr("image_size_x", 800),
+        _attr("image_size_y", 600),
+        _attr("fov", 90.0),
+        _attr("sensor_tick", 0.0),
+        _attr("lens_circle_falloff", 5.0),
+        _attr("lens_circle_multiplier", 0.0),
+        _attr("lens_k", -1.0),
+        _attr("lens_kcube", 0.0),
+        _attr("lens_x_size", 0.08),
+        _attr("lens_y_size", 0.08),
+        _attr("role_name", "front"),
+    ]
+    attrs += [_attr(key, value) for key, value in extra.items()]
+    return {attr.id: attr for attr in attrs}
+
+
+def _rgb_attrs(**extra) -> Dict[str, ActorAttribute]:
+    return _camera_attrs(
+        gamma=2.2,
+        enable_postprocess_effects="true",
+        motion_blur_intensity=0.45,
+        motion_blur_max_distortion=0.35,
+        motion_blur_min_object_screen_size=0.1,
+        chromatic_aberration_intensity=0.0,
+        chromatic_aberration_offset=0.0,
+        bloom_intensity=0.675,
+        exposure_mode="histogram",
+        shutter_speed=200.0,
+        iso=100.0,
+        fstop=1.4,
+        **extra
+    )
+
+
+def _lidar_attrs(**extra) -> Dict[str, ActorAttribute]:
+    attrs = [
+        _attr("channels", 32),
+        _attr("range", 10.0),
+        _attr("points_per_second", 56000),
+        _attr("rotation_frequency", 10.0),
+        _attr("upper_fov", 10.0),
+        _attr("lower_fov", -30.0),
+        _attr("horizontal_fov", 360.0),
+        _attr("sensor_tick", 0.0),
+        _attr("role_name", "front"),
+    ]
+    attrs += [_attr(key, value) for key, value in extra.items()]
+    return {attr.id: attr for attr in attrs}
+
+
+def _other_attrs(**extra) -> Dict[str, ActorAttribute]:
+    attrs = [_attr("sensor_tick", 0.0), _attr("role_name", "front")]
+    attrs += [_attr(key, value) for key, value in extra.items()]
+    return {attr.id: attr for attr in attrs}
+
+
+def _vehicle_attrs(generation: int) -> Dict[str, ActorAttribute]:
+    attrs = [
+        _attr("role_name", "autopilot"),
+        _attr("color", _COLORS[0], _COLORS),
+        _attr("sticky_control", "true"),
+        _attr("terramechanics", "false"),
+        _attr("number_of_wheels", 4, modifiable=False),
+        _attr("generation", generation, modifiable=False),
+        _attr("object_type", "", modifiable=False),
+        _attr("base_type", "car", modifiable=False),
+        _attr("has_dynamic_doors", "true", modifiable=False),
+        _attr("has_lights", "true", modifiable=False),
+    ]
+    return {attr.id: attr for attr in attrs}
+
+
+def _walker_attrs() -> Dict[str, ActorAttribute]:
+    attrs = [
+        _attr("role_name", "walker"),
+        _attr("is_invincible", "true"),
+        _attr("speed", 1.4, ["0.0", "1.4", "2.8"]),
+        _attr("generation", 2, modifiable=False),
+        _attr("age", "adult", modifiable=False),
+        _attr("gender", "female", modifiable=False),
+    ]
+    return {attr.id: attr for attr in attrs}
+
+
+def make_blueprint_library() -> BlueprintLibrary:
+    bps = []
+    for bp_id in VEHICLE_MODELS:
+        generation = 2 if bp_id.endswith("2020") else 1
+        _, make, model = bp_id.split(".")
+        bps.append(ActorBlueprint(bp_id, ["vehicle", make, model], _vehicle_attrs(generation)))
+
+    for index in range(1, 4):
+        bp_id = "walker.pedestrian.%04d" % index
+        bps.append(ActorBlueprint(bp_id, ["walker", "pedestrian", "%04d" % index], _walker_attrs()))
+
+    sensors = [
+        ("sensor.camera.rgb", _rgb_attrs()),
+        ("sensor.camera.depth", _camera_attrs()),
+        ("sensor.camera.semantic_segmentation", _camera_attrs()),
+        ("sensor.camera.instance_segmentation", _camera_attrs()),
+        (
+            "sensor.camera.dvs",
+            _rgb_attrs(
+                positive_threshold=0.3,
+                negative_threshold=0.3,
+                sigma_positive_threshold=0.0,
+                sigma_negative_threshold=0.0,
+                refractory_period_ns=0,
+                use_log="true",
+                log_eps=0.001,
+            ),
+        ),
+        ("sensor.camera.optical_flow", _camera_attrs()),
+        (
+            "sensor.lidar.ray_cast",
+            _lidar_attrs(
+                atmosphere_attenuation_rate=0.004,
+                dropoff_general_rate=0.45,
+                dropoff_intensity_limit=0.8,
+                dropoff_zero_intensity=0.4,
+                noise_stddev=0.0,
+            ),
+        ),
+        ("sensor.lidar.ray_cast_semantic", _lidar_attrs()),
+        (
+            "sensor.other.radar",
+            _other_attrs(
+                horizontal_fov=30.0, vertical_fov=30.0, range=100.0, points_per_second=1500
+            ),
+        ),
+        ("sensor.other.gnss", _other_attrs(noise_seed=0)),
+        ("sensor.other.imu", _other_attrs(noise_seed=0)),
+        ("sensor.other.collision", _other_attrs()),
+        ("sensor.other.lane_invasion", _other_attrs()),
+    ]
+    for bp_id, attrs in sensors:
+        bps.append(ActorBlueprint(bp_id, bp_id.split("."), attrs))
+
+    return BlueprintLibrary(bps)
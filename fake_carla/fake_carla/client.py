@@ -0,0 +1,133 @@
+from typing import List, Optional
+
+from .config import CONFIG
+from .enums import MapLayer
+from .map import Map
+from .town import make_grid_town
+from .world import World
+
+_SERVER_VERSION = "0.9.13-fake"
+
+# Town loaded when a client connects, as on a freshly started server
+_DEFAULT_TOWN = "Town10HD_Opt"
+
+
+class TrafficManager(object):
+    """Traffic manager settings are accepted and ignored by the fake autopilot."""
+
+    def __init__(self, port: int):
+        self._port = port
+        self._synchronous_mode = False
+
+    def get_port(self) -> int:
+        return self._port
+
+    def set_synchronous_mode(self, mode: bool = True):
+        self._synchronous_mode = mode
+
+    def set_random_device_seed(self, seed: int):
+        pass
+
+    def set_global_distance_to_leading_vehicle(self, distance: float):
+        pass
+
+    def global_percentage_speed_difference(self, percentage: float):
+        pass
+
+    def vehicle_percentage_speed_difference(self, actor, percentage: float):
+        pass
+
+    def set_hybrid_physics_mode(self, enabled: bool = True):
+        pass
+
+    def set_respawn_dormant_vehicles(self, enabled: bool = True):
+        pass
+
+    def auto_lane_change(self, actor, enable: bool):
+        pass
+
+    def ignore_lights_percentage(self, actor, percentage: float):
+        pass
+
+    def distance_to_leading_vehicle(self, actor, distance: float):
+        pass
+
+
+class Client(object):
+    # The simulation outlives clients, as a server does. Every client
+    # connected to the same port shares the current world.
+    _worlds = dict()
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 2000, worker_threads: int = 0):
+        self._host = host
+        self._port = port
+        self._timeout = 5.0
+        self._traffic_managers = dict()
+
+    def set_timeout(self, seconds: float):
+        self._timeout = seconds
+
+    def get_timeout(self) -> float:
+        return self._timeout
+
+    def get_client_version(self) -> str:
+        return _SERVER_VERSION
+
+    def get_server_version(self) -> str:
+        return _SERVER_VERSION
+
+    def get_available_maps(self) -> List[str]:
+        return ["/Game/Carla/Maps/%s" % _DEFAULT_TOWN]
+
+    def get_world(self) -> World:
+        world = Client._worlds.get(self._port)
+        if world is None:
+            world = self.load_world(_DEFAULT_TOWN)
+        return world
+
+    def load_world(self, map_name: str, reset_settings: bool = True, map_layers=MapLayer.All) -> World:
+        if CONFIG.map_file is not None:
+            wmap = Map.load(CONFIG.map_file)
+        else:
+            town = map_name.split("/")[-1]
+            wmap = Map(make_grid_town(town, CONFIG.town_blocks, CONFIG.block_size))
+
+        previous = Client._worlds.get(self._port)
+        world = World(previous.id + 1 if previous is not None else 1, wmap)
+        if previous is not None and not reset_settings:
+            world.apply_settings(previous.get_settings())
+        Client._worlds[self._port] = world
+        return world
+
+    def reload_world(self, reset_settings: bool = True) -> World:
+        return self.load_world(self.get_world().get_map().name, reset_settings)
+
+    def get_trafficmanager(self, client_connection: int = 8000) -> TrafficManager:
+        if client_connection not in self._traffic_managers:
+            self._traffic_managers[client_connection] = TrafficManager(client_connection)
+        return self._traffic_managers[client_connection]
+
+    def start_recorder(self, filename: str, additional_data: bool = False) -> str:
+        return filename
+
+    def stop_recorder(self):
+        pass
+
+    def replay_file(self, name: str, time_start: float, duration: float, follow_id: int,
+                    replay_sensors: bool = False) -> str:
+        return "Replaying is not supported by the fake server"
+
+    def show_recorder_file_info(self, filename: str, show_all: bool = False) -> str:
+        return ""
+
+    def set_replayer_time_factor(self, time_factor: float):
+        pass
+
+    def set_replayer_ignore_hero(self, ignore_hero: bool):
+        pass
+
+    def apply_batch(self, commands: list):
+        pass
+
+    def apply_batch_sync(self, commands: list, do_tick: bool = False) -> Optional[list]:
+        return []
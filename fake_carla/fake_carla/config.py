@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass
+class Config:
+    # Background vehicles on autopilot and walkers spawned with every world
+    num_vehicles: int = 0
+    num_walkers: int = 0
+    # Override the image_size_x/y of every camera, e.g. (1920, 1080)
+    camera_size: Optional[Tuple[int, int]] = None
+    # Override the points_per_second of every lidar
+    lidar_points_per_second: Optional[int] = None
+    # Map exported by `export_map`. A synthetic grid town is used if None.
+    map_file: Optional[str] = None
+    town_blocks: Tuple[int, int] = (4, 4)
+    block_size: float = 100.0
+    seed: int = 0
+    # Time step when the world settings have no fixed_delta_seconds
+    delta_seconds: float = 0.05
+    # Stop after this many ticks by raising KeyboardInterrupt from World.tick()
+    max_ticks: Optional[int] = None
+
+
+CONFIG = Config()
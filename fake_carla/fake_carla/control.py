@@ -0,0 +1,194 @@
+from typing import List
+
+from .geometry import Vector2D, Vector3D
+
+
+class VehicleControl(object):
+    def __init__(
+        self,
+        throttle: float = 0.0,
+        steer: float = 0.0,
+        brake: float = 0.0,
+        hand_brake: bool = False,
+        reverse: bool = False,
+        manual_gear_shift: bool = False,
+        gear: int = 0,
+    ):
+        self.throttle = throttle
+        self.steer = steer
+        self.brake = brake
+        self.hand_brake = hand_brake
+        self.reverse = reverse
+        self.manual_gear_shift = manual_gear_shift
+        self.gear = gear
+
+    def __repr__(self):
+        return (
+            "VehicleControl(throttle=%f, steer=%f, brake=%f, hand_brake=%s, "
+            "reverse=%s, manual_gear_shift=%s, gear=%d)"
+            % (
+                self.throttle,
+                self.steer,
+                self.brake,
+                self.hand_brake,
+                self.reverse,
+                self.manual_gear_shift,
+                self.gear,
+            )
+        )
+
+
+class WalkerControl(object):
+    def __init__(self, direction: Vector3D = None, speed: float = 0.0, jump: bool = False):
+        self.direction = direction if direction is not None else Vector3D(1.0, 0.0, 0.0)
+        self.speed = speed
+        self.jump = jump
+
+
+class GearPhysicsControl(object):
+    def __init__(self, ratio: float = 1.0, down_ratio: float = 0.5, up_ratio: float = 0.65):
+        self.ratio = ratio
+        self.down_ratio = down_ratio
+        self.up_ratio = up_ratio
+
+
+class WheelPhysicsControl(object):
+    def __init__(
+        self,
+        tire_friction: float = 3.5,
+        damping_rate: float = 0.25,
+        max_steer_angle: float = 70.0,
+        radius: float = 37.0,
+    ):
+        self.tire_friction = tire_friction
+        self.damping_rate = damping_rate
+        self.max_steer_angle = max_steer_angle
+        self.radius = radius
+
+
+class VehiclePhysicsControl(object):
+    def __init__(self):
+        self.torque_curve = [Vector2D(0.0, 500.0), Vector2D(5000.0, 500.0)]
+        self.max_rpm = 5000.0
+        self.moi = 1.0
+        self.damping_rate_full_throttle = 0.15
+        self.damping_rate_zero_throttle_clutch_engaged = 2.0
+        self.damping_rate_zero_throttle_clutch_disengaged = 0.35
+        self.use_gear_autobox = True
+        self.gear_switch_time = 0.5
+        self.clutch_strength = 10.0
+        self.final_ratio = 4.0
+        self.forward_gears = [GearPhysicsControl(r) for r in (4.0, 2.0, 1.5, 1.0, 0.8)]
+        self.mass = 1845.0
+        self.drag_coefficient = 0.3
+        self.center_of_mass = Vector3D(0.45, 0.0, -0.3)
+        self.steering_curve = [Vector2D(0.0, 1.0), Vector2D(120.0, 0.7)]
+        self.wheels: List[WheelPhysicsControl] = [WheelPhysicsControl() for _ in range(4)]
+        self.use_sweep_wheel_collision = False
+
+
+class WorldSettings(object):
+    def __init__(
+        self,
+        synchronous_mode: bool = False,
+        no_rendering_mode: bool = False,
+        fixed_delta_seconds: float = None,
+        substepping: bool = True,
+        max_substep_delta_time: float = 0.01,
+        max_substeps: int = 10,
+        max_culling_distance: float = 0.0,
+        deterministic_ragdolls: bool = False,
+        tile_stream_distance: float = 3000.0,
+        actor_active_distance: float = 2000.0,
+        spectator_as_ego: bool = True,
+    ):
+        self.synchronous_mode = synchronous_mode
+        self.no_rendering_mode = no_rendering_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+        self.substepping = substepping
+        self.max_substep_delta_time = max_substep_delta_time
+        self.max_substeps = max_substeps
+        self.max_culling_distance = max_culling_distance
+        self.deterministic_ragdolls = deterministic_ragdolls
+        self.tile_stream_distance = tile_stream_distance
+        self.actor_active_distance = actor_active_distance
+        self.spectator_as_ego = spectator_as_ego
+
+    def copy(self) -> "WorldSettings":
+        settings = WorldSettings()
+        settings.__dict__.update(self.__dict__)
+        return settings
+
+    def __repr__(self):
+        return "WorldSettings(synchronous_mode=%s, fixed_delta_seconds=%s)" % (
+            self.synchronous_mode,
+            self.fixed_delta_seconds,
+        )
+
+
+class WeatherParameters(object):
+    def __init__(
+        self,
+        cloudiness: float = 0.0,
+        precipitation: float = 0.0,
+        precipitation_deposits: float = 0.0,
+        wind_intensity: float = 0.0,
+        sun_azimuth_angle: float = 0.0,
+        sun_altitude_angle: float = 0.0,
+        fog_density: float = 0.0,
+        fog_distance: float = 0.0,
+        wetness: float = 0.0,
+        fog_falloff: float = 0.0,
+        scattering_intensity: float = 0.0,
+        mie_scattering_scale: float = 0.0,
+        rayleigh_scattering_scale: float = 0.0331,
+        dust_storm: float = 0.0,
+    ):
+        self.cloudiness = cloudiness
+        self.precipitation = precipitation
+        self.precipitation_deposits = precipitation_deposits
+        self.wind_intensity = wind_intensity
+        self.sun_azimuth_angle = sun_azimuth_angle
+        self.sun_altitude_angle = sun_altitude_angle
+        self.fog_density = fog_density
+        self.fog_distance = fog_distance
+        self.wetness = wetness
+        self.fog_falloff = fog_falloff
+        self.scattering_intensity = scattering_intensity
+        self.mie_scattering_scale = mie_scattering_scale
+        self.rayleigh_scattering_scale = rayleigh_scattering_scale
+        self.dust_storm = dust_storm
+
+    def __repr__(self):
+        return "WeatherParameters(cloudiness=%f, precipitation=%f, sun_altitude_angle=%f)" % (
+            self.cloudiness,
+            self.precipitation,
+            self.sun_altitude_angle,
+        )
+
+
+# The weather presets are class attributes, as in carla; the examples
+# discover them by scanning `dir(carla.WeatherParameters)` for
+# capitalized names.
+_WEATHER_PRESETS = {
+    "Default": dict(cloudiness=5.0, sun_altitude_angle=45.0),
+    "ClearNoon": dict(cloudiness=5.0, sun_altitude_angle=45.0),
+    "CloudyNoon": dict(cloudiness=60.0, sun_altitude_angle=45.0),
+    "WetNoon": dict(cloudiness=5.0, wetness=50.0, sun_altitude_angle=45.0),
+    "WetCloudyNoon": dict(cloudiness=60.0, wetness=50.0, sun_altitude_angle=45.0),
+    "MidRainyNoon": dict(cloudiness=60.0, precipitation=60.0, sun_altitude_angle=45.0),
+    "HardRainNoon": dict(cloudiness=100.0, precipitation=100.0, sun_altitude_angle=45.0),
+    "SoftRainNoon": dict(cloudiness=20.0, precipitation=30.0, sun_altitude_angle=45.0),
+    "ClearSunset": dict(cloudiness=5.0, sun_altitude_angle=15.0),
+    "CloudySunset": dict(cloudiness=60.0, sun_altitude_angle=15.0),
+    "WetSunset": dict(cloudiness=5.0, wetness=50.0, sun_altitude_angle=15.0),
+    "WetCloudySunset": dict(cloudiness=60.0, wetness=50.0, sun_altitude_angle=15.0),
+    "MidRainSunset": dict(cloudiness=60.0, precipitation=60.0, sun_altitude_angle=15.0),
+    "HardRainSunset": dict(cloudiness=100.0, precipitation=100.0, sun_altitude_angle=15.0),
+    "SoftRainSunset": dict(cloudiness=20.0, precipitation=30.0, sun_altitude_angle=15.0),
+    "ClearNight": dict(cloudiness=5.0, sun_altitude_angle=-90.0),
+    "CloudyNight": dict(cloudiness=60.0, sun_altitude_angle=-90.0),
+}
+
+for _name, _kwargs in _WEATHER_PRESETS.items():
+    setattr(WeatherParameters, _name, WeatherParameters(**_kwargs))
@@ -0,0 +1,174 @@
+from enum import IntEnum, IntFlag
+
+
+def _with_values(enum_type):
+    # Boost.Python enums expose their members through a `values` dict;
+    # code that introspects carla enums relies on it.
+    enum_type.values = {int(member): member for member in enum_type}
+    return enum_type
+
+
+@_with_values
+class LaneType(IntEnum):
+    NONE = 1
+    Driving = 2
+    Stop = 4
+    Shoulder = 8
+    Biking = 16
+    Sidewalk = 32
+    Border = 64
+    Restricted = 128
+    Parking = 256
+    Bidirectional = 512
+    Median = 1024
+    Special1 = 2048
+    Special2 = 4096
+    Special3 = 8192
+    RoadWorks = 16384
+    Tram = 32768
+    Rail = 65536
+    Entry = 131072
+    Exit = 262144
+    OffRamp = 524288
+    OnRamp = 1048576
+    Any = -2
+
+
+@_with_values
+class LaneChange(IntEnum):
+    NONE = 0
+    Right = 1
+    Left = 2
+    Both = 3
+
+
+@_with_values
+class LaneMarkingType(IntEnum):
+    NONE = 0
+    Other = 1
+    Broken = 2
+    Solid = 3
+    SolidSolid = 4
+    SolidBroken = 5
+    BrokenSolid = 6
+    BrokenBroken = 7
+    BottsDots = 8
+    Grass = 9
+    Curb = 10
+
+
+@_with_values
+class LaneMarkingColor(IntEnum):
+    Standard = 0
+    Blue = 1
+    Green = 2
+    Red = 3
+    White = 0
+    Yellow = 4
+    Other = 5
+
+
+@_with_values
+class CityObjectLabel(IntEnum):
+    NONE = 0
+    Roads = 1
+    Sidewalks = 2
+    Buildings = 3
+    Walls = 4
+    Fences = 5
+    Poles = 6
+    TrafficLight = 7
+    TrafficSigns = 8
+    Vegetation = 9
+    Terrain = 10
+    Sky = 11
+    Pedestrians = 12
+    Rider = 13
+    Car = 14
+    Truck = 15
+    Bus = 16
+    Train = 17
+    Motorcycle = 18
+    Bicycle = 19
+    Static = 20
+    Dynamic = 21
+    Other = 22
+    Water = 23
+    RoadLines = 24
+    Ground = 25
+    Bridge = 26
+    RailTrack = 27
+    GuardRail = 28
+    Any = 255
+
+
+@_with_values
+class VehicleLightState(IntFlag):
+    NONE = 0
+    Position = 1
+    LowBeam = 2
+    HighBeam = 4
+    Brake = 8
+    RightBlinker = 16
+    LeftBlinker = 32
+    Reverse = 64
+    Fog = 128
+    Interior = 256
+    Special1 = 512
+    Special2 = 1024
+    All = 0xFFFFFFFF
+
+
+@_with_values
+class VehicleDoor(IntEnum):
+    FL = 0
+    FR = 1
+    RL = 2
+    RR = 3
+    All = 6
+
+
+@_with_values
+class AttachmentType(IntEnum):
+    Rigid = 0
+    SpringArm = 1
+    SpringArmGhost = 2
+
+
+@_with_values
+class ColorConverter(IntEnum):
+    Raw = 0
+    Depth = 1
+    LogarithmicDepth = 2
+    CityScapesPalette = 3
+
+
+@_with_values
+class MapLayer(IntFlag):
+    NONE = 0
+    Buildings = 1
+    Decals = 2
+    Foliage = 4
+    Ground = 8
+    ParkedVehicles = 16
+    Particles = 32
+    Props = 64
+    StreetLights = 128
+    Walls = 256
+    All = 65535
+
+
+@_with_values
+class TrafficLightState(IntEnum):
+    Red = 0
+    Yellow = 1
+    Green = 2
+    Off = 3
+    Unknown = 4
+
+
+@_with_values
+class ActorState(IntEnum):
+    Invalid = 0
+    Active = 1
+    Dormant = 2
@@ -0,0 +1,308 @@
+import math
+from typing import List
+
+
+class Vector2D(object):
+    def __init__(self, x: float = 0.0, y: float = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+
+    def __repr__(self):
+        return "Vector2D(x=%f, y=%f)" % (self.x, self.y)
+
+    def __eq__(self, other):
+        return isinstance(other, Vector2D) and self.x == other.x and self.y == other.y
+
+    def __add__(self, other):
+        return Vector2D(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return Vector2D(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, k: float):
+        return Vector2D(self.x * k, self.y * k)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, k: float):
+        return Vector2D(self.x / k, self.y / k)
+
+    def length(self) -> float:
+        return math.hypot(self.x, self.y)
+
+    def squared_length(self) -> float:
+        return self.x * self.x + self.y * self.y
+
+
+class Vector3D(object):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __repr__(self):
+        return "%s(x=%f, y=%f, z=%f)" % (type(self).__name__, self.x, self.y, self.z)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Vector3D)
+            and self.x == other.x
+            and self.y == other.y
+            and self.z == other.z
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
+
+    def __mul__(self, k: float):
+        return type(self)(self.x * k, self.y * k, self.z * k)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, k: float):
+        return type(self)(self.x / k, self.y / k, self.z / k)
+
+    def __neg__(self):
+        return type(self)(-self.x, -self.y, -self.z)
+
+    def length(self) -> float:
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def squared_length(self) -> float:
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    def distance(self, other) -> float:
+        return math.sqrt(
+            (self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2
+        )
+
+    def distance_squared(self, other) -> float:
+        return (self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2
+
+    def distance_2d(self, other) -> float:
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+    def dot(self, other) -> float:
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def dot_2d(self, other) -> float:
+        return self.x * other.x + self.y * other.y
+
+    def cross(self, other):
+        return Vector3D(
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x,
+        )
+
+    def make_unit_vector(self):
+        length = self.length()
+        if length == 0.0:
+            return Vector3D()
+        return Vector3D(self.x / length, self.y / length, self.z / length)
+
+
+class Location(Vector3D):
+    pass
+
+
+class Rotation(object):
+    """Rotation in degrees, following the Unreal Engine (left-handed, z-up) convention."""
+
+    def __init__(self, pitch: float = 0.0, yaw: float = 0.0, roll: float = 0.0):
+        self.pitch = float(pitch)
+        self.yaw = float(yaw)
+        self.roll = float(roll)
+
+    def __repr__(self):
+        return "Rotation(pitch=%f, yaw=%f, roll=%f)" % (self.pitch, self.yaw, self.roll)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Rotation)
+            and self.pitch == other.pitch
+            and self.yaw == other.yaw
+            and self.roll == other.roll
+        )
+
+    def _matrix(self):
+        cy, sy = math.cos(math.radians(self.yaw)), math.sin(math.radians(self.yaw))
+        cr, sr = math.cos(math.radians(self.roll)), math.sin(math.radians(self.roll))
+        cp, sp = math.cos(math.radians(self.pitch)), math.sin(math.radians(self.pitch))
+        return [
+            [cp * cy, cy * sp * sr - sy * cr, -cy * sp * cr - sy * sr],
+            [cp * sy, sy * sp * sr + cy * cr, -sy * sp * cr + cy * sr],
+            [sp, -cp * sr, cp * cr],
+        ]
+
+    def get_forward_vector(self) -> Vector3D:
+        m = self._matrix()
+        return Vector3D(m[0][0], m[1][0], m[2][0])
+
+    def get_right_vector(self) -> Vector3D:
+        m = self._matrix()
+        return Vector3D(m[0][1], m[1][1], m[2][1])
+
+    def get_up_vector(self) -> Vector3D:
+        m = self._matrix()
+        return Vector3D(m[0][2], m[1][2], m[2][2])
+
+
+class Transform(object):
+    def __init__(self, location: Location = None, rotation: Rotation = None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def __repr__(self):
+        return "Transform(%r, %r)" % (self.location, self.rotation)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Transform)
+            and self.location == other.location
+            and self.rotation == other.rotation
+        )
+
+    def get_forward_vector(self) -> Vector3D:
+        return self.rotation.get_forward_vector()
+
+    def get_right_vector(self) -> Vector3D:
+        return self.rotation.get_right_vector()
+
+    def get_up_vector(self) -> Vector3D:
+        return self.rotation.get_up_vector()
+
+    def transform(self, point: Vector3D) -> Vector3D:
+        """Transform a point from local to world coordinates in place."""
+        m = self.rotation._matrix()
+        x, y, z = point.x, point.y, point.z
+        point.x = m[0][0] * x + m[0][1] * y + m[0][2] * z + self.location.x
+        point.y = m[1][0] * x + m[1][1] * y + m[1][2] * z + self.location.y
+        point.z = m[2][0] * x + m[2][1] * y + m[2][2] * z + self.location.z
+        return point
+
+    def transform_vector(self, vector: Vector3D) -> Vector3D:
+        """Rotate a vector from local to world coordinates in place."""
+        m = self.rotation._matrix()
+        x, y, z = vector.x, vector.y, vector.z
+        vector.x = m[0][0] * x + m[0][1] * y + m[0][2] * z
+        vector.y = m[1][0] * x + m[1][1] * y + m[1][2] * z
+        vector.z = m[2][0] * x + m[2][1] * y + m[2][2] * z
+        return vector
+
+    def inverse_transform(self, point: Vector3D) -> Vector3D:
+        """Transform a point from world to local coordinates in place."""
+        m = self.rotation._matrix()
+        x = point.x - self.location.x
+        y = point.y - self.location.y
+        z = point.z - self.location.z
+        point.x = m[0][0] * x + m[1][0] * y + m[2][0] * z
+        point.y = m[0][1] * x + m[1][1] * y + m[2][1] * z
+        point.z = m[0][2] * x + m[1][2] * y + m[2][2] * z
+        return point
+
+    def get_matrix(self) -> List[List[float]]:
+        m = self.rotation._matrix()
+        loc = self.location
+        return [
+            m[0] + [loc.x],
+            m[1] + [loc.y],
+            m[2] + [loc.z],
+            [0.0, 0.0, 0.0, 1.0],
+        ]
+
+    def get_inverse_matrix(self) -> List[List[float]]:
+        m = self.rotation._matrix()
+        loc = self.location
+        rows = []
+        for i in range(3):
+            r = [m[0][i], m[1][i], m[2][i]]
+            t = -(r[0] * loc.x + r[1] * loc.y + r[2] * loc.z)
+            rows.append(r + [t])
+        rows.append([0.0, 0.0, 0.0, 1.0])
+        return rows
+
+
+def compose(parent: Transform, child: Transform) -> Transform:
+    """Return the world transform of a child attached to a parent."""
+    loc = parent.transform(Location(child.location.x, child.location.y, child.location.z))
+    rot = Rotation(
+        pitch=parent.rotation.pitch + child.rotation.pitch,
+        yaw=parent.rotation.yaw + child.rotation.yaw,
+        roll=parent.rotation.roll + child.rotation.roll,
+    )
+    return Transform(loc, rot)
+
+
+class BoundingBox(object):
+    def __init__(self, location: Location = None, extent: Vector3D = None):
+        self.location = location if location is not None else Location()
+        self.extent = extent if extent is not None else Vector3D()
+        self.rotation = Rotation()
+
+    def __repr__(self):
+        return "BoundingBox(%r, Extent(x=%f, y=%f, z=%f), %r)" % (
+            self.location,
+            self.extent.x,
+            self.extent.y,
+            self.extent.z,
+            self.rotation,
+        )
+
+    def get_local_vertices(self) -> List[Location]:
+        e = self.extent
+        c = self.location
+        return [
+            Location(c.x + sx * e.x, c.y + sy * e.y, c.z + sz * e.z)
+            for sx in (-1, 1)
+            for sy in (-1, 1)
+            for sz in (-1, 1)
+        ]
+
+    def get_world_vertices(self, transform: Transform) -> List[Location]:
+        return [transform.transform(v) for v in self.get_local_vertices()]
+
+    def contains(self, point: Location, transform: Transform) -> bool:
+        local = transform.inverse_transform(Location(point.x, point.y, point.z))
+        e = self.extent
+        c = self.location
+        return (
+            abs(local.x - c.x) <= e.x
+            and abs(local.y - c.y) <= e.y
+            and abs(local.z - c.z) <= e.z
+        )
+
+
+class GeoLocation(object):
+    def __init__(self, latitude: float = 0.0, longitude: float = 0.0, altitude: float = 0.0):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+
+    def __repr__(self):
+        return "GeoLocation(latitude=%f, longitude=%f, altitude=%f)" % (
+            self.latitude,
+            self.longitude,
+            self.altitude,
+        )
@@ -0,0 +1,346 @@
+""" Road network of the fake server.
+
+Map, Waypoint and LaneMarking are adapted from the offline map reader in
+agents/tools/offline_map.py of drive_and_log and multi_view. They read the
+same arrays, so a map exported from a live server with `poetry run
+export_map` can be loaded as well as a synthetic town from town.py.
+"""
+
+import math
+from bisect import bisect_right
+
+import numpy as np
+
+from .enums import LaneChange, LaneMarkingColor, LaneMarkingType, LaneType
+from .geometry import GeoLocation, Location, Rotation, Transform
+
+FORMAT_VERSION = 1
+
+# Grid cell size in meters of the spatial hash used by get_waypoint()
+_CELL_SIZE = 10.0
+
+# Radius of the earth used by transform_to_geolocation()
+_EARTH_RADIUS = 6378137.0
+
+_LANE_TYPES = LaneType.values
+_LANE_CHANGES = LaneChange.values
+
+
+class LaneMarking(object):
+    """Stand-in for carla.LaneMarking. The marking type follows the lane change permission."""
+
+    def __init__(self, lane_change):
+        self.lane_change = lane_change
+        self.type = LaneMarkingType.Broken if lane_change else LaneMarkingType.Solid
+        self.color = LaneMarkingColor.White
+        self.width = 0.15
+
+
+class Waypoint(object):
+    """
+    Read-only stand-in for carla.Waypoint. A waypoint is a position on the
+    centerline of an exported lane, given as the distance from the start of the lane.
+    """
+
+    def __init__(self, wmap, lane, dist):
+        self._map = wmap
+        self._lane = lane
+        self._dist = dist
+        self._transform = None
+
+        road_id, section_id, lane_id = wmap._lane_keys[lane]
+        self.road_id = road_id
+        self.section_id = section_id
+        self.lane_id = lane_id
+        self.is_junction = wmap._is_junction[lane]
+        self.junction_id = wmap._junction_id[lane]
+        self.lane_type = _LANE_TYPES[wmap._lane_type[lane]]
+
+    def __repr__(self):
+        return "Waypoint(road_id={}, section_id={}, lane_id={}, dist={:.2f})".format(
+            self.road_id, self.section_id, self.lane_id, self._dist)
+
+    @property
+    def id(self):
+        return hash((self._lane, round(self._dist, 3)))
+
+    @property
+    def is_intersection(self):
+        return self.is_junction
+
+    @property
+    def transform(self):
+        if self._transform is None:
+            self._transform = self._map._interpolate_transform(self._lane, self._dist)
+        return self._transform
+
+    @property
+    def s(self):
+        return self._map._sample_value(self._map._road_s, self._lane, self._dist)
+
+    @property
+    def lane_width(self):
+        return self._map._sample_value(self._map._width, self._lane, self._dist)
+
+    @property
+    def left_lane_marking(self):
+        change = self._map._sample_value(self._map._left_change, self._lane, self._dist)
+        return LaneMarking(_LANE_CHANGES[change])
+
+    @property
+    def right_lane_marking(self):
+        change = self._map._sample_value(self._map._right_change, self._lane, self._dist)
+        return LaneMarking(_LANE_CHANGES[change])
+
+    @property
+    def lane_change(self):
+        right = self._map._sample_value(self._map._right_change, self._lane, self._dist)
+        left = self._map._sample_value(self._map._left_change, self._lane, self._dist)
+        change = (right & int(LaneChange.Right)) | (left & int(LaneChange.Left))
+        return _LANE_CHANGES[change]
+
+    def next(self, distance):
+        return self._map._advance(self._lane, self._dist + distance)
+
+    def previous(self, distance):
+        return self._map._retreat(self._lane, self._dist - distance)
+
+    def next_until_lane_end(self, distance):
+        length = self._map._lane_length[self._lane]
+        steps = np.arange(self._dist + distance, length, distance)
+        waypoints = [Waypoint(self._map, self._lane, float(d)) for d in steps]
+        if self._dist < length:
+            waypoints.append(Waypoint(self._map, self._lane, length))
+        return waypoints
+
+    def previous_until_lane_start(self, distance):
+        steps = np.arange(self._dist - distance, 0.0, -distance)
+        waypoints = [Waypoint(self._map, self._lane, float(d)) for d in steps]
+        if self._dist > 0.0:
+            waypoints.append(Waypoint(self._map, self._lane, 0.0))
+        return waypoints
+
+    def get_left_lane(self):
+        return self._map._neighbor(self, self._map._left_lane[self._lane])
+
+    def get_right_lane(self):
+        return self._map._neighbor(self, self._map._right_lane[self._lane])
+
+
+class Map(object):
+    """
+    Stand-in for carla.Map built from the arrays of an exported map or of a
+    synthetic town. Waypoints are interpolated between the centerline samples.
+    """
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            version = int(data["version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(
+                    "unsupported offline map format version {} (expect {})".format(version, FORMAT_VERSION))
+            arrays = {key: data[key] for key in data.files}
+        return cls(arrays)
+
+    def __init__(self, arrays):
+        self.name = str(arrays["name"])
+
+        # Per-lane attributes
+        self._lane_keys = [tuple(key) for key in arrays["lane_keys"].tolist()]
+        self._offsets = arrays["lane_offsets"].tolist()
+        self._lane_type = arrays["lane_type"].tolist()
+        self._is_junction = arrays["is_junction"].tolist()
+        self._junction_id = arrays["junction_id"].tolist()
+        self._left_lane = arrays["left_lane"].tolist()
+        self._right_lane = arrays["right_lane"].tolist()
+        succ_offsets = arrays["succ_offsets"].tolist()
+        succ = arrays["succ"].tolist()
+        self._successors = [succ[lo:hi] for lo, hi in zip(succ_offsets[:-1], succ_offsets[1:])]
+        self._predecessors = [[] for _ in self._lane_keys]
+        for lane, successors in enumerate(self._successors):
+            for other in successors:
+                self._predecessors[other].append(lane)
+
+        # Per-sample attributes. Scalar lookups are faster on Python lists,
+        # while nearest-point searches use the NumPy arrays.
+        self._xyz_array = arrays["xyz"].astype(np.float64)
+        self._lane_of_sample = np.repeat(
+            np.arange(len(self._lane_keys)), np.diff(arrays["lane_offsets"]))
+        self._sample_lane_type = np.asarray(arrays["lane_type"])[self._lane_of_sample]
+        self._xyz = self._xyz_array.tolist()
+        self._rot = arrays["rot"].astype(np.float64).tolist()
+        self._dist = arrays["dist"].astype(np.float64).tolist()
+        self._road_s = arrays["road_s"].astype(np.float64).tolist()
+        self._width = arrays["width"].astype(np.float64).tolist()
+        self._left_change = arrays["left_change"].tolist()
+        self._right_change = arrays["right_change"].tolist()
+        self._lane_dist = [self._dist[lo:hi] for lo, hi in zip(self._offsets[:-1], self._offsets[1:])]
+        self._lane_length = [d[-1] for d in self._lane_dist]
+
+        self._topology_lane = arrays["topology_lane"].tolist()
+        self._topology_dist = arrays["topology_dist"].astype(np.float64).tolist()
+        self._spawn_points = arrays["spawn_points"].astype(np.float64).tolist()
+
+        self._build_grid()
+
+    def _build_grid(self):
+        """Bucket the centerline samples into a planar grid for nearest-point queries."""
+        cells = np.floor(self._xyz_array[:, :2] / _CELL_SIZE).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        sorted_cells = cells[order]
+        boundaries = np.flatnonzero(np.any(np.diff(sorted_cells, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        self._grid = {
+            (int(sorted_cells[lo, 0]), int(sorted_cells[lo, 1])): order[lo:hi]
+            for lo, hi in zip(starts, ends)
+        }
+
+    # --------------------------------------------------------------------------
+    # carla.Map API
+    # --------------------------------------------------------------------------
+
+    def get_topology(self):
+        return [
+            (Waypoint(self, entry_lane, entry_dist), Waypoint(self, exit_lane, exit_dist))
+            for (entry_lane, exit_lane), (entry_dist, exit_dist) in zip(self._topology_lane, self._topology_dist)
+        ]
+
+    def get_spawn_points(self):
+        return [
+            Transform(Location(x=x, y=y, z=z), Rotation(pitch=pitch, yaw=yaw, roll=roll))
+            for x, y, z, pitch, yaw, roll in self._spawn_points
+        ]
+
+    def generate_waypoints(self, distance):
+        waypoints = []
+        for lane, length in enumerate(self._lane_length):
+            for d in np.arange(0.0, length, distance):
+                waypoints.append(Waypoint(self, lane, float(d)))
+        return waypoints
+
+    def transform_to_geolocation(self, location):
+        # Equirectangular projection around a geo reference at (0, 0). The y
+        # axis points south in the simulator frame.
+        k = 180.0 / (math.pi * _EARTH_RADIUS)
+        return GeoLocation(latitude=-location.y * k, longitude=location.x * k, altitude=location.z)
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=LaneType.Driving):
+        """
+        Return the waypoint on the closest lane centerline. If project_to_road is
+        False, None is returned when the location lies outside of that lane.
+        """
+        point = np.array([location.x, location.y, location.z])
+        candidates = self._nearby_samples(point)
+        mask = (self._sample_lane_type[candidates] & int(lane_type)) != 0
+        candidates = candidates[mask]
+        if len(candidates) == 0:
+            candidates = np.flatnonzero((self._sample_lane_type & int(lane_type)) != 0)
+            if len(candidates) == 0:
+                return None
+
+        d2 = np.sum((self._xyz_array[candidates] - point) ** 2, axis=1)
+        nearest = int(candidates[np.argmin(d2)])
+        lane = int(self._lane_of_sample[nearest])
+        dist = self._project(lane, nearest, point)
+        waypoint = Waypoint(self, lane, dist)
+
+        if not project_to_road:
+            loc = waypoint.transform.location
+            if math.hypot(loc.x - location.x, loc.y - location.y) > 0.5 * waypoint.lane_width:
+                return None
+
+        return waypoint
+
+    # --------------------------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------------------------
+
+    def _nearby_samples(self, point):
+        """Return the indices of the samples that can be closest to the point."""
+        cx, cy = (int(v) for v in np.floor(point[:2] / _CELL_SIZE))
+        found = [
+            self._grid[(cx + dx, cy + dy)]
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if (cx + dx, cy + dy) in self._grid
+        ]
+        if found:
+            candidates = np.concatenate(found)
+            # A sample farther than one cell may be closer than these, so
+            # only trust the grid when a candidate lies within one cell.
+            d2 = np.sum((self._xyz_array[candidates, :2] - point[:2]) ** 2, axis=1)
+            if d2.min() <= _CELL_SIZE ** 2:
+                return candidates
+        return np.arange(len(self._xyz_array))
+
+    def _project(self, lane, sample, point):
+        """Project a point onto the centerline segments adjacent to a sample."""
+        lo, hi = self._offsets[lane], self._offsets[lane + 1]
+        best_d2, best_dist = None, self._dist[sample]
+        for a, b in ((sample - 1, sample), (sample, sample + 1)):
+            if a < lo or b >= hi:
+                continue
+            pa, pb = self._xyz_array[a], self._xyz_array[b]
+            seg = pb - pa
+            seg_len2 = float(np.dot(seg, seg))
+            t = 0.0 if seg_len2 == 0.0 else min(1.0, max(0.0, float(np.dot(point - pa, seg)) / seg_len2))
+            d2 = float(np.sum((pa + t * seg - point) ** 2))
+            if best_d2 is None or d2 < best_d2:
+                best_d2 = d2
+                best_dist = self._dist[a] + t * (self._dist[b] - self._dist[a])
+        return best_dist
+
+    def _locate(self, lane, dist):
+        """Return the sample index before dist and the interpolation ratio."""
+        lane_dist = self._lane_dist[lane]
+        i = min(max(bisect_right(lane_dist, dist) - 1, 0), len(lane_dist) - 2)
+        if i < 0:
+            return self._offsets[lane], 0.0
+        span = lane_dist[i + 1] - lane_dist[i]
+        ratio = 0.0 if span <= 0.0 else min(1.0, max(0.0, (dist - lane_dist[i]) / span))
+        return self._offsets[lane] + i, ratio
+
+    def _sample_value(self, values, lane, dist):
+        index, ratio = self._locate(lane, dist)
+        if ratio > 0.5 and index + 1 < self._offsets[lane + 1]:
+            index += 1
+        return values[index]
+
+    def _interpolate_transform(self, lane, dist):
+        index, ratio = self._locate(lane, dist)
+        a = index
+        b = min(index + 1, self._offsets[lane + 1] - 1)
+        (x0, y0, z0), (x1, y1, z1) = self._xyz[a], self._xyz[b]
+        (p0, w0, r0), (p1, w1, r1) = self._rot[a], self._rot[b]
+        return Transform(
+            Location(x=x0 + (x1 - x0) * ratio, y=y0 + (y1 - y0) * ratio, z=z0 + (z1 - z0) * ratio),
+            Rotation(pitch=p0 + (p1 - p0) * ratio, yaw=w0 + (w1 - w0) * ratio, roll=r0 + (r1 - r0) * ratio),
+        )
+
+    def _advance(self, lane, dist):
+        length = self._lane_length[lane]
+        if dist <= length:
+            return [Waypoint(self, lane, dist)]
+        remaining = dist - length
+        waypoints = []
+        for other in self._successors[lane]:
+            waypoints.extend(self._advance(other, remaining))
+        return waypoints
+
+    def _retreat(self, lane, dist):
+        if dist >= 0.0:
+            return [Waypoint(self, lane, dist)]
+        waypoints = []
+        for other in self._predecessors[lane]:
+            waypoints.extend(self._retreat(other, self._lane_length[other] + dist))
+        return waypoints
+
+    def _neighbor(self, waypoint, lane):
+        if lane < 0:
+            return None
+        loc = waypoint.transform.location
+        point = np.array([loc.x, loc.y, loc.z])
+        lo, hi = self._offsets[lane], self._offsets[lane + 1]
+        d2 = np.sum((self._xyz_array[lo:hi] - point) ** 2, axis=1)
+        return Waypoint(self, lane, self._project(lane, lo + int(np.argmin(d2)), point))
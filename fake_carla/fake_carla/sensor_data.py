@@ -0,0 +1,386 @@
+""" Measurement types delivered to sensor callbacks.
+
+The classes mirror the carla.SensorData subclasses. raw_data is a bytes-like
+memoryview over a buffer that is freshly allocated for every measurement, as
+the real client does when it deserializes a message from the server.
+"""
+
+from typing import Iterator, List
+
+import numpy as np
+
+from .enums import ColorConverter
+from .geometry import Location, Transform, Vector3D
+
+
+class Color(object):
+    def __init__(self, r: int = 0, g: int = 0, b: int = 0, a: int = 255):
+        self.r = r
+        self.g = g
+        self.b = b
+        self.a = a
+
+    def __repr__(self):
+        return "Color(%d,%d,%d,%d)" % (self.r, self.g, self.b, self.a)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Color)
+            and (self.r, self.g, self.b, self.a) == (other.r, other.g, other.b, other.a)
+        )
+
+
+# CityScapes palette indexed by carla.CityObjectLabel, in RGB order
+CITYSCAPES_PALETTE = np.array(
+    [
+        (0, 0, 0),
+        (128, 64, 128),
+        (244, 35, 232),
+        (70, 70, 70),
+        (102, 102, 156),
+        (190, 153, 153),
+        (153, 153, 153),
+        (250, 170, 30),
+        (220, 220, 0),
+        (107, 142, 35),
+        (152, 251, 152),
+        (70, 130, 180),
+        (220, 20, 60),
+        (255, 0, 0),
+        (0, 0, 142),
+        (0, 0, 70),
+        (0, 60, 100),
+        (0, 80, 100),
+        (0, 0, 230),
+        (119, 11, 32),
+        (110, 190, 160),
+        (170, 120, 50),
+        (55, 90, 80),
+        (45, 60, 150),
+        (157, 234, 50),
+        (81, 0, 81),
+        (150, 100, 100),
+        (230, 150, 140),
+        (180, 165, 180),
+    ],
+    dtype=np.uint8,
+)
+
+
+class SensorData(object):
+    def __init__(self, frame: int, timestamp: float, transform: Transform):
+        self.frame = frame
+        self.frame_number = frame
+        self.timestamp = timestamp
+        self.transform = transform
+
+
+# ==============================================================================
+# -- Cameras -------------------------------------------------------------------
+# ==============================================================================
+
+
+class Image(SensorData):
+    def __init__(self, frame, timestamp, transform, width, height, fov, buffer: np.ndarray):
+        super().__init__(frame, timestamp, transform)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self._buffer = buffer
+
+    def __len__(self):
+        return self.width * self.height
+
+    @property
+    def raw_data(self) -> memoryview:
+        return memoryview(self._buffer.reshape(-1))
+
+    def convert(self, color_converter):
+        bgra = self._buffer.reshape(self.height, self.width, 4)
+        if color_converter == ColorConverter.Depth:
+            gray = (_decode_depth(bgra) * 255.0).astype(np.uint8)
+            bgra[:, :, 0] = bgra[:, :, 1] = bgra[:, :, 2] = gray
+        elif color_converter == ColorConverter.LogarithmicDepth:
+            normalized = np.maximum(_decode_depth(bgra), 1e-9)
+            gray = np.clip(1.0 + np.log(normalized) / 5.70378, 0.0, 1.0)
+            bgra[:, :, 0] = bgra[:, :, 1] = bgra[:, :, 2] = (gray * 255.0).astype(np.uint8)
+        elif color_converter == ColorConverter.CityScapesPalette:
+            tags = np.minimum(bgra[:, :, 2], len(CITYSCAPES_PALETTE) - 1)
+            bgra[:, :, 2::-1] = CITYSCAPES_PALETTE[tags]
+
+    def save_to_disk(self, path: str, color_converter=ColorConverter.Raw):
+        self.convert(color_converter)
+        bgra = self._buffer.reshape(self.height, self.width, 4)
+        try:
+            import cv2
+        except ImportError:
+            np.save(path, bgra)
+            return
+        cv2.imwrite(path, bgra)
+
+
+def _decode_depth(bgra: np.ndarray) -> np.ndarray:
+    """Return the depth normalized to [0, 1] (1 is 1000 m) of a depth camera image."""
+    rgb = bgra[:, :, 2::-1].astype(np.float32)
+    return (rgb[:, :, 0] + rgb[:, :, 1] * 256.0 + rgb[:, :, 2] * 65536.0) / (256.0 ** 3 - 1)
+
+
+class OpticalFlowPixel(object):
+    def __init__(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+
+class OpticalFlowImage(SensorData):
+    def __init__(self, frame, timestamp, transform, width, height, fov, buffer: np.ndarray):
+        super().__init__(frame, timestamp, transform)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self._buffer = buffer
+
+    def __len__(self):
+        return self.width * self.height
+
+    @property
+    def raw_data(self) -> memoryview:
+        return memoryview(self._buffer.reshape(-1).view(np.uint8))
+
+    def get_color_coded_flow(self) -> Image:
+        flow = self._buffer.reshape(self.height, self.width, 2)
+        angle = np.arctan2(flow[:, :, 1], flow[:, :, 0])
+        magnitude = np.clip(np.hypot(flow[:, :, 0], flow[:, :, 1]) * 10.0, 0.0, 1.0)
+
+        # HSV to RGB with full saturation: hue encodes the direction and value the magnitude
+        hue = (angle + np.pi) / (2.0 * np.pi) * 6.0
+        x = 1.0 - np.abs(hue % 2.0 - 1.0)
+        sector = np.minimum(hue.astype(np.int32), 5)
+        zero = np.zeros_like(x)
+        one = np.ones_like(x)
+        r = np.choose(sector, [one, x, zero, zero, x, one])
+        g = np.choose(sector, [x, one, one, x, zero, zero])
+        b = np.choose(sector, [zero, zero, x, one, one, x])
+
+        bgra = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        bgra[:, :, 0] = b * magnitude * 255.0
+        bgra[:, :, 1] = g * magnitude * 255.0
+        bgra[:, :, 2] = r * magnitude * 255.0
+        bgra[:, :, 3] = 255
+        return Image(self.frame, self.timestamp, self.transform, self.width, self.height, self.fov, bgra)
+
+
+DVS_EVENT_DTYPE = np.dtype([("x", np.uint16), ("y", np.uint16), ("t", np.int64), ("pol", np.bool_)])
+
+
+class DVSEvent(object):
+    def __init__(self, x: int, y: int, t: int, pol: bool):
+        self.x = x
+        self.y = y
+        self.t = t
+        self.pol = pol
+
+    def __repr__(self):
+        return "Event(x=%d, y=%d, t=%d, pol=%s)" % (self.x, self.y, self.t, self.pol)
+
+
+class DVSEventArray(SensorData):
+    def __init__(self, frame, timestamp, transform, width, height, fov, events: np.ndarray):
+        super().__init__(frame, timestamp, transform)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self._events = events
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[DVSEvent]:
+        for x, y, t, pol in self._events.tolist():
+            yield DVSEvent(x, y, t, pol)
+
+    @property
+    def raw_data(self) -> memoryview:
+        return memoryview(self._events.view(np.uint8))
+
+    def to_array(self) -> List[List[int]]:
+        return [[x, y, t, int(pol)] for x, y, t, pol in self._events.tolist()]
+
+    def to_array_x(self) -> List[int]:
+        return self._events["x"].tolist()
+
+    def to_array_y(self) -> List[int]:
+        return self._events["y"].tolist()
+
+    def to_array_t(self) -> List[int]:
+        return self._events["t"].tolist()
+
+    def to_array_pol(self) -> List[int]:
+        return self._events["pol"].astype(np.int8).tolist()
+
+    def to_image(self) -> Image:
+        bgra = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        bgra[self._events["y"], self._events["x"], np.where(self._events["pol"], 0, 2)] = 255
+        return Image(self.frame, self.timestamp, self.transform, self.width, self.height, self.fov, bgra)
+
+
+# ==============================================================================
+# -- Lidars and radar ----------------------------------------------------------
+# ==============================================================================
+
+
+class LidarDetection(object):
+    def __init__(self, point: Location, intensity: float):
+        self.point = point
+        self.intensity = intensity
+
+    def __repr__(self):
+        return "LidarDetection(%r, intensity=%f)" % (self.point, self.intensity)
+
+
+class LidarMeasurement(SensorData):
+    def __init__(self, frame, timestamp, transform, channels, horizontal_angle, counts, points: np.ndarray):
+        super().__init__(frame, timestamp, transform)
+        self.channels = channels
+        self.horizontal_angle = horizontal_angle
+        self._counts = counts
+        self._points = points
+
+    def __len__(self):
+        return len(self._points)
+
+    def __iter__(self) -> Iterator[LidarDetection]:
+        for x, y, z, intensity in self._points.tolist():
+            yield LidarDetection(Location(x, y, z), intensity)
+
+    def get_point_count(self, channel: int) -> int:
+        return int(self._counts[channel])
+
+    @property
+    def raw_data(self) -> memoryview:
+        return memoryview(self._points.reshape(-1).view(np.uint8))
+
+    def save_to_disk(self, path: str):
+        np.savetxt(path, self._points, header="x y z intensity")
+
+
+SEMANTIC_LIDAR_DTYPE = np.dtype(
+    [
+        ("x", np.float32),
+        ("y", np.float32),
+        ("z", np.float32),
+        ("cos_inc_angle", np.float32),
+        ("object_idx", np.uint32),
+        ("object_tag", np.uint32),
+    ]
+)
+
+
+class SemanticLidarDetection(object):
+    def __init__(self, point: Location, cos_inc_angle: float, object_idx: int, object_tag: int):
+        self.point = point
+        self.cos_inc_angle = cos_inc_angle
+        self.object_idx = object_idx
+        self.object_tag = object_tag
+
+    def __repr__(self):
+        return "SemanticLidarDetection(%r, cos_inc_angle=%f, object_idx=%d, object_tag=%d)" % (
+            self.point,
+            self.cos_inc_angle,
+            self.object_idx,
+            self.object_tag,
+        )
+
+
+class SemanticLidarMeasurement(SensorData):
+    def __init__(self, frame, timestamp, transform, channels, horizontal_angle, counts, points: np.ndarray):
+        super().__init__(frame, timestamp, transform)
+        self.channels = channels
+        self.horizontal_angle = horizontal_angle
+        self._counts = counts
+        self._points = points
+
+    def __len__(self):
+        return len(self._points)
+
+    def __iter__(self) -> Iterator[SemanticLidarDetection]:
+        for x, y, z, cos_inc_angle, idx, tag in self._points.tolist():
+            yield SemanticLidarDetection(Location(x, y, z), cos_inc_angle, idx, tag)
+
+    def get_point_count(self, channel: int) -> int:
+        return int(self._counts[channel])
+
+    @property
+    def raw_data(self) -> memoryview:
+        return memoryview(self._points.view(np.uint8))
+
+
+class RadarDetection(object):
+    def __init__(self, velocity: float, azimuth: float, altitude: float, depth: float):
+        self.velocity = velocity
+        self.azimuth = azimuth
+        self.altitude = altitude
+        self.depth = depth
+
+    def __repr__(self):
+        return "RadarDetection(velocity=%f, azimuth=%f, altitude=%f, depth=%f)" % (
+            self.velocity,
+            self.azimuth,
+            self.altitude,
+            self.depth,
+        )
+
+
+class RadarMeasurement(SensorData):
+    def __init__(self, frame, timestamp, transform, detections: np.ndarray):
+        super().__init__(frame, timestamp, transform)
+        self._detections = detections
+
+    def __len__(self):
+        return len(self._detections)
+
+    def __iter__(self) -> Iterator[RadarDetection]:
+        for velocity, azimuth, altitude, depth in self._detections.tolist():
+            yield RadarDetection(velocity, azimuth, altitude, depth)
+
+    def get_detection_count(self) -> int:
+        return len(self._detections)
+
+    @property
+    def raw_data(self) -> memoryview:
+        return memoryview(self._detections.reshape(-1).view(np.uint8))
+
+
+# ==============================================================================
+# -- Other sensors -------------------------------------------------------------
+# ==============================================================================
+
+
+class GnssMeasurement(SensorData):
+    def __init__(self, frame, timestamp, transform, latitude, longitude, altitude):
+        super().__init__(frame, timestamp, transform)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+
+
+class IMUMeasurement(SensorData):
+    def __init__(self, frame, timestamp, transform, accelerometer: Vector3D, gyroscope: Vector3D, compass: float):
+        super().__init__(frame, timestamp, transform)
+        self.accelerometer = accelerometer
+        self.gyroscope = gyroscope
+        self.compass = compass
+
+
+class CollisionEvent(SensorData):
+    def __init__(self, frame, timestamp, transform, actor, other_actor, normal_impulse: Vector3D):
+        super().__init__(frame, timestamp, transform)
+        self.actor = actor
+        self.other_actor = other_actor
+        self.normal_impulse = normal_impulse
+
+
+class LaneInvasionEvent(SensorData):
+    def __init__(self, frame, timestamp, transform, actor, crossed_lane_markings):
+        super().__init__(frame, timestamp, transform)
+        self.actor = actor
+        self.crossed_lane_markings = crossed_lane_markings
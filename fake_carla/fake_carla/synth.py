@@ -0,0 +1,399 @@
+""" Synthetic measurements of the fake sensors.
+
+Cameras look at a static street scene (road, sidewalks, buildings, sky and a
+parked car) that scrolls horizontally as the sensor turns. Lidars and radars
+cast rays against a flat ground, a ring of walls around the sensor and the
+bounding boxes of nearby vehicles. The scenes are cheap to compute, but every
+measurement has the size and layout of real server data.
+"""
+
+import math
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .enums import CityObjectLabel
+from .geometry import Location, Transform, Vector3D
+from .sensor_data import (
+    CITYSCAPES_PALETTE,
+    DVS_EVENT_DTYPE,
+    SEMANTIC_LIDAR_DTYPE,
+    CollisionEvent,
+    DVSEventArray,
+    GnssMeasurement,
+    Image,
+    IMUMeasurement,
+    LaneInvasionEvent,
+    LidarMeasurement,
+    OpticalFlowImage,
+    RadarMeasurement,
+    SemanticLidarMeasurement,
+)
+
+# Height of the scene camera above the ground, in meters
+_CAMERA_HEIGHT = 1.7
+
+# Ratio of pixels that fire an event in every DVS frame
+_DVS_EVENT_RATIO = 0.005
+
+_GRAVITY = 9.81
+
+
+# ==============================================================================
+# -- Cameras -------------------------------------------------------------------
+# ==============================================================================
+
+
+@lru_cache(maxsize=8)
+def _street_scene(width: int, height: int, fov: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the semantic tags, depth in meters and instance ids of the scene."""
+    focal = width / (2.0 * math.tan(math.radians(fov) / 2.0))
+    horizon = height / 2.0
+    rows = np.arange(height, dtype=np.float64)[:, None] + 0.5
+    cols = np.arange(width, dtype=np.float64)[None, :] + 0.5
+
+    tags = np.full((height, width), int(CityObjectLabel.Sky), dtype=np.uint8)
+    depth = np.full((height, width), 1000.0, dtype=np.float32)
+    instance = np.zeros((height, width), dtype=np.uint16)
+
+    # Ground plane below the horizon
+    below = np.broadcast_to(rows > horizon + 0.5, (height, width))
+    ground = np.where(rows > horizon + 0.5, _CAMERA_HEIGHT * focal / np.maximum(rows - horizon, 1e-3), np.inf)
+    ground = np.broadcast_to(ground, (height, width))
+    lateral = np.abs((cols - width / 2.0) / focal * ground)
+    tags[below] = int(CityObjectLabel.Terrain)
+    tags[below & (lateral < 10.0)] = int(CityObjectLabel.Sidewalks)
+    tags[below & (lateral < 7.0)] = int(CityObjectLabel.Roads)
+    tags[below & (np.abs(lateral - 1.75) < 0.08)] = int(CityObjectLabel.RoadLines)
+    depth[below] = np.minimum(ground[below], 1000.0)
+
+    # Buildings on the horizon, with trees between some of them
+    block = (np.arange(width) // max(width // 12, 1)).astype(np.int64)
+    building_height = (6.0 + 14.0 * ((block * 7919) % 11) / 10.0)[None, :]
+    building_top = horizon - (building_height - _CAMERA_HEIGHT) * focal / 60.0
+    building = (rows < horizon + 0.5) & (rows >= building_top)
+    block_tag = np.where(block % 4 == 3, int(CityObjectLabel.Vegetation), int(CityObjectLabel.Buildings))
+    tags[building] = np.broadcast_to(block_tag[None, :], (height, width))[building]
+    depth[building] = 60.0
+
+    # A parked car on the right side of the road, 15 m ahead
+    car_distance, car_left, car_right = 15.0, 2.5, 4.5
+    top = horizon + (_CAMERA_HEIGHT - 1.5) * focal / car_distance
+    bottom = horizon + _CAMERA_HEIGHT * focal / car_distance
+    left = width / 2.0 + car_left * focal / car_distance
+    right = width / 2.0 + car_right * focal / car_distance
+    car = (rows >= top) & (rows < bottom) & (cols >= left) & (cols < right)
+    tags[car] = int(CityObjectLabel.Car)
+    depth[car] = car_distance
+    instance[car] = 1
+
+    for array in (tags, depth, instance):
+        array.setflags(write=False)
+    return tags, depth, instance
+
+
+@lru_cache(maxsize=8)
+def _rgb_scene(width: int, height: int, fov: float) -> np.ndarray:
+    tags, depth, _ = _street_scene(width, height, fov)
+    rng = np.random.default_rng(width * 7 + height)
+    shade = 1.0 - 0.5 * np.minimum(depth, 200.0) / 200.0
+    rgb = CITYSCAPES_PALETTE[tags].astype(np.float32) * shade[:, :, None]
+    rgb += rng.integers(0, 12, size=rgb.shape)
+    bgra = np.empty((height, width, 4), dtype=np.uint8)
+    bgra[:, :, 2::-1] = np.clip(rgb, 0, 255).astype(np.uint8)
+    bgra[:, :, 3] = 255
+    bgra.setflags(write=False)
+    return bgra
+
+
+@lru_cache(maxsize=8)
+def _encoded_scene(kind: str, width: int, height: int, fov: float) -> np.ndarray:
+    tags, depth, instance = _street_scene(width, height, fov)
+    bgra = np.zeros((height, width, 4), dtype=np.uint8)
+    bgra[:, :, 3] = 255
+    if kind == "sensor.camera.depth":
+        value = (np.minimum(depth, 1000.0) / 1000.0 * (256.0 ** 3 - 1)).astype(np.uint32)
+        bgra[:, :, 2] = value % 256
+        bgra[:, :, 1] = (value // 256) % 256
+        bgra[:, :, 0] = value // 65536
+    elif kind == "sensor.camera.semantic_segmentation":
+        bgra[:, :, 2] = tags
+    else:
+        bgra[:, :, 2] = tags
+        bgra[:, :, 1] = instance % 256
+        bgra[:, :, 0] = instance // 256
+    bgra.setflags(write=False)
+    return bgra
+
+
+@lru_cache(maxsize=8)
+def _radial_flow(width: int, height: int) -> np.ndarray:
+    v, u = np.mgrid[0:height, 0:width].astype(np.float32)
+    flow = np.empty((height, width, 2), dtype=np.float32)
+    flow[:, :, 0] = (u - width / 2.0) / width
+    flow[:, :, 1] = (v - height / 2.0) / height
+    flow.setflags(write=False)
+    return flow
+
+
+def _scrolled(scene: np.ndarray, offset: int) -> np.ndarray:
+    """Copy a scene into a new buffer, rotated left by offset columns."""
+    out = np.empty_like(scene)
+    width = scene.shape[1]
+    offset %= width
+    out[:, : width - offset] = scene[:, offset:]
+    out[:, width - offset :] = scene[:, :offset]
+    return out
+
+
+class CameraSynth(object):
+    def __init__(self, kind: str, width: int, height: int, fov: float, rng: np.random.Generator):
+        self.kind = kind
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.rng = rng
+
+    def measure(self, sensor, frame: int, timestamp: float, period: float, transform: Transform):
+        w, h, fov = self.width, self.height, self.fov
+        offset = int(round(transform.rotation.yaw / fov * w))
+
+        if self.kind == "sensor.camera.rgb":
+            return Image(frame, timestamp, transform, w, h, fov, _scrolled(_rgb_scene(w, h, fov), offset))
+
+        if self.kind == "sensor.camera.dvs":
+            count = int(w * h * _DVS_EVENT_RATIO)
+            events = np.empty(count, dtype=DVS_EVENT_DTYPE)
+            events["x"] = self.rng.integers(0, w, count)
+            events["y"] = self.rng.integers(0, h, count)
+            start = int((timestamp - period) * 1e9)
+            events["t"] = np.sort(self.rng.integers(start, start + max(int(period * 1e9), 1), count))
+            events["pol"] = self.rng.random(count) < 0.5
+            return DVSEventArray(frame, timestamp, transform, w, h, fov, events)
+
+        if self.kind == "sensor.camera.optical_flow":
+            speed = sensor.parent.get_velocity().length() if sensor.parent is not None else 0.0
+            flow = _radial_flow(w, h) * np.float32(0.01 * speed * period)
+            return OpticalFlowImage(frame, timestamp, transform, w, h, fov, flow)
+
+        scene = _encoded_scene(self.kind, w, h, fov)
+        return Image(frame, timestamp, transform, w, h, fov, _scrolled(scene, offset))
+
+
+# ==============================================================================
+# -- Lidars and radar ----------------------------------------------------------
+# ==============================================================================
+
+
+def _wall_distance(azimuth: np.ndarray) -> np.ndarray:
+    return 25.0 + 10.0 * np.abs(np.sin(2.0 * azimuth))
+
+
+class LidarSynth(object):
+    def __init__(self, kind: str, attrs: dict, rng: np.random.Generator):
+        self.semantic = kind == "sensor.lidar.ray_cast_semantic"
+        self.channels = int(attrs["channels"])
+        self.range = float(attrs["range"])
+        self.points_per_second = int(attrs["points_per_second"])
+        self.rotation_frequency = float(attrs["rotation_frequency"])
+        self.upper_fov = math.radians(float(attrs["upper_fov"]))
+        self.lower_fov = math.radians(float(attrs["lower_fov"]))
+        self.horizontal_fov = math.radians(float(attrs["horizontal_fov"]))
+        self.rng = rng
+        self.angle = 0.0
+
+    def measure(self, sensor, frame: int, timestamp: float, period: float, transform: Transform):
+        # The slice of the revolution swept since the last measurement
+        per_channel = max(int(self.points_per_second * period / self.channels), 1)
+        sweep = min(2.0 * math.pi * self.rotation_frequency * period, 2.0 * math.pi)
+        start = self.angle
+        self.angle = (self.angle + sweep) % (2.0 * math.pi)
+
+        azimuth = start + sweep * (np.arange(per_channel) / per_channel)
+        azimuth = (azimuth + math.pi) % (2.0 * math.pi) - math.pi
+        if self.channels > 1:
+            elevation = np.linspace(self.upper_fov, self.lower_fov, self.channels)
+        else:
+            elevation = np.array([0.0])
+        el, az = np.meshgrid(elevation, azimuth, indexing="ij")
+
+        height = max(transform.location.z, 0.5)
+        tan_el = np.tan(el)
+        cos_el = np.cos(el)
+
+        # Ground hits
+        ground_r = np.where(el < 0.0, height / np.maximum(-np.sin(el), 1e-6), np.inf)
+        # Wall hits up to a height of 8 m
+        wall_horizontal = _wall_distance(az)
+        wall_r = wall_horizontal / cos_el
+        wall_r = np.where(height + wall_horizontal * tan_el < 8.0, wall_r, np.inf)
+
+        r = np.minimum(ground_r, wall_r)
+        tag = np.where(ground_r <= wall_r, int(CityObjectLabel.Roads), int(CityObjectLabel.Buildings))
+        cos_inc = np.where(ground_r <= wall_r, -np.sin(el), cos_el)
+        idx = np.zeros(r.shape, dtype=np.uint32)
+
+        self._hit_vehicles(sensor, transform, height, az, el, r, tag, cos_inc, idx)
+
+        keep = (r <= self.range) & (np.abs(az) <= self.horizontal_fov / 2.0 + 1e-9)
+        counts = keep.sum(axis=1)
+        r, el, az = r[keep], el[keep], az[keep]
+
+        x = (r * np.cos(el) * np.cos(az)).astype(np.float32)
+        y = (r * np.cos(el) * np.sin(az)).astype(np.float32)
+        z = (r * np.sin(el)).astype(np.float32)
+
+        horizontal_angle = self.angle
+        if self.semantic:
+            points = np.empty(len(x), dtype=SEMANTIC_LIDAR_DTYPE)
+            points["x"], points["y"], points["z"] = x, y, z
+            points["cos_inc_angle"] = cos_inc[keep]
+            points["object_idx"] = idx[keep]
+            points["object_tag"] = tag[keep]
+            return SemanticLidarMeasurement(
+                frame, timestamp, transform, self.channels, horizontal_angle, counts, points)
+
+        points = np.empty((len(x), 4), dtype=np.float32)
+        points[:, 0], points[:, 1], points[:, 2] = x, y, z
+        points[:, 3] = np.exp(-0.004 * r)
+        return LidarMeasurement(frame, timestamp, transform, self.channels, horizontal_angle, counts, points)
+
+    def _hit_vehicles(self, sensor, transform, height, az, el, r, tag, cos_inc, idx):
+        """Replace the rays that hit the bounding box of a nearby vehicle."""
+        world = sensor.get_world()
+        for vehicle, local, extent in world._vehicles_around(transform, self.range, exclude=sensor.parent):
+            distance = math.hypot(local.x, local.y)
+            if distance < 1e-3:
+                continue
+            bearing = math.atan2(local.y, local.x)
+            half_width = math.atan2(max(extent.x, extent.y), distance)
+            near = distance - min(extent.x, extent.y)
+            low = math.atan2(-height, near)
+            high = math.atan2(2.0 * extent.z - height, near)
+            delta = np.abs((az - bearing + math.pi) % (2.0 * math.pi) - math.pi)
+            hit = (delta <= half_width) & (el >= low) & (el <= high)
+            range_on_box = near / np.maximum(np.cos(el), 1e-6)
+            hit &= range_on_box < r
+            r[hit] = range_on_box[hit]
+            tag[hit] = int(CityObjectLabel.Car)
+            cos_inc[hit] = np.cos(el[hit])
+            idx[hit] = vehicle.id
+
+
+class RadarSynth(object):
+    def __init__(self, attrs: dict, rng: np.random.Generator):
+        self.horizontal_fov = math.radians(float(attrs["horizontal_fov"]))
+        self.vertical_fov = math.radians(float(attrs["vertical_fov"]))
+        self.range = float(attrs["range"])
+        self.points_per_second = int(attrs["points_per_second"])
+        self.rng = rng
+
+    def measure(self, sensor, frame: int, timestamp: float, period: float, transform: Transform):
+        count = max(int(self.points_per_second * period), 1)
+        azimuth = self.rng.uniform(-self.horizontal_fov / 2.0, self.horizontal_fov / 2.0, count)
+        altitude = self.rng.uniform(-self.vertical_fov / 2.0, self.vertical_fov / 2.0, count)
+        depth = np.minimum(_wall_distance(azimuth) / np.cos(azimuth), self.range)
+        speed = sensor.parent.get_velocity().length() if sensor.parent is not None else 0.0
+
+        detections = np.empty((count, 4), dtype=np.float32)
+        detections[:, 0] = -speed * np.cos(azimuth) * np.cos(altitude)
+        detections[:, 1] = azimuth
+        detections[:, 2] = altitude
+        detections[:, 3] = depth * self.rng.uniform(0.9, 1.0, count)
+        return RadarMeasurement(frame, timestamp, transform, detections)
+
+
+# ==============================================================================
+# -- Other sensors -------------------------------------------------------------
+# ==============================================================================
+
+
+class GnssSynth(object):
+    def measure(self, sensor, frame, timestamp, period, transform):
+        geo = sensor.get_world().get_map().transform_to_geolocation(transform.location)
+        return GnssMeasurement(frame, timestamp, transform, geo.latitude, geo.longitude, geo.altitude)
+
+
+class ImuSynth(object):
+    def measure(self, sensor, frame, timestamp, period, transform):
+        parent = sensor.parent
+        if parent is None:
+            accel, angular = Vector3D(), Vector3D()
+        else:
+            accel, angular = parent.get_acceleration(), parent.get_angular_velocity()
+
+        # The accelerometer measures the specific force in the sensor frame
+        world_accel = Vector3D(accel.x, accel.y, accel.z + _GRAVITY)
+        local = Transform(Location(), transform.rotation).inverse_transform(world_accel)
+        gyroscope = Vector3D(
+            math.radians(angular.x), math.radians(angular.y), math.radians(angular.z))
+        compass = math.radians((transform.rotation.yaw + 90.0) % 360.0)
+        return IMUMeasurement(frame, timestamp, transform, local, gyroscope, compass)
+
+
+class CollisionSynth(object):
+    """Report a collision on every tick the parent overlaps another vehicle."""
+
+    def measure(self, sensor, frame, timestamp, period, transform) -> List[CollisionEvent]:
+        parent = sensor.parent
+        if parent is None:
+            return []
+        events = []
+        world = sensor.get_world()
+        parent_velocity = parent.get_velocity()
+        for other in world._overlapping(parent):
+            other_velocity = other.get_velocity()
+            relative = Vector3D(
+                other_velocity.x - parent_velocity.x,
+                other_velocity.y - parent_velocity.y,
+                other_velocity.z - parent_velocity.z,
+            )
+            impulse = relative * parent._mass
+            events.append(CollisionEvent(frame, timestamp, transform, parent, other, impulse))
+        return events
+
+
+class LaneInvasionSynth(object):
+    """Report the lane marking crossed when the parent moves to a lane of the same road."""
+
+    def __init__(self):
+        self.last_key = None
+
+    def measure(self, sensor, frame, timestamp, period, transform) -> List[LaneInvasionEvent]:
+        parent = sensor.parent
+        if parent is None:
+            return []
+        waypoint = sensor.get_world().get_map().get_waypoint(parent.get_location())
+        if waypoint is None:
+            return []
+
+        key = (waypoint.road_id, waypoint.section_id, waypoint.lane_id)
+        last_key, self.last_key = self.last_key, key
+        if last_key is None or waypoint.is_junction or key == last_key or key[:2] != last_key[:2]:
+            return []
+
+        if abs(key[2]) > abs(last_key[2]) or (key[2] > 0) != (last_key[2] > 0):
+            marking = waypoint.left_lane_marking
+        else:
+            marking = waypoint.right_lane_marking
+        return [LaneInvasionEvent(frame, timestamp, transform, parent, [marking])]
+
+
+def make_synth(kind: str, attrs: dict, rng: np.random.Generator) -> Optional[object]:
+    if kind.startswith("sensor.camera."):
+        return CameraSynth(
+            kind, int(attrs["image_size_x"]), int(attrs["image_size_y"]), float(attrs["fov"]), rng)
+    if kind.startswith("sensor.lidar."):
+        return LidarSynth(kind, attrs, rng)
+    if kind == "sensor.other.radar":
+        return RadarSynth(attrs, rng)
+    if kind == "sensor.other.gnss":
+        return GnssSynth()
+    if kind == "sensor.other.imu":
+        return ImuSynth()
+    if kind == "sensor.other.collision":
+        return CollisionSynth()
+    if kind == "sensor.other.lane_invasion":
+        return LaneInvasionSynth()
+    return None
@@ -0,0 +1,208 @@
+""" Synthetic grid town in the array layout read by map.Map.
+
+Nodes of a regular grid are joined by straight two-way roads. Every road
+carries the same number of lanes in each direction, separated by broken
+lines that allow lane changes. Each node is a junction whose connecting
+lanes go straight from every lane, turn left from the innermost lane and
+turn right from the outermost lane. Turning is allowed from every lane at
+nodes where going straight is impossible, so that no lane is a dead end.
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .enums import LaneChange, LaneType
+from .map import FORMAT_VERSION
+
+# Distance from a node to where its roads start
+_JUNCTION_RADIUS = 12.0
+
+# Distance between centerline samples in meters
+_RESOLUTION = 1.0
+
+
+class _Lane(object):
+    def __init__(self, key, points, yaws, road_s, is_junction=False, junction_id=-1):
+        self.key = key
+        self.points = points
+        self.yaws = yaws
+        self.road_s = road_s
+        self.is_junction = is_junction
+        self.junction_id = junction_id
+        self.left_change = np.zeros(len(points), dtype=np.uint8)
+        self.right_change = np.zeros(len(points), dtype=np.uint8)
+        self.left = -1
+        self.right = -1
+        self.successors: List[int] = []
+
+
+def _straight(start, end):
+    length = math.hypot(end[0] - start[0], end[1] - start[1])
+    count = max(int(math.ceil(length / _RESOLUTION)), 1) + 1
+    t = np.linspace(0.0, 1.0, count)
+    points = np.outer(1.0 - t, start) + np.outer(t, end)
+    yaw = math.degrees(math.atan2(end[1] - start[1], end[0] - start[0]))
+    return points, np.full(count, yaw)
+
+
+def _curve(start, start_yaw, end, end_yaw):
+    """Sample a cubic Bezier curve joining two poses at roughly even spacing."""
+    chord = math.hypot(end[0] - start[0], end[1] - start[1])
+    d0 = np.array([math.cos(math.radians(start_yaw)), math.sin(math.radians(start_yaw))])
+    d1 = np.array([math.cos(math.radians(end_yaw)), math.sin(math.radians(end_yaw))])
+    p0, p3 = np.asarray(start), np.asarray(end)
+    p1, p2 = p0 + d0 * chord / 3.0, p3 - d1 * chord / 3.0
+
+    t = np.linspace(0.0, 1.0, 200)[:, None]
+    curve = (1 - t) ** 3 * p0 + 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t ** 2 * p2 + t ** 3 * p3
+    travelled = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(curve, axis=0).T))))
+
+    count = max(int(math.ceil(travelled[-1] / _RESOLUTION)), 1) + 1
+    target = np.linspace(0.0, travelled[-1], count)
+    points = np.stack([np.interp(target, travelled, curve[:, i]) for i in range(2)], axis=1)
+    tangent = np.gradient(points, axis=0)
+    yaws = np.degrees(np.unwrap(np.arctan2(tangent[:, 1], tangent[:, 0])))
+    return points, yaws
+
+
+def make_grid_town(
+    name: str = "Town10HD_Opt",
+    blocks: Tuple[int, int] = (4, 4),
+    block_size: float = 100.0,
+    lanes_per_direction: int = 2,
+    lane_width: float = 3.5,
+) -> Dict[str, np.ndarray]:
+    nx, ny = blocks[0] + 1, blocks[1] + 1
+    nodes = {
+        (i, j): np.array([i * block_size - 0.5 * blocks[0] * block_size, j * block_size - 0.5 * blocks[1] * block_size])
+        for i in range(nx)
+        for j in range(ny)
+    }
+    edges = [((i, j), (i + 1, j)) for i in range(nx - 1) for j in range(ny)]
+    edges += [((i, j), (i, j + 1)) for i in range(nx) for j in range(ny - 1)]
+
+    lanes: List[_Lane] = []
+    # (node, lane index from the center) -> lane, for lanes entering and leaving a node
+    incoming: Dict[tuple, List[Tuple[np.ndarray, int]]] = {node: [] for node in nodes}
+    outgoing: Dict[tuple, List[Tuple[np.ndarray, int]]] = {node: [] for node in nodes}
+
+    # Roads between nodes. Lanes with negative ids follow the road direction.
+    for road_id, (a, b) in enumerate(edges):
+        pa, pb = nodes[a], nodes[b]
+        direction = (pb - pa) / np.linalg.norm(pb - pa)
+        road_length = np.linalg.norm(pb - pa) - 2 * _JUNCTION_RADIUS
+        ids = {}
+        for sign, src, dst in ((-1, pa, pb), (1, pb, pa)):
+            heading = direction if sign < 0 else -direction
+            # The right of a heading in the left-handed simulator frame
+            right = np.array([-heading[1], heading[0]])
+            for k in range(1, lanes_per_direction + 1):
+                offset = right * (k - 0.5) * lane_width
+                start = src + heading * _JUNCTION_RADIUS + offset
+                end = dst - heading * _JUNCTION_RADIUS + offset
+                points, yaws = _straight(start, end)
+                s = np.linspace(0.0, road_length, len(points))
+                lane = _Lane((road_id, 0, sign * k), points, yaws, s if sign < 0 else s[::-1])
+                ids[sign * k] = len(lanes)
+                lanes.append(lane)
+                src_node, dst_node = (a, b) if sign < 0 else (b, a)
+                outgoing[src_node].append((heading, ids[sign * k]))
+                incoming[dst_node].append((heading, ids[sign * k]))
+
+        for sign in (-1, 1):
+            for k in range(1, lanes_per_direction + 1):
+                lane = lanes[ids[sign * k]]
+                if k < lanes_per_direction:
+                    lane.right = ids[sign * (k + 1)]
+                    lane.right_change[:] = int(LaneChange.Both)
+                if k > 1:
+                    lane.left = ids[sign * (k - 1)]
+                    lane.left_change[:] = int(LaneChange.Both)
+                else:
+                    lane.left = ids[-sign]
+
+    # Junction connectors
+    road_count = len(edges)
+    for junction_id, node in enumerate(sorted(nodes)):
+        for in_heading, in_lane in incoming[node]:
+            k_in = abs(lanes[in_lane].key[2])
+            turns = []
+            for out_heading, out_lane in outgoing[node]:
+                k_out = abs(lanes[out_lane].key[2])
+                if k_out != k_in:
+                    continue
+                cross = in_heading[0] * out_heading[1] - in_heading[1] * out_heading[0]
+                dot = float(np.dot(in_heading, out_heading))
+                if dot < -0.5:
+                    continue
+                turns.append(("straight" if dot > 0.5 else ("right" if cross > 0 else "left"), out_lane))
+
+            has_straight = any(kind == "straight" for kind, _ in turns)
+            for kind, out_lane in turns:
+                if has_straight and kind == "left" and k_in != 1:
+                    continue
+                if has_straight and kind == "right" and k_in != lanes_per_direction:
+                    continue
+
+                src, dst = lanes[in_lane], lanes[out_lane]
+                if kind == "straight":
+                    points, yaws = _straight(src.points[-1], dst.points[0])
+                else:
+                    points, yaws = _curve(src.points[-1], src.yaws[-1], dst.points[0], dst.yaws[0])
+                travelled = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))))
+                connector = _Lane(
+                    (road_count, 0, -1), points, yaws, travelled, is_junction=True, junction_id=junction_id)
+                road_count += 1
+                src.successors.append(len(lanes))
+                connector.successors.append(out_lane)
+                lanes.append(connector)
+
+    return _to_arrays(name, lanes, lane_width)
+
+
+def _to_arrays(name: str, lanes: List[_Lane], lane_width: float) -> Dict[str, np.ndarray]:
+    offsets = np.cumsum([0] + [len(lane.points) for lane in lanes])
+    xy = np.concatenate([lane.points for lane in lanes])
+    xyz = np.concatenate([xy, np.zeros((len(xy), 1))], axis=1)
+    rot = np.zeros((len(xy), 3))
+    rot[:, 1] = np.concatenate([lane.yaws for lane in lanes])
+    dist = np.concatenate(
+        [np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(lane.points, axis=0).T)))) for lane in lanes])
+
+    topology_lane = [(i, succ) for i, lane in enumerate(lanes) for succ in lane.successors]
+    succ_offsets = np.cumsum([0] + [len(lane.successors) for lane in lanes])
+
+    # Spawn points at a third and two thirds of every road lane, slightly above the ground
+    spawn_points = []
+    for lane in lanes:
+        if lane.is_junction:
+            continue
+        for ratio in (1.0 / 3.0, 2.0 / 3.0):
+            i = int(ratio * (len(lane.points) - 1))
+            spawn_points.append((lane.points[i][0], lane.points[i][1], 0.6, 0.0, lane.yaws[i], 0.0))
+
+    return dict(
+        version=np.int32(FORMAT_VERSION),
+        name=np.array("Carla/Maps/%s" % name),
+        lane_keys=np.array([lane.key for lane in lanes], dtype=np.int32),
+        lane_offsets=offsets.astype(np.int64),
+        lane_type=np.full(len(lanes), int(LaneType.Driving), dtype=np.int32),
+        is_junction=np.array([lane.is_junction for lane in lanes], dtype=bool),
+        junction_id=np.array([lane.junction_id for lane in lanes], dtype=np.int32),
+        left_lane=np.array([lane.left for lane in lanes], dtype=np.int32),
+        right_lane=np.array([lane.right for lane in lanes], dtype=np.int32),
+        succ_offsets=succ_offsets.astype(np.int64),
+        succ=np.array([succ for lane in lanes for succ in lane.successors], dtype=np.int32),
+        xyz=xyz.astype(np.float32),
+        rot=rot.astype(np.float32),
+        dist=dist.astype(np.float32),
+        road_s=np.concatenate([lane.road_s for lane in lanes]).astype(np.float32),
+        width=np.full(len(xy), lane_width, dtype=np.float32),
+        left_change=np.concatenate([lane.left_change for lane in lanes]),
+        right_change=np.concatenate([lane.right_change for lane in lanes]),
+        topology_lane=np.array(topology_lane, dtype=np.int32).reshape(-1, 2),
+        topology_dist=np.zeros((len(topology_lane), 2), dtype=np.float32),
+        spawn_points=np.array(spawn_points, dtype=np.float32).reshape(-1, 6),
+    )
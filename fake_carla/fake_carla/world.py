@@ -0,0 +1,359 @@
+import math
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .actor import Actor, ActorList, Sensor, TrafficLight, Vehicle, Walker
+from .blueprint import VEHICLE_MODELS, ActorBlueprint, BlueprintLibrary, make_blueprint_library
+from .config import CONFIG
+from .control import WalkerControl, WeatherParameters, WorldSettings
+from .enums import AttachmentType
+from .geometry import Location, Rotation, Transform, Vector3D
+from .map import Map
+from .synth import make_synth
+
+# Cruise speeds of the background traffic, in m/s
+_AUTOPILOT_SPEED_RANGE = (20.0 / 3.6, 40.0 / 3.6)
+
+
+class Timestamp(object):
+    def __init__(self, frame: int, elapsed_seconds: float, delta_seconds: float, platform_timestamp: float):
+        self.frame = frame
+        self.frame_count = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = platform_timestamp
+
+    def __repr__(self):
+        return "Timestamp(frame=%d, elapsed_seconds=%f, delta_seconds=%f, platform_timestamp=%f)" % (
+            self.frame,
+            self.elapsed_seconds,
+            self.delta_seconds,
+            self.platform_timestamp,
+        )
+
+
+class ActorSnapshot(object):
+    def __init__(self, actor_id: int, state: tuple):
+        self.id = actor_id
+        self._state = state
+
+    def get_transform(self) -> Transform:
+        x, y, z, pitch, yaw, roll = self._state[:6]
+        return Transform(Location(x, y, z), Rotation(pitch=pitch, yaw=yaw, roll=roll))
+
+    def get_velocity(self) -> Vector3D:
+        return Vector3D(*self._state[6:9])
+
+    def get_angular_velocity(self) -> Vector3D:
+        return Vector3D(*self._state[9:12])
+
+    def get_acceleration(self) -> Vector3D:
+        return Vector3D(*self._state[12:15])
+
+
+class WorldSnapshot(object):
+    def __init__(self, world_id: int, timestamp: Timestamp, states: Dict[int, tuple]):
+        self.id = world_id
+        self.frame = timestamp.frame
+        self.timestamp = timestamp
+        self._states = states
+
+    # The examples read the timing of on_tick() snapshots directly, as with
+    # carla.Timestamp.
+    @property
+    def elapsed_seconds(self) -> float:
+        return self.timestamp.elapsed_seconds
+
+    @property
+    def delta_seconds(self) -> float:
+        return self.timestamp.delta_seconds
+
+    @property
+    def platform_timestamp(self) -> float:
+        return self.timestamp.platform_timestamp
+
+    def __len__(self):
+        return len(self._states)
+
+    def __iter__(self) -> Iterator[ActorSnapshot]:
+        for actor_id, state in self._states.items():
+            yield ActorSnapshot(actor_id, state)
+
+    def has_actor(self, actor_id: int) -> bool:
+        return actor_id in self._states
+
+    def find(self, actor_id: int) -> Optional[ActorSnapshot]:
+        state = self._states.get(actor_id)
+        return ActorSnapshot(actor_id, state) if state is not None else None
+
+
+class DebugHelper(object):
+    """Drawing is not rendered by the fake server; all calls are no-ops."""
+
+    def draw_point(self, location, size=0.1, color=None, life_time=-1.0):
+        pass
+
+    def draw_line(self, begin, end, thickness=0.1, color=None, life_time=-1.0):
+        pass
+
+    def draw_arrow(self, begin, end, thickness=0.1, arrow_size=0.1, color=None, life_time=-1.0):
+        pass
+
+    def draw_box(self, box, rotation, thickness=0.1, color=None, life_time=-1.0):
+        pass
+
+    def draw_string(self, location, text, draw_shadow=False, color=None, life_time=-1.0):
+        pass
+
+
+class World(object):
+    def __init__(self, world_id: int, wmap: Map):
+        self.id = world_id
+        self.debug = DebugHelper()
+        self._map = wmap
+        self._blueprints = make_blueprint_library()
+        self._settings = WorldSettings()
+        self._weather = WeatherParameters.ClearNoon
+        self._rng = np.random.default_rng(CONFIG.seed)
+        self._actors: Dict[int, Actor] = dict()
+        self._next_id = 1
+        self._tick_callbacks: Dict[int, Callable] = dict()
+        self._next_callback_id = 1
+
+        self._frame = 0
+        self._elapsed = 0.0
+        self._snapshot = self._take_snapshot(0.0)
+        self._spectator = self._add(Actor(self, self._new_id(), "spectator", {}, Transform()))
+
+        self._spawn_background_traffic()
+
+    # --------------------------------------------------------------------------
+    # carla.World API
+    # --------------------------------------------------------------------------
+
+    def get_map(self) -> Map:
+        return self._map
+
+    def get_blueprint_library(self) -> BlueprintLibrary:
+        return self._blueprints
+
+    def get_spectator(self) -> Actor:
+        return self._spectator
+
+    def get_settings(self) -> WorldSettings:
+        return self._settings.copy()
+
+    def apply_settings(self, settings: WorldSettings) -> int:
+        self._settings = settings.copy()
+        return self._frame
+
+    def get_weather(self) -> WeatherParameters:
+        return self._weather
+
+    def set_weather(self, weather: WeatherParameters):
+        self._weather = weather
+
+    def load_map_layer(self, map_layers):
+        pass
+
+    def unload_map_layer(self, map_layers):
+        pass
+
+    def get_actor(self, actor_id: int) -> Optional[Actor]:
+        return self._actors.get(actor_id)
+
+    def get_actors(self, actor_ids: Optional[List[int]] = None) -> ActorList:
+        if actor_ids is None:
+            return ActorList(self._actors.values())
+        return ActorList(self._actors[i] for i in actor_ids if i in self._actors)
+
+    def get_snapshot(self) -> WorldSnapshot:
+        return self._snapshot
+
+    def on_tick(self, callback: Callable) -> int:
+        callback_id = self._next_callback_id
+        self._next_callback_id += 1
+        self._tick_callbacks[callback_id] = callback
+        return callback_id
+
+    def remove_on_tick(self, callback_id: int):
+        self._tick_callbacks.pop(callback_id, None)
+
+    def spawn_actor(self, blueprint: ActorBlueprint, transform: Transform, attach_to: Optional[Actor] = None,
+                    attachment_type=AttachmentType.Rigid) -> Actor:
+        actor = self.try_spawn_actor(blueprint, transform, attach_to, attachment_type)
+        if actor is None:
+            raise RuntimeError("Spawn failed because of collision at spawn position")
+        return actor
+
+    def try_spawn_actor(self, blueprint: ActorBlueprint, transform: Transform, attach_to: Optional[Actor] = None,
+                        attachment_type=AttachmentType.Rigid) -> Optional[Actor]:
+        bp_id = blueprint.id
+        attributes = blueprint.attributes()
+        kwargs = dict(parent=attach_to, attachment_type=attachment_type)
+        transform = Transform(
+            Location(transform.location.x, transform.location.y, transform.location.z),
+            Rotation(transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+        )
+
+        if bp_id.startswith("vehicle."):
+            if attach_to is None and self._occupied(transform.location, VEHICLE_MODELS[bp_id]):
+                return None
+            actor = Vehicle(self, self._new_id(), bp_id, attributes, transform, VEHICLE_MODELS[bp_id], **kwargs)
+        elif bp_id.startswith("walker."):
+            actor = Walker(self, self._new_id(), bp_id, attributes, transform, **kwargs)
+        elif bp_id.startswith("sensor."):
+            self._apply_sensor_overrides(bp_id, attributes)
+            synth = make_synth(bp_id, attributes, np.random.default_rng(CONFIG.seed + self._next_id))
+            actor = Sensor(self, self._new_id(), bp_id, attributes, transform, synth, **kwargs)
+        elif bp_id.startswith("traffic.traffic_light"):
+            actor = TrafficLight(self, self._new_id(), bp_id, attributes, transform, **kwargs)
+        else:
+            actor = Actor(self, self._new_id(), bp_id, attributes, transform, **kwargs)
+        return self._add(actor)
+
+    def tick(self, seconds: float = 10.0) -> int:
+        dt = self._settings.fixed_delta_seconds or CONFIG.delta_seconds
+        self._frame += 1
+        self._elapsed += dt
+
+        actors = list(self._actors.values())
+        for actor in actors:
+            if actor.parent is None:
+                actor._step(dt)
+
+        self._snapshot = self._take_snapshot(dt)
+        for actor in actors:
+            if isinstance(actor, Sensor) and actor.is_alive:
+                actor._measure(self._frame, self._elapsed, dt)
+        for callback in list(self._tick_callbacks.values()):
+            callback(self._snapshot)
+
+        if CONFIG.max_ticks is not None and self._frame >= CONFIG.max_ticks:
+            # Let the examples leave their game loop through the usual Ctrl-C path
+            raise KeyboardInterrupt("fake_carla: reached %d ticks" % CONFIG.max_ticks)
+        return self._frame
+
+    def wait_for_tick(self, seconds: float = 10.0) -> WorldSnapshot:
+        # Without a server there is nobody else to advance the simulation in
+        # asynchronous mode, so waiting for a tick performs it.
+        if not self._settings.synchronous_mode:
+            self.tick(seconds)
+        return self._snapshot
+
+    def get_random_location_from_navigation(self) -> Location:
+        spawn_points = self._map.get_spawn_points()
+        return spawn_points[int(self._rng.integers(len(spawn_points)))].location
+
+    def get_traffic_lights_from_waypoint(self, waypoint, distance):
+        return []
+
+    def get_traffic_lights_in_junction(self, junction_id):
+        return []
+
+    # --------------------------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------------------------
+
+    def _new_id(self) -> int:
+        actor_id = self._next_id
+        self._next_id += 1
+        return actor_id
+
+    def _add(self, actor: Actor) -> Actor:
+        self._actors[actor.id] = actor
+        return actor
+
+    def _remove_actor(self, actor: Actor) -> bool:
+        return self._actors.pop(actor.id, None) is not None
+
+    def _apply_sensor_overrides(self, bp_id: str, attributes: Dict[str, str]):
+        if bp_id.startswith("sensor.camera.") and CONFIG.camera_size is not None:
+            attributes["image_size_x"] = str(CONFIG.camera_size[0])
+            attributes["image_size_y"] = str(CONFIG.camera_size[1])
+        if bp_id.startswith("sensor.lidar.") and CONFIG.lidar_points_per_second is not None:
+            attributes["points_per_second"] = str(CONFIG.lidar_points_per_second)
+
+    def _take_snapshot(self, dt: float) -> WorldSnapshot:
+        states = dict()
+        for actor_id, actor in self._actors.items():
+            if actor.parent is not None:
+                continue
+            v, w, a = actor._velocity, actor._angular_velocity, actor._acceleration
+            states[actor_id] = (
+                actor._x, actor._y, actor._z, actor._pitch, actor._yaw, actor._roll,
+                v.x, v.y, v.z, w.x, w.y, w.z, a.x, a.y, a.z,
+            )
+        timestamp = Timestamp(self._frame, self._elapsed, dt, time.time())
+        return WorldSnapshot(self.id, timestamp, states)
+
+    def _vehicles(self) -> List[Vehicle]:
+        return [actor for actor in self._actors.values() if isinstance(actor, Vehicle)]
+
+    def _occupied(self, location: Location, extent: Vector3D) -> bool:
+        for other in self._vehicles():
+            gap = math.hypot(other._x - location.x, other._y - location.y)
+            if gap < max(extent.x, extent.y) + max(other.bounding_box.extent.x, other.bounding_box.extent.y):
+                return True
+        return False
+
+    def _vehicles_around(self, transform: Transform, radius: float, exclude: Optional[Actor] = None):
+        """Yield the vehicles within radius, with their location in the frame of the transform."""
+        origin = transform.location
+        for vehicle in self._vehicles():
+            if vehicle is exclude or vehicle.parent is not None:
+                continue
+            if math.hypot(vehicle._x - origin.x, vehicle._y - origin.y) > radius:
+                continue
+            local = transform.inverse_transform(Location(vehicle._x, vehicle._y, vehicle._z))
+            yield vehicle, local, vehicle.bounding_box.extent
+
+    def _overlapping(self, actor: Actor) -> List[Actor]:
+        """Return the vehicles and walkers overlapping an actor, approximating boxes by circles."""
+        if actor.parent is not None:
+            return []
+        extent = actor.bounding_box.extent
+        radius = 0.5 * (extent.x + extent.y)
+        found = []
+        for other in self._actors.values():
+            if other is actor or other.parent is not None or not isinstance(other, (Vehicle, Walker)):
+                continue
+            other_extent = other.bounding_box.extent
+            gap = math.hypot(other._x - actor._x, other._y - actor._y)
+            if gap < radius + 0.5 * (other_extent.x + other_extent.y):
+                found.append(other)
+        return found
+
+    def _spawn_background_traffic(self):
+        """Spawn the vehicles and walkers requested by configure() at random lane positions."""
+        models = list(VEHICLE_MODELS)
+        wmap = self._map
+        lanes = [lane for lane, junction in enumerate(wmap._is_junction) if not junction]
+        if not lanes:
+            return
+
+        spawned, attempts = 0, 0
+        while spawned < CONFIG.num_vehicles and attempts < 20 * CONFIG.num_vehicles:
+            attempts += 1
+            lane = lanes[int(self._rng.integers(len(lanes)))]
+            dist = float(self._rng.uniform(0.0, wmap._lane_length[lane]))
+            transform = wmap._interpolate_transform(lane, dist)
+            transform.location.z += 0.6
+            blueprint = self._blueprints.find(models[int(self._rng.integers(len(models)))])
+            blueprint.set_attribute("role_name", "background")
+            vehicle = self.try_spawn_actor(blueprint, transform)
+            if vehicle is None:
+                continue
+            vehicle.set_autopilot(True)
+            vehicle._cruise_speed = _AUTOPILOT_SPEED_RANGE[0] + float(self._rng.random()) * (
+                _AUTOPILOT_SPEED_RANGE[1] - _AUTOPILOT_SPEED_RANGE[0])
+            spawned += 1
+
+        walkers = self._blueprints.filter("walker.pedestrian.*")
+        for _ in range(CONFIG.num_walkers):
+            location = self.get_random_location_from_navigation()
+            walker = self.try_spawn_actor(walkers[int(self._rng.integers(len(walkers)))], Transform(location))
+            angle = float(self._rng.uniform(0.0, 2.0 * math.pi))
+            walker.apply_control(WalkerControl(Vector3D(math.cos(angle), math.sin(angle), 0.0), speed=1.4))
@@ -1,10 +1,14 @@
 from carla import Client, Location, Rotation, Transform, Vector3D
 import random
 from argparse import ArgumentParser
+from dataclasses import dataclass
 from enum import Enum
-import time
+from typing import Optional
 from . import controller
-import math
+from .clock import clock
+from .latency import POLICIES, LatencyMonitor
+from .metrics import MetricsBuffer
+import numpy as np
 import os
 
 
@@ -20,11 +24,7 @@ SPECTATOR_TRANS = Transform(
     Location(608.5, -17.0, SPEC_HEIGHT), Rotation(0.0, 180.0, 0.0)
 )
 STUDENT_TRANS = Transform(Location(608.5, -17.0, 0.1), Rotation(0.0, 180.0, 0.0))
-TEACHER_TRANS = Transform(
-    Location(608.5 - INIT_DISTANCE_M, -17.0, 0.1), Rotation(0.0, 180.0, 0.0)
-)
 
-TEACHER_X_THRESH = 598.5 - TEACHER_DISTANCE
 TEACHER_SPEED_KMPH = 20.0
 STU_SPEED_THRESH_KMPH = 25.0
 MIN_TTC_SECS = 1.0
@@ -32,6 +32,7 @@ LATERAL_OFFSET_M = 1.0
 VELOCIDY_THRESH = 1e-3
 LIDAR_RANGE_M = 30
 ACC_THRESH_MS2 = 30
+LATENCY_OVERRUN_PENALTY = 0.1
 
 
 class State(Enum):
@@ -41,24 +42,156 @@ class State(Enum):
     FINISH = 4
 
 
+@dataclass
+class Scenario:
+    """The parameters of an episode, which default to the graded scenario."""
+
+    teacher_speed_kmph: float = TEACHER_SPEED_KMPH
+    init_distance_m: float = INIT_DISTANCE_M
+    teacher_distance_m: float = TEACHER_DISTANCE
+    lidar_range_m: float = LIDAR_RANGE_M
+    timeout_s: float = TIMEOUT_S
+    stu_speed_thresh_kmph: float = STU_SPEED_THRESH_KMPH
+    min_ttc_secs: float = MIN_TTC_SECS
+    lateral_offset_m: float = LATERAL_OFFSET_M
+    acc_thresh_ms2: float = ACC_THRESH_MS2
+
+
+@dataclass
+class Outcome:
+    """The scores of an episode, or the reason it failed."""
+
+    mean_ttc: float = 0.0
+    dist: float = float("nan")
+    ttc_score: float = 0.0
+    dist_score: float = 0.0
+    latency_penalty: float = 0.0
+    final_score: float = 0.0
+    failure: str = ""
+    ticks: int = 0
+
+
 def stop_car(car):
     control = car.get_control()
     control.brake = 0.1
     car.apply_control(control)
 
 
+def compute_ttc_score(mean_ttc: float) -> float:
+    if mean_ttc < 3.0:
+        return 0
+    elif mean_ttc < 3.5:
+        return 90
+    elif mean_ttc < 4.0:
+        return 100
+    elif mean_ttc < 5.0:
+        return 80
+    elif mean_ttc < 6.0:
+        return 70
+    elif mean_ttc < 7.0:
+        return 60
+    else:
+        return 0
+
+
+def compute_dist_score(dist: float) -> float:
+    if dist < 5.0:
+        return 0
+    elif dist < 5.5:
+        return 100
+    elif dist < 6.0:
+        return 90
+    elif dist < 6.5:
+        return 80
+    elif dist < 7.0:
+        return 70
+    elif dist < 10.0:
+        return 60
+    else:
+        return 0
+
+
 def main():
     parser = ArgumentParser()
     parser.add_argument("--addr", default="localhost", help="CARLA server address")
     parser.add_argument("--port", default=2000, help="CARLA server port")
     parser.add_argument("--no-follow-car", action="store_true")
+    parser.add_argument(
+        "--step-budget-ms",
+        default=10.0,
+        type=float,
+        help="latency budget of controller.step() (default: 10)",
+    )
+    parser.add_argument(
+        "--sensor-budget-ms",
+        default=25.0,
+        type=float,
+        help="latency budget of controller.on_sensor_data() (default: 25)",
+    )
+    parser.add_argument(
+        "--latency-policy",
+        choices=POLICIES,
+        default="warn",
+        help="what to do when the controller overruns a budget (default: warn)",
+    )
     args = parser.parse_args()
 
-    teacher_speed_mps = TEACHER_SPEED_KMPH * 1000 / 3600
-    stu_speed_thresh_mps = STU_SPEED_THRESH_KMPH * 1000 / 3600
-
-    ## Connect to the client and retrieve the world object
+    ## Connect to the client
     client = Client(args.addr, int(args.port))
+
+    ## Time the controller calls against their budgets
+    latency = LatencyMonitor(
+        {"step": args.step_budget_ms, "on_sensor_data": args.sensor_budget_ms},
+        args.latency_policy,
+        LATENCY_OVERRUN_PENALTY,
+    )
+
+    try:
+        world = run_episode(
+            client, Scenario(), latency, follow_car=not args.no_follow_car, verbose=True
+        )[0]
+
+    except KeyboardInterrupt:
+        print("INTERRUPTED")
+        return
+
+    finally:
+        if latency.enabled:
+            print(latency.report())
+
+    try:
+        ## loop forever
+        while True:
+            world.tick()
+    except KeyboardInterrupt:
+        pass
+
+
+def run_episode(
+    client: Client,
+    scenario: Scenario,
+    latency: LatencyMonitor,
+    follow_car: bool = True,
+    verbose: bool = False,
+    metrics: Optional[MetricsBuffer] = None,
+):
+    """
+    Run the scenario once with the controller. The metrics of every tick
+    are recorded in `metrics`, and printed with verbose. Return the world,
+    which is left in synchronous mode, and the Outcome.
+    """
+    teacher_speed_mps = scenario.teacher_speed_kmph * 1000 / 3600
+    stu_speed_thresh_mps = scenario.stu_speed_thresh_kmph * 1000 / 3600
+    teacher_trans = Transform(
+        Location(STUDENT_TRANS.location.x - scenario.init_distance_m, -17.0, 0.1),
+        Rotation(0.0, 180.0, 0.0),
+    )
+    teacher_x_thresh = teacher_trans.location.x - scenario.teacher_distance_m
+    if metrics is None:
+        metrics = MetricsBuffer()
+    outcome = Outcome()
+
+    ## Load the world
     client.load_world(WORLD)
     world = client.get_world()
 
@@ -68,6 +201,9 @@ def main():
     settings.fixed_delta_seconds = 0.05
     world.apply_settings(settings)
 
+    ## Measure the episode in simulation time
+    clock.reset(world)
+
     ## Create state variable
     state = State.FORWARDING
 
@@ -78,10 +214,15 @@ def main():
     ## Spawn vehicles
     vblu = world.get_blueprint_library().find("vehicle.tesla.model3")
     stu_car = world.spawn_actor(vblu, STUDENT_TRANS)
-    tea_car = world.spawn_actor(vblu, TEACHER_TRANS)
+    tea_car = world.spawn_actor(vblu, teacher_trans)
+
+    ## Wrap the controller calls to time them
+    step = latency.wrap("step", controller.step)
+    on_sensor_data = latency.wrap("on_sensor_data", controller.on_sensor_data)
 
-    ## TTC list used for judge
-    ttc_list = list()
+    def log(message: str):
+        if verbose:
+            print(message)
 
     def on_collision(event):
         nonlocal state
@@ -91,78 +232,49 @@ def main():
             state = State.COLLISION
 
     def on_success():
-        nonlocal tea_car
-        nonlocal stu_car
         nonlocal state
-        nonlocal ttc_list
 
         stop_car(tea_car)
         stop_car(stu_car)
 
         ## Compute TTC score
-        if ttc_list:
-            mean_ttc = sum(ttc_list) / len(ttc_list)
-        else:
-            mean_ttc = 0.0
-
-        if mean_ttc < 3.0:
-            ttc_score = 0
-        elif mean_ttc < 3.5:
-            ttc_score = 90
-        elif mean_ttc < 4.0:
-            ttc_score = 100
-        elif mean_ttc < 5.0:
-            ttc_score = 80
-        elif mean_ttc < 6.0:
-            ttc_score = 70
-        elif mean_ttc < 7.0:
-            ttc_score = 60
-        else:
-            ttc_score = 0
+        ttc = metrics.column("ttc")
+        ttc = ttc[~np.isnan(ttc)]
+        mean_ttc = float(ttc.mean()) if len(ttc) else 0.0
+        ttc_score = compute_ttc_score(mean_ttc)
 
         ## Compute distance score
         dist = stu_car.get_location().distance(tea_car.get_location())
-
-        if dist < 5.0:
-            dist_score = 0
-        elif dist < 5.5:
-            dist_score = 100
-        elif dist < 6.0:
-            dist_score = 90
-        elif dist < 6.5:
-            dist_score = 80
-        elif dist < 7.0:
-            dist_score = 70
-        elif dist < 10.0:
-            dist_score = 60
-        else:
-            dist_score = 0
-
-        final_score = ttc_score * 0.5 + dist_score * 0.5
-        print("mean_ttc={:.2f}s dist={:.2f}m".format(mean_ttc, dist))
-        print(
-            "SCORES: ttc_score={} dist_score={} final_score={}".format(
-                ttc_score, dist_score, final_score
+        dist_score = compute_dist_score(dist)
+
+        latency_penalty = latency.penalty()
+        final_score = max(0.0, ttc_score * 0.5 + dist_score * 0.5 - latency_penalty)
+        log("mean_ttc={:.2f}s dist={:.2f}m".format(mean_ttc, dist))
+        log(
+            "SCORES: ttc_score={} dist_score={} latency_penalty={:.2f} final_score={}".format(
+                ttc_score, dist_score, latency_penalty, final_score
             )
         )
 
+        outcome.mean_ttc = mean_ttc
+        outcome.dist = dist
+        outcome.ttc_score = ttc_score
+        outcome.dist_score = dist_score
+        outcome.latency_penalty = latency_penalty
+        outcome.final_score = final_score
         state = State.FINISH
 
-    def on_fail():
-        nonlocal tea_car
-        nonlocal stu_car
+    def on_fail(reason: str):
         nonlocal state
+        log("FAIL: " + reason)
+        if not outcome.failure:
+            outcome.failure = reason
         stop_car(tea_car)
         stop_car(stu_car)
         state = State.FINISH
 
     def check():
-        nonlocal tea_car
-        nonlocal stu_car
-        nonlocal ttc_list
-        nonlocal since
-
-        elapsed_s = time.time() - since
+        elapsed_s = clock.now() - since
         veh = stu_car.get_velocity().length()
         dist = stu_car.get_location().distance(tea_car.get_location())
         acc = stu_car.get_acceleration().length()
@@ -174,35 +286,29 @@ def main():
             ttc = float("nan")
 
         lateral_offset = abs(STUDENT_TRANS.location.y - stu_car.get_location().y)
-        print(
+        log(
             "t={:.2f}s v={:.2f}km/h ttc={:.2f}s lat_off={:.2f}m".format(
                 elapsed_s, veh * 3.6, ttc, lateral_offset
             )
         )
 
-        ## Save TTC
-        if not math.isnan(ttc):
-            ttc_list.append(ttc)
+        ## Save the metrics of this tick
+        metrics.append(elapsed_s, veh * 3.6, ttc, lateral_offset, dist, acc)
 
-        if acc >= ACC_THRESH_MS2:
-            print("FAIL: Acceleration too large (< {} m/s2)", ACC_THRESH_MS2)
-            on_fail()
+        if acc >= scenario.acc_thresh_ms2:
+            on_fail("Acceleration too large (< {} m/s2)".format(scenario.acc_thresh_ms2))
 
-        if elapsed_s > TIMEOUT_S:
-            print("FAIL: Exceed timeout {} s".format(TIMEOUT_S))
-            on_fail()
+        if elapsed_s > scenario.timeout_s:
+            on_fail("Exceed timeout {} s".format(scenario.timeout_s))
 
         if veh > stu_speed_thresh_mps:
-            print("FAIL: Speed exceeds {} km/s".format(STU_SPEED_THRESH_KMPH))
-            on_fail()
+            on_fail("Speed exceeds {} km/s".format(scenario.stu_speed_thresh_kmph))
 
-        if ttc < MIN_TTC_SECS:
-            print("FAIL: Too close to coach car (TTC < {} s)".format(MIN_TTC_SECS))
-            on_fail()
+        if ttc < scenario.min_ttc_secs:
+            on_fail("Too close to coach car (TTC < {} s)".format(scenario.min_ttc_secs))
 
-        if lateral_offset > LATERAL_OFFSET_M:
-            print("FAIL: Lateral movement too large (< {} m)".format(LATERAL_OFFSET_M))
-            on_fail()
+        if lateral_offset > scenario.lateral_offset_m:
+            on_fail("Lateral movement too large (< {} m)".format(scenario.lateral_offset_m))
 
     ## Add a collision sensor on the student car
     cblu = world.get_blueprint_library().find("sensor.other.collision")
@@ -214,36 +320,42 @@ def main():
     lblu.set_attribute("channels", "32")
     lblu.set_attribute("points_per_second", "600000")
     lblu.set_attribute("rotation_frequency", "10")
-    lblu.set_attribute("range", str(LIDAR_RANGE_M))
+    lblu.set_attribute("range", str(scenario.lidar_range_m))
     lidar_sensor = world.spawn_actor(lblu, Transform(), attach_to=stu_car)
-    lidar_sensor.listen(lambda event: controller.on_sensor_data(event, stu_car))
+    lidar_sensor.listen(lambda event: on_sensor_data(event, stu_car))
 
     try:
         ## Skip 10 frames (~1s for 10fps)
         for _ in range(10):
-            world.tick()
+            clock.tick(world)
 
         ## Wait for the student car to start moving
+        since = clock.now()
         while True:
-            controller.step(stu_car)
-            world.tick()
+            step(stu_car)
+            clock.tick(world)
 
             vel = stu_car.get_velocity().length()
             if vel >= VELOCIDY_THRESH:
                 break
 
+            if clock.now() - since > scenario.timeout_s:
+                on_fail("Did not start within {} s".format(scenario.timeout_s))
+                return world, outcome
+
         ## Teachar car starts running
         tea_car.set_target_velocity(Vector3D(-teacher_speed_mps, 0, 0))
 
         ## start looping
-        since = time.time()
+        since = clock.now()
 
         while True:
-            controller.step(stu_car)
-            world.tick()
+            step(stu_car)
+            clock.tick(world)
+            outcome.ticks += 1
 
             ## Stick the spectator to the student car
-            if not args.no_follow_car:
+            if follow_car:
                 stu_trans = stu_car.get_transform()
                 spec_loc = Location(
                     stu_trans.location.x, stu_trans.location.y, SPEC_HEIGHT
@@ -258,7 +370,7 @@ def main():
 
             ## Run state transition
             if state == State.FORWARDING:
-                if tea_car.get_location().x < TEACHER_X_THRESH:
+                if tea_car.get_location().x < teacher_x_thresh:
                     stop_car(tea_car)
                     state = State.BRAKING
 
@@ -269,10 +381,7 @@ def main():
                     on_success()
 
             elif state == State.COLLISION:
-                stop_car(tea_car)
-                stop_car(stu_car)
-                print("FAIL: Collision occurred")
-                state = State.FINISH
+                on_fail("Collision occurred")
 
             elif state == State.FINISH:
                 break
@@ -280,16 +389,11 @@ def main():
             else:
                 assert False
 
-    except KeyboardInterrupt:
-        print("INTERRUPTED")
-        return
+    finally:
+        col_sensor.stop()
+        lidar_sensor.stop()
 
-    try:
-        ## loop forever
-        while True:
-            world.tick()
-    except KeyboardInterrupt:
-        pass
+    return world, outcome
 
 
 if __name__ == "__main__":
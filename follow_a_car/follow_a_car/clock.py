@@ -0,0 +1,37 @@
+from carla import World
+
+
+class SimClock(object):
+    """
+    Simulation time of an episode, taken from the world snapshot after
+    every tick. Timing with it instead of time.time() gives the same
+    result whether the server runs faster or slower than real time.
+    """
+
+    def __init__(self):
+        self.frame = 0
+        self._origin = 0.0
+        self._elapsed_seconds = 0.0
+
+    def reset(self, world: World):
+        """Start counting from the current time of the world."""
+        timestamp = world.get_snapshot().timestamp
+        self.frame = timestamp.frame
+        self._origin = timestamp.elapsed_seconds
+        self._elapsed_seconds = timestamp.elapsed_seconds
+
+    def tick(self, world: World) -> int:
+        """Advance the world by one step in synchronous mode and return its frame."""
+        world.tick()
+        timestamp = world.get_snapshot().timestamp
+        self.frame = timestamp.frame
+        self._elapsed_seconds = timestamp.elapsed_seconds
+        return self.frame
+
+    def now(self) -> float:
+        """Simulation seconds since the last reset()."""
+        return self._elapsed_seconds - self._origin
+
+
+# The clock of the episode being run, shared by the scenario and the controller
+clock = SimClock()
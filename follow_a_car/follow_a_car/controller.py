@@ -1,10 +1,18 @@
 from carla import Vector3D, CityObjectLabel
-import time
+from . import semantic_lidar
+from .clock import clock
 
 
-SINCE = time.time()
+## Simulation seconds since the episode started are given by clock.now()
+SINCE = 0.0
 BRAKE = False
 
+## Parameters of the controller, which `poetry run sweep` can set
+CRUISE_SPEED_KMPH = 16.0
+BRAKE_DISTANCE_M = 15.0
+BRAKE_AFTER_S = 10.0
+BRAKE_STRENGTH = 0.2
+
 
 def step(my_car):
     # control = my_car.get_control()
@@ -15,11 +23,11 @@ def step(my_car):
     # control.throttle = 1.0
     # control.brake = 1.0
     if not BRAKE:
-        my_car.set_target_velocity(Vector3D(-(16 * 10 / 36), 0, 0))
+        my_car.set_target_velocity(Vector3D(-(CRUISE_SPEED_KMPH * 10 / 36), 0, 0))
     else:
         control = my_car.get_control()
         control.throttle = 0.0
-        control.brake = 0.2
+        control.brake = BRAKE_STRENGTH
         my_car.apply_control(control)
 
     # my_car.apply_control(control)
@@ -39,16 +47,19 @@ def on_sensor_data(event, my_car):
     global BRAKE
     global SINCE
 
-    ## Find points casted on vehicles
-    vehicle_tag = int(CityObjectLabel.Car)
-    vehicle_points = filter(lambda det: det.object_tag == vehicle_tag, event)
+    ## Find points casted on vehicles. 'points' is a NumPy array with x, y,
+    ## z, cos_angle, object_idx and object_tag fields, see semantic_lidar.py.
+    points = semantic_lidar.decode(event)
+    vehicle_points = semantic_lidar.with_tag(points, int(CityObjectLabel.Car))
 
     ## TODO
     ## Find the distance to the coach car using LiDAR points. You may check this.
     ## https://carla.readthedocs.io/en/latest/python_api/#carla.SemanticLidarDetection
-    dists = map(lambda pt: pt.point.length(), vehicle_points)
-    dist = max(dists)
+    dist = semantic_lidar.max_range(vehicle_points)
+    if dist is None:
+        ## No vehicle is seen
+        return
 
-    elapsed_s = time.time() - SINCE
-    if dist < 15 and elapsed_s > 10:
+    elapsed_s = clock.now() - SINCE
+    if dist < BRAKE_DISTANCE_M and elapsed_s > BRAKE_AFTER_S:
         BRAKE = True
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+import numpy as np
+
+# What to do when a hook runs longer than its budget
+POLICIES = ("off", "warn", "penalize")
+
+# Fraction of the calls of a hook that may overrun its budget before they
+# are penalized, i.e. the 99th percentile must be within the budget.
+OVERRUN_ALLOWANCE = 0.01
+
+# Number of the latest calls of each hook kept for its percentiles
+WINDOW = 4096
+
+
+class HookLatency(object):
+    """
+    Counters of the calls of one hook over the whole run, and the durations
+    of its latest WINDOW calls in a ring, so that memory stays bounded on
+    long runs.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.overruns = 0
+        self.max = 0.0
+        self.durations = np.empty(WINDOW)
+
+    def add(self, duration_ms: float, overrun: bool):
+        self.durations[self.calls % WINDOW] = duration_ms
+        self.calls += 1
+        self.overruns += overrun
+        self.max = max(self.max, duration_ms)
+
+    def latest(self) -> np.ndarray:
+        return self.durations[: min(self.calls, WINDOW)]
+
+
+class LatencyMonitor(object):
+    """
+    Wall-clock latency of each call to the hooks of an agent, e.g. its step
+    and sensor callbacks, checked against a budget per hook in
+    milliseconds. Hooks without a budget are timed but never overrun.
+
+    The first overrun of each hook is logged as a warning. With the
+    penalize policy, every overrun beyond OVERRUN_ALLOWANCE of the calls of
+    a hook costs `penalty_per_overrun` points, see penalty(). With the off
+    policy, wrap() returns the hooks as they are and nothing is timed.
+
+    Calls and overruns are counted over the whole run, while p50 and p99
+    are taken over the latest WINDOW calls of each hook.
+    """
+
+    def __init__(
+        self,
+        budgets: Dict[str, float],
+        policy: str = "warn",
+        penalty_per_overrun: float = 0.0,
+    ):
+        assert policy in POLICIES
+        self.budgets = budgets
+        self.policy = policy
+        self.penalty_per_overrun = penalty_per_overrun
+        self._hooks: Dict[str, HookLatency] = dict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy != "off"
+
+    @contextmanager
+    def measure(self, hook: str) -> Iterator[None]:
+        since = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(hook, 1000.0 * (time.perf_counter() - since))
+
+    def wrap(self, hook: str, function: Callable) -> Callable:
+        """Return a function that calls `function` and records its latency."""
+        if not self.enabled:
+            return function
+
+        def timed(*args, **kwargs):
+            with self.measure(hook):
+                return function(*args, **kwargs)
+
+        return timed
+
+    def record(self, hook: str, duration_ms: float):
+        budget = self.budgets.get(hook)
+        overrun = budget is not None and duration_ms > budget
+
+        # Sensor callbacks are called on the threads of the client.
+        with self._lock:
+            latency = self._hooks.get(hook)
+            if latency is None:
+                latency = self._hooks[hook] = HookLatency()
+            latency.add(duration_ms, overrun)
+            count = latency.overruns
+
+        if overrun and count == 1:
+            logging.warning(
+                "%s took %.2f ms, over its budget of %.2f ms; further overruns are counted",
+                hook,
+                duration_ms,
+                budget,
+            )
+
+    def calls(self, hook: str) -> int:
+        latency = self._hooks.get(hook)
+        return 0 if latency is None else latency.calls
+
+    def overruns(self, hook: str) -> int:
+        latency = self._hooks.get(hook)
+        return 0 if latency is None else latency.overruns
+
+    def excess_overruns(self, hook: str) -> int:
+        """Overruns of a hook beyond its allowance."""
+        return max(0, self.overruns(hook) - int(OVERRUN_ALLOWANCE * self.calls(hook)))
+
+    def penalty(self) -> float:
+        """Points lost to overruns, which is zero unless the policy is penalize."""
+        if self.policy != "penalize":
+            return 0.0
+        excess = sum(self.excess_overruns(hook) for hook in list(self._hooks))
+        return excess * self.penalty_per_overrun
+
+    def summary(self) -> Dict[str, dict]:
+        """Calls, p50, p99 and max latency in ms and overruns of every timed hook."""
+        summary = dict()
+        with self._lock:
+            for hook, latency in self._hooks.items():
+                p50, p99 = np.percentile(latency.latest(), [50, 99])
+                summary[hook] = dict(
+                    calls=latency.calls,
+                    p50=p50,
+                    p99=p99,
+                    max=latency.max,
+                    budget=self.budgets.get(hook),
+                    overruns=latency.overruns,
+                )
+        return summary
+
+    def report(self) -> str:
+        lines = [
+            "%-16s %8s %9s %9s %9s %9s %9s"
+            % ("hook", "calls", "p50 ms", "p99 ms", "max ms", "budget", "overruns")
+        ]
+        for hook, row in self.summary().items():
+            budget = "-" if row["budget"] is None else "%g" % row["budget"]
+            lines.append(
+                "%-16s %8d %9.2f %9.2f %9.2f %9s %9d"
+                % (hook, row["calls"], row["p50"], row["p99"], row["max"], budget, row["overruns"])
+            )
+        penalty = self.penalty()
+        if penalty > 0:
+            lines.append("Latency penalty: %.2f" % penalty)
+        return "\n".join(lines)
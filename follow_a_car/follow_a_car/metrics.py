@@ -0,0 +1,44 @@
+from typing import Tuple
+
+import numpy as np
+
+# Columns recorded on every tick of an episode
+FIELDS: Tuple[str, ...] = ("t", "speed_kmph", "ttc", "lateral_offset", "distance", "acceleration")
+
+
+class MetricsBuffer(object):
+    """
+    The metrics of every tick of an episode, kept in memory in a
+    preallocated array that doubles in size when it is full, and written to
+    a file once at the end of the episode.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.empty((capacity, len(FIELDS)), dtype=np.float64)
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, *values: float):
+        if self._len == len(self._data):
+            data = np.empty((2 * len(self._data), len(FIELDS)), dtype=np.float64)
+            data[: self._len] = self._data
+            self._data = data
+        self._data[self._len] = values
+        self._len += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a view of the values of a field, from the first tick to the last."""
+        return self._data[: self._len, FIELDS.index(name)]
+
+    def save(self, path: str):
+        """Write the metrics as CSV."""
+        np.savetxt(
+            path,
+            self._data[: self._len],
+            fmt="%.6g",
+            delimiter=",",
+            header=",".join(FIELDS),
+            comments="",
+        )
@@ -0,0 +1,71 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from carla import SemanticLidarMeasurement
+
+# Layout of a carla.SemanticLidarDetection in SemanticLidarMeasurement.raw_data
+SEMANTIC_LIDAR_DTYPE = np.dtype(
+    [
+        ("x", np.float32),
+        ("y", np.float32),
+        ("z", np.float32),
+        ("cos_angle", np.float32),
+        ("object_idx", np.uint32),
+        ("object_tag", np.uint32),
+    ]
+)
+
+
+def decode(measurement: SemanticLidarMeasurement) -> np.ndarray:
+    """
+    Return the detections of a measurement as a structured array with the
+    fields of SEMANTIC_LIDAR_DTYPE. It is a read-only view of the raw data
+    without copying it, so it is only valid in the sensor callback.
+    """
+    return np.frombuffer(measurement.raw_data, dtype=SEMANTIC_LIDAR_DTYPE)
+
+
+def with_tag(points: np.ndarray, tag: int) -> np.ndarray:
+    """Return the points on objects of a semantic tag, e.g. int(CityObjectLabel.Car)."""
+    return points[points["object_tag"] == tag]
+
+
+def ranges(points: np.ndarray) -> np.ndarray:
+    """Distances of the points from the sensor."""
+    x = points["x"]
+    y = points["y"]
+    z = points["z"]
+    return np.sqrt(x * x + y * y + z * z)
+
+
+def min_range(points: np.ndarray) -> Optional[float]:
+    """Distance of the nearest point, or None if there are no points."""
+    if len(points) == 0:
+        return None
+    return float(ranges(points).min())
+
+
+def max_range(points: np.ndarray) -> Optional[float]:
+    """Distance of the farthest point, or None if there are no points."""
+    if len(points) == 0:
+        return None
+    return float(ranges(points).max())
+
+
+def nearest_per_object(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the ids of the objects hit by the points, in increasing order,
+    and the distance of the nearest point on each. Both are empty if there
+    are no points.
+    """
+    object_idx = points["object_idx"]
+    order = np.argsort(object_idx, kind="stable")
+    object_idx = object_idx[order]
+    distances = ranges(points)[order]
+
+    if len(points) == 0:
+        return object_idx, distances
+
+    # Reduce the runs of points of the same object.
+    starts = np.flatnonzero(np.r_[True, object_idx[1:] != object_idx[:-1]])
+    return object_idx[starts], np.minimum.reduceat(distances, starts)
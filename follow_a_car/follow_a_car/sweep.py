@@ -0,0 +1,251 @@
+"""
+Run follow_a_car episodes over a grid of scenario and controller
+parameters in parallel, and collect their scores in one table.
+
+A grid is given as NAME=VALUE,VALUE,... options. NAME is a field of
+Scenario, e.g. teacher_speed_kmph, or a parameter of the controller
+module, e.g. controller.BRAKE_DISTANCE_M. Every combination of values
+is run once, each in a fresh worker process on a server of the pool.
+The per-tick metrics of an episode are written once it ends.
+"""
+
+import argparse
+import csv
+import importlib
+import itertools
+import logging
+import multiprocessing
+import time
+import traceback
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from carla import Client
+
+from . import Scenario, controller, run_episode
+from .latency import LatencyMonitor
+from .metrics import MetricsBuffer
+
+CONTROLLER_PREFIX = "controller."
+
+
+@dataclass
+class Episode:
+    index: int
+    params: Dict[str, float]
+    metrics_dir: Optional[str] = None
+
+
+@dataclass
+class Row:
+    index: int
+    params: Dict[str, float]
+    server: str = ""
+    final_score: float = 0.0
+    ttc_score: float = 0.0
+    dist_score: float = 0.0
+    mean_ttc: float = 0.0
+    dist: float = float("nan")
+    failure: str = ""
+    ticks: int = 0
+    wall_seconds: float = 0.0
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[float]]:
+    scenario_fields = set(field.name for field in fields(Scenario))
+    grid = dict()
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name.startswith(CONTROLLER_PREFIX):
+            if not hasattr(controller, name[len(CONTROLLER_PREFIX) :]):
+                raise ValueError("the controller has no parameter %s" % name)
+        elif name not in scenario_fields:
+            raise ValueError(
+                "unknown parameter %s, expect one of %s or controller.NAME"
+                % (name, ", ".join(sorted(scenario_fields)))
+            )
+        grid[name] = [float(value) for value in values.split(",")]
+    return grid
+
+
+def run(episode: Episode, host: str, port: int) -> Row:
+    row = Row(episode.index, episode.params, "%s:%d" % (host, port))
+
+    # Start from the controller as it is in its file, then set its parameters.
+    importlib.reload(controller)
+    scenario = Scenario()
+    for name, value in episode.params.items():
+        if name.startswith(CONTROLLER_PREFIX):
+            setattr(controller, name[len(CONTROLLER_PREFIX) :], value)
+        else:
+            scenario = replace(scenario, **{name: value})
+
+    client = Client(host, port)
+    client.set_timeout(60.0)
+    metrics = MetricsBuffer()
+    since = time.perf_counter()
+    world, outcome = run_episode(
+        client, scenario, LatencyMonitor(dict(), "off"), follow_car=False, metrics=metrics
+    )
+    row.wall_seconds = time.perf_counter() - since
+
+    # Leave the server in asynchronous mode for the next client.
+    settings = world.get_settings()
+    settings.synchronous_mode = False
+    settings.fixed_delta_seconds = None
+    world.apply_settings(settings)
+
+    if episode.metrics_dir is not None:
+        metrics.save(str(Path(episode.metrics_dir) / ("episode_%04d.csv" % episode.index)))
+
+    row.final_score = outcome.final_score
+    row.ttc_score = outcome.ttc_score
+    row.dist_score = outcome.dist_score
+    row.mean_ttc = outcome.mean_ttc
+    row.dist = outcome.dist
+    row.failure = outcome.failure
+    row.ticks = outcome.ticks
+    return row
+
+
+# Servers that are not running an episode, set in every worker process
+_servers = None
+
+
+def _init_worker(servers):
+    global _servers
+    _servers = servers
+
+
+def _run_episode(episode: Episode) -> Row:
+    host, port = _servers.get()
+    try:
+        return run(episode, host, port)
+    except Exception as error:
+        logging.debug(traceback.format_exc())
+        return Row(episode.index, episode.params, "%s:%d" % (host, port), failure=repr(error))
+    finally:
+        _servers.put((host, port))
+
+
+def sweep(episodes: List[Episode], servers: List[Tuple[str, int]], processes: int) -> List[Row]:
+    # Workers are forked so that they use the carla module of this process,
+    # e.g. fake_carla. Each one runs a single episode, so that the state of
+    # the controller module does not leak into the next one.
+    context = multiprocessing.get_context("fork")
+    free_servers = context.Queue()
+    for index in range(processes):
+        free_servers.put(servers[index % len(servers)])
+
+    rows = list()
+    with context.Pool(processes, _init_worker, (free_servers,), maxtasksperchild=1) as pool:
+        for row in pool.imap_unordered(_run_episode, episodes):
+            logging.info(
+                "episode %d %s: %s",
+                row.index,
+                row.params,
+                row.failure or "score %.1f" % row.final_score,
+            )
+            rows.append(row)
+
+    rows.sort(key=lambda row: row.index)
+    return rows
+
+
+def format_table(names: List[str], rows: List[Row]) -> str:
+    header = ["%4s" % "#"] + ["%*s" % (max(8, len(name)), name) for name in names]
+    header += ["%7s %5s %5s %8s %6s %6s  %s" % ("score", "ttc", "dist", "mean_ttc", "gap m", "ticks", "failure")]
+    lines = [" ".join(header)]
+    for row in rows:
+        line = ["%4d" % row.index]
+        line += ["%*g" % (max(8, len(name)), row.params[name]) for name in names]
+        line += [
+            "%7.1f %5.0f %5.0f %8.2f %6.2f %6d  %s"
+            % (
+                row.final_score,
+                row.ttc_score,
+                row.dist_score,
+                row.mean_ttc,
+                row.dist,
+                row.ticks,
+                row.failure,
+            )
+        ]
+        lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+def write_csv(path: str, names: List[str], rows: List[Row]):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        columns = [key for key in asdict(rows[0]) if key != "params"]
+        writer.writerow(names + columns)
+        for row in rows:
+            values = asdict(row)
+            writer.writerow([row.params[name] for name in names] + [values[key] for key in columns])
+
+
+def parse_server(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return (host or "localhost", int(port))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument(
+        "grid",
+        nargs="*",
+        metavar="NAME=VALUES",
+        help="values of a parameter separated by commas, e.g. controller.BRAKE_DISTANCE_M=12,15",
+    )
+    argparser.add_argument(
+        "--server",
+        dest="servers",
+        metavar="HOST:PORT",
+        action="append",
+        type=parse_server,
+        help="CARLA server to run on, repeated for a pool of servers (default: localhost:2000)",
+    )
+    argparser.add_argument(
+        "-j",
+        "--jobs",
+        default=None,
+        type=int,
+        help="episodes in parallel (default: one per server). "
+        "Only fake_carla can run more than one per server.",
+    )
+    argparser.add_argument(
+        "-o",
+        "--output-dir",
+        metavar="DIR",
+        help="save the results and the metrics of every episode in this directory",
+    )
+    argparser.add_argument("-v", "--verbose", action="store_true", dest="debug")
+    args = argparser.parse_args()
+
+    log_level = logging.DEBUG if args.debug else logging.INFO
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=log_level)
+
+    grid = parse_grid(args.grid)
+    names = list(grid)
+    metrics_dir = None
+    if args.output_dir is not None:
+        Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        metrics_dir = args.output_dir
+
+    episodes = [
+        Episode(index, dict(zip(names, values)), metrics_dir)
+        for index, values in enumerate(itertools.product(*grid.values()))
+    ]
+    servers = args.servers or [("localhost", 2000)]
+    processes = min(args.jobs or len(servers), len(episodes))
+    rows = sweep(episodes, servers, processes)
+
+    print(format_table(names, rows))
+    if args.output_dir is not None:
+        write_csv(str(Path(args.output_dir) / "results.csv"), names, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -55,7 +55,13 @@ Use ARROWS or WASD keys for control.
 """
 
 
-from .main import main
+def main():
+    # Imported on call, so that the processes of the agents, which are
+    # spawned and import this package, do not import carla and pygame.
+    from .main import main
+
+    main()
+
 
 if __name__ == "__main__":
     main()
@@ -1,2 +1,4 @@
 from .ta import TaAgent
 from .student import StudentAgent
+from .remote import RemoteStudentAgent
+from .viewer import DebugViewer, debug_viewer
@@ -0,0 +1,330 @@
+import multiprocessing
+import queue
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from carla import (
+    Actor,
+    Location,
+    Rotation,
+    Transform,
+    Vector3D,
+    VehicleControl,
+    VehicleLightState,
+)
+
+from ..ipc import SharedRing, fake_backend, run_agent
+from ..latency import LatencyMonitor
+
+# Messages to the agent process. Frames are announced as
+# (stream, ring spec, slot, tag), steps as (STEP, actor state), and None
+# stops the process.
+CAMERA = "camera"
+LIDAR = "lidar"
+STEP = "step"
+
+# Point clouds vary in size, so their rings get room for 25% more points.
+GROWING_STREAMS = (LIDAR,)
+
+
+def _control_fields(control: VehicleControl) -> tuple:
+    return (
+        control.throttle,
+        control.steer,
+        control.brake,
+        control.hand_brake,
+        control.reverse,
+        control.manual_gear_shift,
+        control.gear,
+    )
+
+
+def _vehicle_control(fields: tuple) -> VehicleControl:
+    throttle, steer, brake, hand_brake, reverse, manual_gear_shift, gear = fields
+    return VehicleControl(
+        throttle=throttle,
+        steer=steer,
+        brake=brake,
+        hand_brake=hand_brake,
+        reverse=reverse,
+        manual_gear_shift=manual_gear_shift,
+        gear=gear,
+    )
+
+
+def _vector(vector) -> tuple:
+    return (vector.x, vector.y, vector.z)
+
+
+def actor_state(actor: Actor) -> tuple:
+    """The state of a vehicle that is passed to the agent process on each step."""
+    transform = actor.get_transform()
+    return (
+        actor.id,
+        _vector(transform.location),
+        (transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+        _vector(actor.get_velocity()),
+        _vector(actor.get_acceleration()),
+        _vector(actor.get_angular_velocity()),
+        _control_fields(actor.get_control()),
+        int(actor.get_light_state()),
+    )
+
+
+class RemoteVehicle(object):
+    """
+    The vehicle as the agent process sees it: the state of the vehicle when
+    the step was requested, with the getters of carla.Vehicle. The light
+    state set by the agent is sent back with its control and applied to the
+    vehicle by the simulation process.
+    """
+
+    def __init__(self, state: tuple):
+        (
+            self.id,
+            location,
+            rotation,
+            velocity,
+            acceleration,
+            angular_velocity,
+            control,
+            light_state,
+        ) = state
+        self._transform = Transform(Location(*location), Rotation(*rotation))
+        self._velocity = Vector3D(*velocity)
+        self._acceleration = Vector3D(*acceleration)
+        self._angular_velocity = Vector3D(*angular_velocity)
+        self._control = control
+        self._light_state = light_state
+        self.requested_light_state: Optional[int] = None
+
+    def get_transform(self) -> Transform:
+        return self._transform
+
+    def get_location(self) -> Location:
+        return self._transform.location
+
+    def get_velocity(self) -> Vector3D:
+        return self._velocity
+
+    def get_acceleration(self) -> Vector3D:
+        return self._acceleration
+
+    def get_angular_velocity(self) -> Vector3D:
+        return self._angular_velocity
+
+    def get_control(self) -> VehicleControl:
+        return _vehicle_control(self._control)
+
+    def get_light_state(self) -> VehicleLightState:
+        return VehicleLightState(self._light_state)
+
+    def set_light_state(self, light_state: VehicleLightState):
+        self._light_state = self.requested_light_state = int(light_state)
+
+
+class RemoteStudentAgent(object):
+    """
+    Run a StudentAgent in a separate process, so that its perception does
+    not compete with the game loop for the GIL. It has the interface of
+    StudentAgent and is passed to TaAgent in its place.
+
+    Camera frames and lidar sweeps are copied into shared memory ring slots
+    and announced on a queue. The agent process works on them in place, and
+    skips to the latest frame of each stream if it falls behind. A slot is
+    locked while it is read; if every slot of a stream is locked, the frame
+    is dropped and counted in `dropped`.
+
+    step() does not wait for the agent. It asks for a new control if none is
+    pending and returns the latest one received, or the current control of
+    the actor before the first one arrives. The agent process has no client
+    of its own: its step() gets an RemoteVehicle of the state of the actor,
+    and the lights it sets are applied here.
+
+    `viewer` is the handle of a DebugViewer to publish the images of the
+    agent to. The agent process times its own calls and sends the
+    durations back with each control. They are recorded in `latency`,
+    which TaAgent sets to its monitor, since timing the calls of this proxy
+    would only time the queueing.
+    """
+
+    def __init__(self, slots: int = 4, viewer=None):
+        context = multiprocessing.get_context("spawn")
+        self.slots = slots
+        self.dropped = 0
+        self._requests = context.Queue()
+        self._controls = context.Queue()
+        self._locks = {
+            stream: [context.Lock() for _ in range(slots)] for stream in (CAMERA, LIDAR)
+        }
+        self._rings: Dict[str, SharedRing] = dict()
+        self._next_slot = {CAMERA: 0, LIDAR: 0}
+        self._tag = 0
+        self._control: Optional[tuple] = None
+        self._light_state: Optional[int] = None
+        self._step_pending = False
+        self.latency: Optional[LatencyMonitor] = None
+
+        # The process installs fake_carla itself if it is used here.
+        self._process = context.Process(
+            target=run_agent,
+            args=(fake_backend(), self._requests, self._controls, self._locks, viewer),
+            name="student-agent",
+            daemon=True,
+        )
+        self._process.start()
+        weakref.finalize(
+            self, RemoteStudentAgent._shutdown, self._process, self._requests, self._rings
+        )
+
+    def step(self, actor: Actor) -> VehicleControl:
+        if not self._process.is_alive():
+            raise RuntimeError(
+                "the agent process exited with code %s" % self._process.exitcode
+            )
+
+        if not self._step_pending:
+            self._requests.put((STEP, actor_state(actor)))
+            self._step_pending = True
+
+        try:
+            while True:
+                self._control, light_state, durations = self._controls.get_nowait()
+                self._step_pending = False
+                if light_state is not None and light_state != self._light_state:
+                    actor.set_light_state(VehicleLightState(light_state))
+                    self._light_state = light_state
+                if self.latency is not None and self.latency.enabled:
+                    for hook, duration_ms in durations:
+                        self.latency.record(hook, duration_ms)
+        except queue.Empty:
+            pass
+
+        if self._control is None:
+            return actor.get_control()
+        return _vehicle_control(self._control)
+
+    def on_lidar_data(self, points: np.ndarray):
+        self._send(LIDAR, points)
+
+    def on_camera_data(self, image: np.ndarray):
+        self._send(CAMERA, image)
+
+    def _send(self, stream: str, frame: np.ndarray):
+        rows = len(frame)
+        ring = self._rings.get(stream)
+        if (
+            ring is None
+            or ring.dtype != frame.dtype
+            or ring.shape[1:] != frame.shape[1:]
+            or ring.shape[0] < rows
+            or (ring.shape[0] != rows and stream not in GROWING_STREAMS)
+        ):
+            capacity = int(1.25 * rows) if stream in GROWING_STREAMS else rows
+            if ring is not None:
+                # Frames of the old ring that are still queued are dropped by
+                # the agent process once the ring is unlinked.
+                ring.close(unlink=True)
+            ring = SharedRing((capacity,) + frame.shape[1:], frame.dtype, self.slots)
+            self._rings[stream] = ring
+
+        # Take the next slot that is not being read.
+        locks = self._locks[stream]
+        for _ in range(self.slots):
+            slot = self._next_slot[stream]
+            self._next_slot[stream] = (slot + 1) % self.slots
+            if locks[slot].acquire(block=False):
+                break
+        else:
+            self.dropped += 1
+            return
+
+        self._tag += 1
+        try:
+            ring.frames[slot, :rows] = frame
+            ring.header[slot] = (self._tag, rows)
+        finally:
+            locks[slot].release()
+        self._requests.put((stream, ring.spec, slot, self._tag))
+
+    @staticmethod
+    def _shutdown(process, requests, rings: Dict[str, SharedRing]):
+        if process.is_alive():
+            requests.put(None)
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        for ring in rings.values():
+            ring.close(unlink=True)
+
+
+def serve(requests, controls, locks: Dict[str, List], viewer):
+    """Run the agent in the agent process, see run_agent()."""
+    from .student import StudentAgent
+    from .viewer import debug_viewer
+
+    if viewer is not None:
+        debug_viewer.attach(viewer)
+    agent = StudentAgent()
+    callbacks = {CAMERA: agent.on_camera_data, LIDAR: agent.on_lidar_data}
+    hooks = {CAMERA: "on_camera_data", LIDAR: "on_lidar_data"}
+    # (hook, ms) of the calls since the last control
+    durations: List[Tuple[str, float]] = list()
+    rings: Dict[str, SharedRing] = dict()
+
+    try:
+        while True:
+            messages = [requests.get()]
+            try:
+                while True:
+                    messages.append(requests.get_nowait())
+            except queue.Empty:
+                pass
+
+            # Keep the latest frame of each stream.
+            frames = dict()
+            state = None
+            for message in messages:
+                if message is None:
+                    return
+                elif message[0] == STEP:
+                    state = message[1]
+                else:
+                    frames[message[0]] = message
+
+            for stream, spec, slot, tag in frames.values():
+                ring = rings.get(stream)
+                if ring is None or ring.name != spec[0]:
+                    if ring is not None:
+                        rings.pop(stream).close()
+                    try:
+                        ring = SharedRing.attach(spec)
+                    except FileNotFoundError:
+                        # Replaced and freed before it was attached.
+                        continue
+                    rings[stream] = ring
+                with locks[stream][slot]:
+                    slot_tag, rows = ring.header[slot]
+                    # The slot may hold a newer frame, which is announced later.
+                    if slot_tag == tag:
+                        since = time.perf_counter()
+                        callbacks[stream](ring.frames[slot, :rows])
+                        durations.append(
+                            (hooks[stream], 1000.0 * (time.perf_counter() - since))
+                        )
+
+            if state is not None:
+                actor = RemoteVehicle(state)
+                since = time.perf_counter()
+                control = agent.step(actor)
+                durations.append(("step", 1000.0 * (time.perf_counter() - since)))
+                controls.put(
+                    (_control_fields(control), actor.requested_light_state, durations)
+                )
+                durations = list()
+    finally:
+        for ring in rings.values():
+            ring.close()
+        debug_viewer.stop()
@@ -2,30 +2,34 @@ from carla import Actor, Image, VehicleControl, VehicleLightState
 import numpy as np
 import cv2 as cv
 import colorsys
+from .viewer import debug_viewer
+from ..lidar_obstacles import LidarObstaclePipeline, Obstacles
 
 
 class StudentAgent:
     camera_image = None
     lidar_image = None
+    obstacles: Obstacles = None
 
     def __init__(self):
         ## TODO
-        pass
+        ## The pipeline finds obstacles in the point clouds. The ground
+        ## plane is fitted on every point cloud, since the road is sloped.
+        self.obstacle_pipeline = LidarObstaclePipeline(ground="ransac")
 
     def step(self, actor: Actor) -> VehicleControl:
         ## TODO
         actor.set_light_state(VehicleLightState.HighBeam)
         control = actor.get_control()
 
-        ## To draw an image using OpenCV, please call imshow() in step().
-        ## Do not imshow() in on_xxx_data(). It freezes the program!
+        ## To draw an image, please call debug_viewer.show() instead of
+        ## cv.imshow(). The image is drawn in another process, so that the
+        ## simulation does not wait for it.
         if self.camera_image is not None:
-            cv.imshow("camera", self.camera_image)
+            debug_viewer.show("camera", self.camera_image)
 
         if self.lidar_image is not None:
-            cv.imshow("lidar", self.lidar_image)
-
-        cv.waitKey(1)
+            debug_viewer.show("lidar", self.lidar_image)
 
         return control
 
@@ -33,6 +37,11 @@ class StudentAgent:
         ## TODO
         ## 'points' is an Nx4 array with x, y, z, intensity columns
 
+        ## Centroids, extents and distances of the clusters of points above
+        ## the ground. It takes about 10 ms of the budget of this callback,
+        ## so only uncomment it once step() uses the obstacles.
+        # self.obstacles = self.obstacle_pipeline(points)
+
         lidar_range = 50.0
         ih = 600
         iw = 800
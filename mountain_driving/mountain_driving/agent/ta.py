@@ -1,38 +1,65 @@
 from carla import Actor, Image, VehicleControl, VehicleLightState
 import numpy as np
+from .remote import RemoteStudentAgent
 from .student import StudentAgent
 from ..ui import HUD
-from ..utils import get_actor_display_name
+from ..utils import CollisionHistory, get_actor_display_name
 import math
-from collections import defaultdict
+from typing import Optional
 from ..state import State
+from ..latency import LatencyMonitor
 
 
 class TaAgent:
     student_agent = None
     hud = None
-    collision_history = list()
+    collision_history: CollisionHistory = None
     state: State = None
 
-    def __init__(self, state: State, hud: HUD):
-        self.student_agent = StudentAgent()
+    def __init__(
+        self,
+        state: State,
+        hud: HUD,
+        student_agent: Optional[StudentAgent] = None,
+        latency: Optional[LatencyMonitor] = None,
+    ):
+        # The student agent may be replaced by a proxy with the same interface,
+        # e.g. a RemoteStudentAgent.
+        self.student_agent = student_agent if student_agent is not None else StudentAgent()
         self.hud = hud
         self.state = state
+        self.collision_history = CollisionHistory()
 
-    def get_collision_history(self):
-        history = defaultdict(int)
-        for frame, intensity in self.collision_history:
-            history[frame] += intensity
-        return history
+        # Time the calls to the student agent against their budgets.
+        self.latency = latency if latency is not None else LatencyMonitor(dict(), "off")
+        if isinstance(self.student_agent, RemoteStudentAgent):
+            # The proxy only queues the calls, so the agent process times them.
+            self.student_agent.latency = self.latency
+            self._step = self.student_agent.step
+            self._on_lidar_data = self.student_agent.on_lidar_data
+            self._on_camera_data = self.student_agent.on_camera_data
+        else:
+            self._step = self.latency.wrap("step", self.student_agent.step)
+            self._on_lidar_data = self.latency.wrap(
+                "on_lidar_data", self.student_agent.on_lidar_data
+            )
+            self._on_camera_data = self.latency.wrap(
+                "on_camera_data", self.student_agent.on_camera_data
+            )
+
+    def get_collision_history(self) -> CollisionHistory:
+        return self.collision_history
 
     def step(self, actor: Actor) -> VehicleControl:
-        return self.student_agent.step(actor)
+        control = self._step(actor)
+        self.state.latency_penalty = self.latency.penalty()
+        return control
 
     def on_lidar_data(self, points: np.ndarray):
-        self.student_agent.on_lidar_data(points)
+        self._on_lidar_data(points)
 
     def on_camera_data(self, image: np.ndarray):
-        self.student_agent.on_camera_data(image)
+        self._on_camera_data(image)
 
     def on_collision(self, event):
         self.state.collision = True
@@ -41,9 +68,7 @@ class TaAgent:
         self.hud.notification("Collision with %r" % actor_type)
         impulse = event.normal_impulse
         intensity = math.sqrt(impulse.x**2 + impulse.y**2 + impulse.z**2)
-        self.collision_history.append((event.frame, intensity))
-        if len(self.collision_history) > 4000:
-            self.history.pop(0)
+        self.collision_history.add(event.frame, intensity)
 
     def on_lane_invasion(self, event):
         self.state.lane_invasion_count += 1
@@ -0,0 +1,106 @@
+import logging
+import multiprocessing
+from typing import Dict
+
+import numpy as np
+
+from ..ipc import SharedRing, view
+
+# Slots per image name. The viewer reads the latest complete one while the
+# next one is written.
+VIEWER_SLOTS = 3
+
+
+class DebugViewer(object):
+    """
+    Show images published by agents in OpenCV windows of a separate process,
+    so that drawing them never waits for the window manager.
+
+    Agents call `debug_viewer.show(name, image)` in place of `cv.imshow`. If
+    no viewer is attached, show() returns at once without copying the image.
+    Otherwise the image is copied into a shared memory ring of its name, and
+    the viewer process shows the latest complete image of each name at its
+    own rate. Images published in between are never shown.
+    """
+
+    def __init__(self):
+        self._announcements = None
+        self._process = None
+        self._rings: Dict[str, SharedRing] = dict()
+        self._next_slot: Dict[str, int] = dict()
+        self._tag = 0
+
+    @property
+    def attached(self) -> bool:
+        return self._announcements is not None
+
+    def start(self, rate: float = 30.0):
+        """
+        Start the viewer process and attach to it. It runs view() of
+        mountain_driving.ipc, which only imports numpy and cv2.
+        """
+        context = multiprocessing.get_context("spawn")
+        announcements = context.Queue()
+        self._process = context.Process(
+            target=view, args=(announcements, rate), name="debug-viewer", daemon=True
+        )
+        self._process.start()
+        self.attach(announcements)
+
+    def attach(self, announcements):
+        """
+        Publish to the viewer of another process, e.g. from the agent process
+        of a RemoteStudentAgent. `announcements` is the `handle` of the
+        viewer that started it.
+        """
+        self._announcements = announcements
+
+    @property
+    def handle(self):
+        return self._announcements
+
+    def stop(self):
+        """Detach from the viewer, stop it if it was started here and free the rings."""
+        if self._process is not None:
+            if self._process.is_alive():
+                self._announcements.put(None)
+                self._process.join(timeout=5.0)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._process = None
+        self._announcements = None
+
+        for ring in self._rings.values():
+            ring.close(unlink=True)
+        self._rings.clear()
+
+    def show(self, name: str, image: np.ndarray):
+        if self._announcements is None:
+            return
+        if self._process is not None and not self._process.is_alive():
+            logging.warning("the debug viewer exited, images are no longer shown")
+            self.stop()
+            return
+
+        ring = self._rings.get(name)
+        if ring is None or ring.shape != image.shape or ring.dtype != image.dtype:
+            if ring is not None:
+                ring.close(unlink=True)
+            ring = SharedRing(image.shape, image.dtype, VIEWER_SLOTS)
+            self._rings[name] = ring
+            self._next_slot[name] = 0
+            self._announcements.put((name, ring.spec))
+
+        slot = self._next_slot[name]
+        self._next_slot[name] = (slot + 1) % VIEWER_SLOTS
+
+        # The tag is cleared while the slot is written, so that the viewer
+        # skips it.
+        self._tag += 1
+        ring.header[slot, 0] = -1
+        ring.frames[slot] = image
+        ring.header[slot] = (self._tag, len(image))
+
+
+# Images of the agents of this process are published here.
+debug_viewer = DebugViewer()
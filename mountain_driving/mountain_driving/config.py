@@ -20,6 +20,7 @@ AGENT_STOP_THERSHOLD = 1e-3
 CHECKPOINT_DISTANCE_THRESHOLD = 1.0
 EXCEED_LAST_CHECKPOINT_PENALTY = 5.0
 LANE_INVASION_PENALTY = 2.0
+LATENCY_OVERRUN_PENALTY = 0.1
 CHECKPOINTS: List[Checkpoint] = [
     Checkpoint(Location(60.64, -76.57, 5.51), 60.0),
     Checkpoint(Location(66.50, -110.84, 8.37), 70.0),
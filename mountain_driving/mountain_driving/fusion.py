@@ -0,0 +1,178 @@
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import cv2
+import numpy as np
+from carla import Transform
+
+# From the axes of CARLA (x forward, y right, z up) to the axes of a
+# pinhole camera (x right, y down, z forward)
+CARLA_TO_CAMERA = np.array(
+    [
+        [0.0, 1.0, 0.0, 0.0],
+        [0.0, 0.0, -1.0, 0.0],
+        [1.0, 0.0, 0.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0],
+    ]
+)
+
+
+@dataclass
+class ProjectedPoints:
+    """
+    The points of a point cloud that fall in a camera image, with their
+    (u, v) pixels, their depths along the optical axis and their rows in
+    the point cloud.
+    """
+
+    pixels: np.ndarray
+    depths: np.ndarray
+    indices: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.depths)
+
+
+def intrinsic_matrix(width: int, height: int, fov: float) -> np.ndarray:
+    """
+    Return the 3x3 intrinsic matrix of a CARLA camera with a horizontal
+    field of view of fov degrees. Its pixels are square and its principal
+    point is the image center.
+    """
+    focal = width / (2.0 * math.tan(math.radians(fov) / 2.0))
+    return np.array(
+        [
+            [focal, 0.0, width / 2.0],
+            [0.0, focal, height / 2.0],
+            [0.0, 0.0, 1.0],
+        ]
+    )
+
+
+def relative_matrix(source: Transform, target: Transform) -> np.ndarray:
+    """
+    Return the 4x4 matrix from the frame of a sensor mounted at source to
+    the frame of one mounted at target, where both are relative to the
+    same vehicle.
+    """
+    return np.array(target.get_inverse_matrix()) @ np.array(source.get_matrix())
+
+
+@lru_cache(maxsize=None)
+def depth_lut(colormap: int = cv2.COLORMAP_JET) -> np.ndarray:
+    """Return the 256 BGR colors of an OpenCV colormap, near points first."""
+    levels = np.arange(255, -1, -1, dtype=np.uint8)
+    return cv2.applyColorMap(levels, colormap).reshape(256, 3)
+
+
+class LidarCameraProjection(object):
+    """
+    Project the point clouds of a lidar into the image of a camera mounted
+    on the same vehicle. The intrinsic matrix and the lidar to camera
+    transform are combined once into a 3x4 projection, so that a whole
+    sweep is projected with a single matrix multiplication. Points closer
+    than min_depth in front of the camera, or behind it, are culled.
+
+    The depth image is kept between calls, and only the pixels hit by the
+    last sweep are cleared, so no call touches every pixel. The returned
+    depth image is overwritten by the next call; copy it to keep it.
+
+    ```python
+    projection = LidarCameraProjection.from_sensors(rgb_camera, lidar_sensor)
+    depth = projection.depth_image(points)
+    projection.overlay(image, points)
+    ```
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        fov: float,
+        lidar_transform: Transform,
+        camera_transform: Transform,
+        min_depth: float = 0.1,
+    ):
+        self.width = width
+        self.height = height
+        self.min_depth = min_depth
+        self.intrinsics = intrinsic_matrix(width, height, fov)
+        self.extrinsics = relative_matrix(lidar_transform, camera_transform)
+
+        projection = self.intrinsics @ (CARLA_TO_CAMERA @ self.extrinsics)[:3]
+        self._rotation = projection[:, :3].astype(np.float32)
+        self._translation = projection[:, 3:].astype(np.float32)
+
+        self._depth = np.zeros((height, width), dtype=np.float32)
+        self._touched = np.zeros(0, dtype=np.intp)
+
+    @classmethod
+    def from_sensors(cls, camera, lidar, **kwargs) -> "LidarCameraProjection":
+        """
+        Build the projection of a LidarSensor into an RgbCamera, from the
+        resolution and field of view of the camera and the mounting poses
+        of both.
+        """
+        attributes = camera.sensor.attributes
+        return cls(
+            int(attributes["image_size_x"]),
+            int(attributes["image_size_y"]),
+            float(attributes["fov"]),
+            lidar.transform,
+            camera.transform,
+            **kwargs,
+        )
+
+    def project(self, points: np.ndarray) -> ProjectedPoints:
+        """Project the Nx3 or Nx4 points of a lidar into the image."""
+        # Homogeneous pixels as 3xN rows, so that every step below works on
+        # contiguous rows rather than on rows of three values.
+        uvw = self._rotation @ points[:, :3].T
+        uvw += self._translation
+
+        indices = np.flatnonzero(uvw[2] > self.min_depth)
+        uvw = np.take(uvw, indices, axis=1)
+        depths = uvw[2]
+        np.divide(uvw[:2], depths, out=uvw[:2])
+        np.floor(uvw[:2], out=uvw[:2])
+
+        u, v = uvw[:2].astype(np.intp)
+        inside = (u >= 0) & (u < self.width) & (v >= 0) & (v < self.height)
+        pixels = np.stack((u[inside], v[inside]), axis=1)
+        return ProjectedPoints(pixels, depths[inside], indices[inside])
+
+    def depth_image(self, points: np.ndarray) -> np.ndarray:
+        """
+        Return an HxW float32 image with the depth of the nearest point of
+        every pixel hit by the points, and 0 elsewhere.
+        """
+        projected = self.project(points)
+        flat = self._depth.reshape(-1)
+        flat[self._touched] = 0.0
+
+        touched = projected.pixels[:, 1] * self.width + projected.pixels[:, 0]
+        flat[touched] = np.inf
+        np.minimum.at(flat, touched, projected.depths)
+        self._touched = touched
+        return self._depth
+
+    def overlay(
+        self,
+        image: np.ndarray,
+        points: np.ndarray,
+        max_depth: float = 50.0,
+        lut: Optional[np.ndarray] = None,
+    ) -> ProjectedPoints:
+        """
+        Draw the points into an HxWx3 BGR image in place, one pixel per
+        point, colored by depth up to max_depth with a table from
+        depth_lut(). Returns the projected points.
+        """
+        lut = lut if lut is not None else depth_lut()
+        projected = self.project(points)
+        levels = projected.depths * (255.0 / max_depth)
+        np.minimum(levels, 255.0, out=levels)
+        image[projected.pixels[:, 1], projected.pixels[:, 0]] = lut[levels.astype(np.uint8)]
+        return projected
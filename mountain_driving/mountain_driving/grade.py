@@ -0,0 +1,329 @@
+"""
+Grade agents on the mountain path without a window.
+
+Every agent is driven from INIT_TRANS through the CHECKPOINTS once per
+seed, and scored with compute_score as in the interactive game. Runs are
+distributed over a pool of CARLA servers, one run per server at a time,
+and the results are printed as a table and optionally saved as CSV.
+
+Agents are modules that define a StudentAgent class, given as a module
+name, e.g. mountain_driving.agent.student, or as the path of a copy of
+agent/student.py.
+"""
+
+import argparse
+import csv
+import importlib
+import importlib.util
+import logging
+import multiprocessing
+import random
+import re
+import time
+import traceback
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+import carla
+import numpy as np
+import pygame
+from pygame.time import Clock
+
+from .agent import TaAgent
+from .config import INIT_TRANS, LATENCY_OVERRUN_PENALTY, WORLD
+from .latency import POLICIES, LatencyMonitor
+from .loop import compute_score, tick
+from .state import State
+from .ui import HUD
+from .vehicle import Vehicle
+
+DELTA_SECONDS = 0.05
+
+# Size of the HUD, which is not shown but keeps the notifications of a run
+HUD_SIZE = (1280, 720)
+
+
+@dataclass
+class Job:
+    agent: str
+    seed: int
+    max_seconds: float
+    step_budget_ms: float
+    sensor_budget_ms: float
+    latency_policy: str
+
+
+@dataclass
+class Result:
+    agent: str
+    seed: int
+    server: str = ""
+    score: float = 0.0
+    checkpoints: int = 0
+    lane_invasions: int = 0
+    collision: bool = False
+    finished: bool = False
+    sim_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    step_p99_ms: float = float("nan")
+    latency_penalty: float = 0.0
+    error: str = ""
+
+
+def load_agent(agent: str):
+    """Return the StudentAgent class of an agent module or file."""
+    if agent.endswith(".py"):
+        # Load the file as a module of the agent package, so that it can
+        # import its neighbours as agent/student.py does.
+        path = Path(agent)
+        name = "%s.graded_%s" % (__package__ + ".agent", re.sub(r"\W", "_", path.stem))
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(agent)
+    return module.StudentAgent
+
+
+def run(job: Job, host: str, port: int) -> Result:
+    """Drive one agent through the checkpoints and score it."""
+    result = Result(job.agent, job.seed, "%s:%d" % (host, port))
+    random.seed(job.seed)
+    np.random.seed(job.seed)
+    if hasattr(carla, "configure"):
+        # fake_carla
+        carla.configure(seed=job.seed)
+
+    client = carla.Client(host, port)
+    client.set_timeout(60.0)
+    client.load_world(WORLD)
+    sim_world = client.get_world()
+    original_settings = sim_world.get_settings()
+    player = None
+
+    try:
+        settings = sim_world.get_settings()
+        settings.synchronous_mode = True
+        settings.fixed_delta_seconds = DELTA_SECONDS
+        sim_world.apply_settings(settings)
+
+        traffic_manager = client.get_trafficmanager()
+        traffic_manager.set_synchronous_mode(True)
+        traffic_manager.set_random_device_seed(job.seed)
+
+        hud = HUD(*HUD_SIZE)
+        hud.toggle_info()
+        state = State()
+        latency = LatencyMonitor(
+            {
+                "step": job.step_budget_ms,
+                "on_camera_data": job.sensor_budget_ms,
+                "on_lidar_data": job.sensor_budget_ms,
+            },
+            job.latency_policy,
+            LATENCY_OVERRUN_PENALTY,
+        )
+        agent = TaAgent(state, hud, load_agent(job.agent)(), latency)
+        player = Vehicle("hero", sim_world, hud, agent, spawn_point=INIT_TRANS, display=False)
+
+        sim_world.tick()
+        clock = Clock()
+        ticks = 0
+        since = time.perf_counter()
+        while not state.finished and ticks * DELTA_SECONDS < job.max_seconds:
+            sim_world.tick()
+            clock.tick()
+            tick(state, hud, player, sim_world, clock)
+            ticks += 1
+
+        result.wall_seconds = time.perf_counter() - since
+        result.sim_seconds = ticks * DELTA_SECONDS
+        result.score = compute_score(state)
+        result.checkpoints = state.checkpoint_index
+        result.lane_invasions = state.lane_invasion_count
+        result.collision = state.collision
+        result.finished = state.finished
+        result.latency_penalty = state.latency_penalty
+        step = latency.summary().get("step")
+        if step is not None:
+            result.step_p99_ms = step["p99"]
+
+    finally:
+        # Destroy the hero and its sensors before giving the server back.
+        player = None
+        sim_world.apply_settings(original_settings)
+
+    return result
+
+
+# Servers that are not running a job, set in every worker process
+_servers = None
+
+
+def _init_worker(servers):
+    global _servers
+    _servers = servers
+    pygame.init()
+    pygame.font.init()
+
+
+def _run_job(job: Job) -> Result:
+    host, port = _servers.get()
+    try:
+        return run(job, host, port)
+    except Exception as error:
+        logging.debug(traceback.format_exc())
+        return Result(job.agent, job.seed, "%s:%d" % (host, port), error=repr(error))
+    finally:
+        _servers.put((host, port))
+
+
+def grade(jobs: List[Job], servers: List[Tuple[str, int]], processes: int) -> List[Result]:
+    # Workers are forked so that they use the carla module of this process,
+    # e.g. fake_carla. Each one runs a single job, so that the agent modules
+    # and simulation objects of a run do not leak into the next one.
+    context = multiprocessing.get_context("fork")
+    free_servers = context.Queue()
+    for index in range(processes):
+        free_servers.put(servers[index % len(servers)])
+
+    results = list()
+    with context.Pool(processes, _init_worker, (free_servers,), maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(_run_job, jobs):
+            logging.info(
+                "%s seed %d: %s",
+                result.agent,
+                result.seed,
+                result.error or "score %.2f in %.1f s" % (result.score, result.wall_seconds),
+            )
+            results.append(result)
+
+    # Results arrive in the order the runs finish.
+    order = {(job.agent, job.seed): index for index, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[result.agent, result.seed])
+    return results
+
+
+def format_table(results: List[Result]) -> str:
+    lines = [
+        "%-32s %5s %7s %5s %6s %9s %8s %8s %8s %9s  %s"
+        % ("agent", "seed", "score", "ckpt", "lanes", "collision", "finished", "sim s", "wall s", "step p99", "error")
+    ]
+    for result in results:
+        lines.append(
+            "%-32s %5d %7.2f %5d %6d %9s %8s %8.1f %8.1f %9.2f  %s"
+            % (
+                result.agent[-32:],
+                result.seed,
+                result.score,
+                result.checkpoints,
+                result.lane_invasions,
+                "yes" if result.collision else "no",
+                "yes" if result.finished else "no",
+                result.sim_seconds,
+                result.wall_seconds,
+                result.step_p99_ms,
+                result.error,
+            )
+        )
+
+    agents = list(dict.fromkeys(result.agent for result in results))
+    if len(results) > len(agents):
+        lines += ["", "%-32s %5s %7s %7s %7s" % ("agent", "runs", "mean", "min", "max")]
+        for agent in agents:
+            scores = np.array([result.score for result in results if result.agent == agent])
+            lines.append(
+                "%-32s %5d %7.2f %7.2f %7.2f"
+                % (agent[-32:], len(scores), scores.mean(), scores.min(), scores.max())
+            )
+    return "\n".join(lines)
+
+
+def write_csv(path: str, results: List[Result]):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(asdict(results[0]).keys()))
+        writer.writeheader()
+        for result in results:
+            writer.writerow(asdict(result))
+
+
+def parse_server(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument(
+        "agents",
+        nargs="+",
+        metavar="AGENT",
+        help="agent module, e.g. mountain_driving.agent.student, or path of an agent file",
+    )
+    argparser.add_argument(
+        "--seeds",
+        metavar="N",
+        default=1,
+        type=int,
+        help="runs per agent, with seeds 0 to N-1 (default: 1)",
+    )
+    argparser.add_argument(
+        "--server",
+        dest="servers",
+        metavar="HOST:PORT",
+        action="append",
+        type=parse_server,
+        help="CARLA server to run on, repeated for a pool of servers (default: 127.0.0.1:2000)",
+    )
+    argparser.add_argument(
+        "-j",
+        "--jobs",
+        default=None,
+        type=int,
+        help="runs in parallel (default: one per server). "
+        "Only fake_carla can run more than one per server.",
+    )
+    argparser.add_argument(
+        "--max-seconds",
+        metavar="S",
+        default=300.0,
+        type=float,
+        help="simulation time limit of a run (default: 300)",
+    )
+    argparser.add_argument("--step-budget-ms", metavar="MS", default=10.0, type=float)
+    argparser.add_argument("--sensor-budget-ms", metavar="MS", default=25.0, type=float)
+    argparser.add_argument("--latency-policy", choices=POLICIES, default="warn")
+    argparser.add_argument("-o", "--output", metavar="CSV", help="save the results as CSV")
+    argparser.add_argument("-v", "--verbose", action="store_true", dest="debug")
+    args = argparser.parse_args()
+
+    log_level = logging.DEBUG if args.debug else logging.INFO
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=log_level)
+
+    servers = args.servers or [("127.0.0.1", 2000)]
+    processes = args.jobs or len(servers)
+    if processes > len(servers) and not hasattr(carla, "configure"):
+        logging.warning("running %d jobs on %d servers", processes, len(servers))
+
+    jobs = [
+        Job(
+            agent,
+            seed,
+            args.max_seconds,
+            args.step_budget_ms,
+            args.sensor_budget_ms,
+            args.latency_policy,
+        )
+        for agent in args.agents
+        for seed in range(args.seeds)
+    ]
+    results = grade(jobs, servers, min(processes, len(jobs)))
+
+    print(format_table(results))
+    if args.output:
+        write_csv(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import logging
+import queue
+import sys
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# The agent process and the debug viewer process are spawned, and load the
+# function they run from this module. Neither it nor the package __init__
+# may import carla or pygame: the viewer only needs cv2, and the parent may
+# run against fake_carla, which the agent process installs before carla is
+# imported.
+
+
+def fake_backend() -> bool:
+    """Whether `carla` is fake_carla in this process."""
+    carla = sys.modules.get("carla")
+    return carla is not None and carla.__name__ == "fake_carla"
+
+
+def run_agent(fake: bool, *args):
+    """Entry point of the process of a RemoteStudentAgent."""
+    if fake:
+        import fake_carla
+
+        fake_carla.install()
+    from .agent.remote import serve
+
+    serve(*args)
+
+
+class SharedRing(object):
+    """
+    Slots for frames of one shape and dtype in a shared memory block, so
+    that frames are passed to another process without pickling them. A
+    header holds the tag and the number of rows of the frame in each slot.
+    """
+
+    def __init__(
+        self, shape: Tuple[int, ...], dtype, slots: int, name: Optional[str] = None
+    ):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+
+        header_size = 2 * slots * np.dtype(np.int64).itemsize
+        frame_size = int(np.prod(self.shape)) * self.dtype.itemsize
+        if name is None:
+            self.shm = SharedMemory(create=True, size=header_size + slots * frame_size)
+        else:
+            self.shm = SharedMemory(name=name)
+
+        self.header = np.ndarray((slots, 2), np.int64, self.shm.buf)
+        self.frames = np.ndarray(
+            (slots,) + self.shape, self.dtype, self.shm.buf, offset=header_size
+        )
+        if name is None:
+            self.header[:] = -1
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def spec(self) -> tuple:
+        return (self.name, self.shape, self.dtype.str, self.slots)
+
+    @staticmethod
+    def attach(spec: tuple) -> "SharedRing":
+        name, shape, dtype, slots = spec
+        return SharedRing(shape, dtype, slots, name)
+
+    def close(self, unlink: bool = False):
+        del self.header
+        del self.frames
+        try:
+            self.shm.close()
+        except BufferError:
+            # A frame is still referenced, e.g. kept by the agent.
+            pass
+        if unlink:
+            self.shm.unlink()
+
+
+def read_latest(ring: SharedRing, last_tag: int) -> Optional[Tuple[int, np.ndarray]]:
+    """
+    Return the tag and a copy of the latest complete image in a ring if it
+    is newer than last_tag. A slot that is written during the copy is
+    skipped.
+    """
+    for slot in np.argsort(-ring.header[:, 0]):
+        tag = int(ring.header[slot, 0])
+        if tag <= last_tag:
+            return None
+        image = ring.frames[slot].copy()
+        if ring.header[slot, 0] == tag:
+            return tag, image
+    return None
+
+
+def view(announcements, rate: float):
+    """Entry point of the process of a DebugViewer."""
+    import cv2 as cv
+
+    rings: Dict[str, SharedRing] = dict()
+    tags: Dict[str, int] = dict()
+    period = 1.0 / rate
+
+    try:
+        while True:
+            deadline = time.monotonic() + period
+
+            try:
+                while True:
+                    message = announcements.get_nowait()
+                    if message is None:
+                        return
+                    name, spec = message
+                    if name in rings:
+                        rings.pop(name).close()
+                    try:
+                        rings[name] = SharedRing.attach(spec)
+                    except FileNotFoundError:
+                        # Replaced and freed before it was attached.
+                        continue
+                    tags[name] = 0
+            except queue.Empty:
+                pass
+
+            for name, ring in rings.items():
+                latest = read_latest(ring, tags[name])
+                if latest is not None:
+                    tags[name], image = latest
+                    cv.imshow(name, image)
+
+            cv.waitKey(max(1, int(1000 * (deadline - time.monotonic()))))
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        logging.exception("debug viewer failed")
+    finally:
+        for ring in rings.values():
+            ring.close()
+        try:
+            cv.destroyAllWindows()
+        except cv.error:
+            # OpenCV was built without windows, which failed above.
+            pass
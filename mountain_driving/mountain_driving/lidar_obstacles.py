@@ -0,0 +1,288 @@
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Integer voxel and grid coordinates are packed into one int64 key with
+# KEY_BITS bits per axis, offset so that negative coordinates fit.
+KEY_BITS = 21
+KEY_OFFSET = 1 << (KEY_BITS - 1)
+
+# Neighbors of a grid cell, without the cell itself
+_NEIGHBORS = np.array(
+    [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)],
+    dtype=np.int64,
+)
+
+
+@dataclass
+class Obstacles:
+    """
+    The clusters found in a point cloud, one row per cluster, in the frame
+    of the lidar. Extents are the half sizes of the axis-aligned bounding
+    boxes, as in carla.BoundingBox, and distances are the planar distances
+    of the nearest points of the clusters.
+    """
+
+    centroids: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), np.float32))
+    extents: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), np.float32))
+    distances: np.ndarray = field(default_factory=lambda: np.zeros(0, np.float32))
+    sizes: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int64))
+
+    def __len__(self) -> int:
+        return len(self.distances)
+
+    def nearest(self) -> Optional[int]:
+        """Index of the nearest cluster, or None if there are none."""
+        if len(self) == 0:
+            return None
+        return int(np.argmin(self.distances))
+
+
+def crop_roi(
+    points: np.ndarray,
+    x_range: Tuple[float, float],
+    y_range: Tuple[float, float],
+    z_range: Tuple[float, float],
+    ego_extent: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    Return the points in a box of the lidar frame. With ego_extent, the
+    points within (x, y) half sizes around the sensor, i.e. on the own
+    vehicle, are dropped as well.
+    """
+    x = points[:, 0]
+    y = points[:, 1]
+    z = points[:, 2]
+    keep = (x >= x_range[0]) & (x <= x_range[1])
+    keep &= (y >= y_range[0]) & (y <= y_range[1])
+    keep &= (z >= z_range[0]) & (z <= z_range[1])
+    if ego_extent is not None:
+        keep &= (np.abs(x) > ego_extent[0]) | (np.abs(y) > ego_extent[1])
+    return points[keep]
+
+
+def remove_ground_height(points: np.ndarray, ground_z: float, margin: float = 0.2) -> np.ndarray:
+    """Return the points higher than margin above a flat ground at ground_z."""
+    return points[points[:, 2] > ground_z + margin]
+
+
+def fit_ground_plane(
+    points: np.ndarray,
+    distance: float = 0.2,
+    iterations: int = 64,
+    max_tilt: float = 0.3,
+    samples: int = 2048,
+    rng: Optional[np.random.Generator] = None,
+) -> Optional[np.ndarray]:
+    """
+    Fit the ground plane (a, b, c, d) with a*x + b*y + c*z + d = 0 and a
+    unit normal pointing up by RANSAC. All candidate planes are built and
+    scored at once on a random subset of `samples` points. Planes whose
+    normal is tilted more than max_tilt radians from vertical, e.g. walls,
+    are rejected. Returns None if no plane is found.
+    """
+    if len(points) < 3:
+        return None
+    rng = rng if rng is not None else np.random.default_rng(0)
+    xyz = points[:, :3]
+    subset = xyz[rng.integers(0, len(xyz), min(samples, len(xyz)))]
+
+    # Three points per candidate plane
+    triples = xyz[rng.integers(0, len(xyz), (iterations, 3))]
+    normals = np.cross(triples[:, 1] - triples[:, 0], triples[:, 2] - triples[:, 0])
+    norms = np.linalg.norm(normals, axis=1)
+    valid = norms > 1e-6
+    normals = normals[valid] / norms[valid, None]
+    normals *= np.where(normals[:, 2] < 0.0, -1.0, 1.0)[:, None]
+    offsets = -np.einsum("ij,ij->i", normals, triples[valid, 0])
+
+    upright = normals[:, 2] >= np.cos(max_tilt)
+    normals = normals[upright]
+    offsets = offsets[upright]
+    if len(normals) == 0:
+        return None
+
+    # Inliers of every candidate on the subset, as a (planes, samples) matrix
+    residuals = np.abs(subset @ normals.T + offsets)
+    best = int(np.argmax((residuals <= distance).sum(axis=0)))
+    return np.append(normals[best], offsets[best])
+
+
+def remove_ground_ransac(points: np.ndarray, distance: float = 0.2, **kwargs) -> np.ndarray:
+    """
+    Return the points above the ground plane fitted by fit_ground_plane() by
+    more than distance. The points are returned unchanged if no plane is
+    found.
+    """
+    plane = fit_ground_plane(points, distance, **kwargs)
+    if plane is None:
+        return points
+    heights = points[:, :3] @ plane[:3] + plane[3]
+    return points[heights > distance]
+
+
+def _pack(cells: np.ndarray) -> np.ndarray:
+    """Pack the columns of integer coordinates into one int64 key per row."""
+    keys = np.zeros(len(cells), dtype=np.int64)
+    for axis in range(cells.shape[1]):
+        keys <<= KEY_BITS
+        keys |= cells[:, axis] + KEY_OFFSET
+    return keys
+
+
+def voxel_downsample(points: np.ndarray, voxel_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Replace the points in each voxel of a grid with voxel_size edges by
+    their mean. Returns the Mx3 (or MxC, for all columns of points) means
+    and the number of points of each voxel.
+    """
+    if len(points) == 0:
+        return points.copy(), np.zeros(0, dtype=np.int64)
+
+    cells = np.floor(points[:, :3] * (1.0 / voxel_size)).astype(np.int64)
+    _, inverse, counts = np.unique(_pack(cells), return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+
+    means = np.empty((len(counts), points.shape[1]), dtype=points.dtype)
+    for column in range(points.shape[1]):
+        means[:, column] = np.bincount(inverse, points[:, column], len(counts)) / counts
+    return means, counts
+
+
+def _components(keys: np.ndarray, stride: int) -> np.ndarray:
+    """
+    Label the connected components of occupied grid cells, given by their
+    sorted unique keys ix * stride + iy, where cells touching at an edge or
+    corner are connected. Labels are propagated along the links with
+    pointer jumping until they settle.
+    """
+    count = len(keys)
+    src = list()
+    dst = list()
+    for dx, dy in _NEIGHBORS:
+        neighbor = keys + (dx * stride + dy)
+        index = np.minimum(np.searchsorted(keys, neighbor), count - 1)
+        found = np.flatnonzero(keys[index] == neighbor)
+        src.append(found)
+        dst.append(index[found])
+    src = np.concatenate(src)
+    dst = np.concatenate(dst)
+
+    labels = np.arange(count)
+    while True:
+        previous = labels
+        labels = labels.copy()
+        np.minimum.at(labels, src, labels[dst])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Euclidean clustering on a planar grid with cells of tolerance size.
+    Points whose cells touch are in the same cluster, so points closer than
+    tolerance always are. Returns a cluster label from 0 for every point.
+    """
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    cells = np.floor(points[:, :2] * (1.0 / tolerance)).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    stride = int(cells[:, 1].max()) + 2
+    keys, inverse = np.unique(cells[:, 0] * stride + cells[:, 1], return_inverse=True)
+
+    roots = _components(keys, stride)
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels[inverse.ravel()]
+
+
+def describe_clusters(
+    points: np.ndarray,
+    labels: np.ndarray,
+    min_points: int = 1,
+    counts: Optional[np.ndarray] = None,
+) -> Obstacles:
+    """
+    Compute the centroid, extent and nearest planar distance of every
+    cluster with at least min_points points. If the points are voxels,
+    counts are the numbers of points in them, which weight the centroids
+    and are summed into the sizes of the clusters.
+    """
+    if len(points) == 0:
+        return Obstacles()
+
+    order = np.argsort(labels, kind="stable")
+    labels = labels[order]
+    xyz = points[order, :3]
+    weights = np.ones(len(xyz)) if counts is None else counts[order]
+
+    # Reduce the runs of points of the same cluster.
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    sizes = np.add.reduceat(weights, starts).astype(np.int64)
+    low = np.minimum.reduceat(xyz, starts, axis=0)
+    high = np.maximum.reduceat(xyz, starts, axis=0)
+    centroids = np.add.reduceat(xyz * weights[:, None], starts, axis=0) / sizes[:, None]
+    distances = np.minimum.reduceat(np.hypot(xyz[:, 0], xyz[:, 1]), starts)
+
+    keep = sizes >= min_points
+    return Obstacles(
+        centroids=centroids[keep].astype(np.float32),
+        extents=(0.5 * (high - low))[keep].astype(np.float32),
+        distances=distances[keep].astype(np.float32),
+        sizes=sizes[keep],
+    )
+
+
+class LidarObstaclePipeline(object):
+    """
+    Find obstacles in the Nx4 point clouds of a ray-cast lidar: crop a
+    region of interest, remove the ground, downsample to a voxel grid and
+    cluster the voxels. Coordinates are in the lidar frame, so ground_z is
+    minus the mounting height of the lidar for the height ground filter.
+    With ground="ransac", the ground plane is fitted on every point cloud
+    instead, e.g. on slopes.
+
+    ```python
+    pipeline = LidarObstaclePipeline(ground_z=-1.7)
+    obstacles = pipeline(points)
+    ```
+    """
+
+    def __init__(
+        self,
+        x_range: Tuple[float, float] = (-50.0, 50.0),
+        y_range: Tuple[float, float] = (-50.0, 50.0),
+        z_range: Tuple[float, float] = (-5.0, 5.0),
+        ego_extent: Optional[Tuple[float, float]] = (2.5, 1.2),
+        ground: str = "height",
+        ground_z: float = -1.7,
+        ground_margin: float = 0.2,
+        voxel_size: float = 0.2,
+        tolerance: float = 0.5,
+        min_points: int = 3,
+    ):
+        assert ground in ("height", "ransac")
+        self.x_range = x_range
+        self.y_range = y_range
+        self.z_range = z_range
+        self.ego_extent = ego_extent
+        self.ground = ground
+        self.ground_z = ground_z
+        self.ground_margin = ground_margin
+        self.voxel_size = voxel_size
+        self.tolerance = tolerance
+        self.min_points = min_points
+        self.rng = np.random.default_rng(0)
+
+    def __call__(self, points: np.ndarray) -> Obstacles:
+        points = crop_roi(points, self.x_range, self.y_range, self.z_range, self.ego_extent)
+        if self.ground == "ransac":
+            points = remove_ground_ransac(points, self.ground_margin, rng=self.rng)
+        else:
+            points = remove_ground_height(points, self.ground_z, self.ground_margin)
+
+        voxels, counts = voxel_downsample(points[:, :3], self.voxel_size)
+        labels = cluster(voxels, self.tolerance)
+        return describe_clusters(voxels, labels, self.min_points, counts)
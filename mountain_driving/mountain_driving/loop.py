@@ -8,17 +8,20 @@ from .config import (
     CHECKPOINT_DISTANCE_THRESHOLD,
     AGENT_STOP_THERSHOLD,
     LANE_INVASION_PENALTY,
+    LATENCY_OVERRUN_PENALTY,
     EXCEED_LAST_CHECKPOINT_PENALTY,
 )
-from .ui import HUD
+from .ui import HUD, DisplayThread
 from .keyboard_control import KeyboardControl
 from .vehicle import Vehicle
 from .utils import get_actor_display_name, planar_distance
 import math
 import datetime
-from .agent import TaAgent
+import time
+from .agent import TaAgent, RemoteStudentAgent, debug_viewer
 from pygame.time import Clock
 from .state import State
+from .latency import LatencyMonitor
 
 
 def game_loop(args):
@@ -26,6 +29,8 @@ def game_loop(args):
     pygame.font.init()
     world = None
     original_settings = None
+    display_thread = None
+    latency = None
 
     try:
         ## Initialize world
@@ -57,10 +62,27 @@ def game_loop(args):
         )
         display.fill((0, 0, 0))
         pygame.display.flip()
+        if args.threaded_display:
+            display_thread = DisplayThread(display)
+            display_thread.start()
 
-        hud = HUD(args.width, args.height)
+        hud = HUD(args.width, args.height, args.hud_rate)
         state = State()
-        agent = TaAgent(state, hud)
+        if args.debug_viewer:
+            debug_viewer.start()
+        student_agent = None
+        if args.agent_process:
+            student_agent = RemoteStudentAgent(viewer=debug_viewer.handle)
+        latency = LatencyMonitor(
+            {
+                "step": args.step_budget_ms,
+                "on_camera_data": args.sensor_budget_ms,
+                "on_lidar_data": args.sensor_budget_ms,
+            },
+            args.latency_policy,
+            LATENCY_OVERRUN_PENALTY,
+        )
+        agent = TaAgent(state, hud, student_agent, latency)
         player = Vehicle(
             "hero",
             sim_world,
@@ -105,9 +127,7 @@ def game_loop(args):
                 return
 
             tick(state, hud, player, sim_world, clock)
-            render(hud, player, display)
-
-            pygame.display.flip()
+            show(hud, player, display, display_thread)
 
             if state.finished:
                 break
@@ -122,9 +142,7 @@ def game_loop(args):
                 return
 
             tick(State, hud, player, sim_world, clock)
-            render(hud, player, display)
-
-            pygame.display.flip()
+            show(hud, player, display, display_thread)
 
     finally:
         if original_settings:
@@ -133,8 +151,15 @@ def game_loop(args):
         if world and world.recording_enabled:
             client.stop_recorder()
 
+        if display_thread is not None:
+            display_thread.stop()
+
+        debug_viewer.stop()
         pygame.quit()
 
+        if latency is not None and latency.enabled:
+            print(latency.report())
+
 
 def tick(state: State, hud: HUD, player: Vehicle, world: carla.World, clock):
     player.tick()
@@ -172,14 +197,14 @@ def tick(state: State, hud: HUD, player: Vehicle, world: carla.World, clock):
             if distance >= CHECKPOINT_DISTANCE_THRESHOLD:
                 state.exceed_last_checkpoint = True
 
-            state.finish = True
+            state.finished = True
             judge(state, hud)
 
 
 def update_hud(state: State, hud: HUD, player: Vehicle, world: carla.World, clock):
     score = compute_score(state)
     hud._notifications.tick(world, clock)
-    if not hud._show_info:
+    if not hud._show_info or not hud.info_due():
         return
     t = player.actor.get_transform()
     v = player.actor.get_velocity()
@@ -189,14 +214,19 @@ def update_hud(state: State, hud: HUD, player: Vehicle, world: carla.World, cloc
     heading += "S" if 90.5 < compass < 269.5 else ""
     heading += "E" if 0.5 < compass < 179.5 else ""
     heading += "W" if 180.5 < compass < 359.5 else ""
-    colhist = player.get_collision_history()
-    collision = [colhist[x + hud.frame - 200] for x in range(0, 200)]
-    max_col = max(1.0, max(collision))
-    collision = [x / max_col for x in collision]
-    vehicles = world.get_actors().filter("vehicle.*")
+    collision = player.get_collision_history().window(hud.frame, 200)
+    max_col = max(1.0, collision.max())
+    collision = (collision / max_col).tolist()
+    nearby = hud.nearby_vehicles
+    nearby.update(world, player.actor, t.location)
     hud._info_text = [
         "Server:  % 16.0f FPS" % hud.server_fps,
         "Client:  % 16.0f FPS" % clock.get_fps(),
+        "HUD:     % 17.2f ms" % hud.render_time,
+    ]
+    if hud.display_fps is not None:
+        hud._info_text += ["Display: % 16.0f FPS" % hud.display_fps]
+    hud._info_text += [
         "",
         "Vehicle: % 20s" % get_actor_display_name(player.actor, truncate=20),
         "Map:     % 20s" % world.get_map().name.split("/")[-1],
@@ -238,76 +268,95 @@ def update_hud(state: State, hud: HUD, player: Vehicle, world: carla.World, cloc
         "Collision:",
         collision,
         "",
-        "Number of vehicles: % 8d" % len(vehicles),
+        "Number of vehicles: % 8d" % nearby.total,
     ]
-    if len(vehicles) > 1:
+    if nearby.total > 1:
         hud._info_text += ["Nearby vehicles:"]
-        distance = lambda l: math.sqrt(
-            (l.x - t.location.x) ** 2
-            + (l.y - t.location.y) ** 2
-            + (l.z - t.location.z) ** 2
-        )
-        vehicles = [
-            (distance(x.get_location()), x) for x in vehicles if x.id != player.actor.id
-        ]
-        for d, vehicle in sorted(vehicles, key=lambda vehicles: vehicles[0]):
-            if d > 200.0:
-                break
-            vehicle_type = get_actor_display_name(vehicle, truncate=22)
+        for d, vehicle_type in nearby.vehicles:
             hud._info_text.append("% 4dm %s" % (d, vehicle_type))
 
 
+def show(hud: HUD, player: Vehicle, display, display_thread: DisplayThread):
+    if display_thread is None:
+        render(hud, player, display)
+        pygame.display.flip()
+    else:
+        render(hud, player, display_thread.surface)
+        display_thread.present()
+        hud.display_fps = display_thread.fps
+
+
 def render(hud: HUD, player: Vehicle, display):
     player.render(display)
 
+    start = time.perf_counter()
     if hud._show_info:
-        info_surface = pygame.Surface((220, hud.dim[1]))
-        info_surface.set_alpha(100)
-        display.blit(info_surface, (0, 0))
-        v_offset = 4
-        bar_h_offset = 100
-        bar_width = 106
-        for item in hud._info_text:
-            if v_offset + 18 > hud.dim[1]:
-                break
-            if isinstance(item, list):
-                if len(item) > 1:
-                    points = [
-                        (x + 8, v_offset + 8 + (1.0 - y) * 30)
-                        for x, y in enumerate(item)
-                    ]
-                    pygame.draw.lines(display, (255, 136, 0), False, points, 2)
-                item = None
-                v_offset += 18
-            elif isinstance(item, tuple):
-                if isinstance(item[1], bool):
-                    rect = pygame.Rect((bar_h_offset, v_offset + 8), (6, 6))
+        if hud._info_dirty:
+            draw_info(hud)
+            hud._info_dirty = False
+        display.blit(hud._info_background, (0, 0))
+        display.blit(hud._info_layer, hud._info_rect, hud._info_rect)
+    hud._notifications.render(display)
+    hud.help.render(display)
+    hud.add_render_time(time.perf_counter() - start)
+
+
+def draw_info(hud: HUD):
+    # Text is blitted with BLEND_RGBA_MAX so that its alpha is kept on the
+    # transparent layer instead of being blended with it.
+    layer = hud._info_layer
+    layer.fill((0, 0, 0, 0), hud._info_rect)
+    drawn = list()
+    v_offset = 4
+    bar_h_offset = 100
+    bar_width = 106
+    for item in hud._info_text:
+        if v_offset + 18 > hud.dim[1]:
+            break
+        if isinstance(item, list):
+            if len(item) > 1:
+                points = [
+                    (x + 8, v_offset + 8 + (1.0 - y) * 30)
+                    for x, y in enumerate(item)
+                ]
+                drawn.append(pygame.draw.lines(layer, (255, 136, 0), False, points, 2))
+            item = None
+            v_offset += 18
+        elif isinstance(item, tuple):
+            if isinstance(item[1], bool):
+                rect = pygame.Rect((bar_h_offset, v_offset + 8), (6, 6))
+                drawn.append(
                     pygame.draw.rect(
-                        display, (255, 255, 255), rect, 0 if item[1] else 1
+                        layer, (255, 255, 255), rect, 0 if item[1] else 1
+                    )
+                )
+            else:
+                rect_border = pygame.Rect(
+                    (bar_h_offset, v_offset + 8), (bar_width, 6)
+                )
+                drawn.append(pygame.draw.rect(layer, (255, 255, 255), rect_border, 1))
+                f = (item[1] - item[2]) / (item[3] - item[2])
+                if item[2] < 0.0:
+                    rect = pygame.Rect(
+                        (bar_h_offset + f * (bar_width - 6), v_offset + 8),
+                        (6, 6),
                     )
                 else:
-                    rect_border = pygame.Rect(
-                        (bar_h_offset, v_offset + 8), (bar_width, 6)
+                    rect = pygame.Rect(
+                        (bar_h_offset, v_offset + 8), (f * bar_width, 6)
                     )
-                    pygame.draw.rect(display, (255, 255, 255), rect_border, 1)
-                    f = (item[1] - item[2]) / (item[3] - item[2])
-                    if item[2] < 0.0:
-                        rect = pygame.Rect(
-                            (bar_h_offset + f * (bar_width - 6), v_offset + 8),
-                            (6, 6),
-                        )
-                    else:
-                        rect = pygame.Rect(
-                            (bar_h_offset, v_offset + 8), (f * bar_width, 6)
-                        )
-                    pygame.draw.rect(display, (255, 255, 255), rect)
-                item = item[0]
-            if item:  # At this point has to be a str.
-                surface = hud._font_mono.render(item, True, (255, 255, 255))
-                display.blit(surface, (8, v_offset))
-            v_offset += 18
-    hud._notifications.render(display)
-    hud.help.render(display)
+                drawn.append(pygame.draw.rect(layer, (255, 255, 255), rect))
+            item = item[0]
+        if item:  # At this point has to be a str.
+            drawn.append(
+                layer.blit(
+                    hud.render_line(item),
+                    (8, v_offset),
+                    special_flags=pygame.BLEND_RGBA_MAX,
+                )
+            )
+        v_offset += 18
+    hud._info_rect = pygame.Rect(0, 0, 0, 0).unionall(drawn)
 
 
 def judge(state: State, hud: HUD):
@@ -338,7 +387,7 @@ def compute_score(state: State):
         # exceed_last_ckpt_penalty = (
         #     EXCEED_LAST_CHECKPOINT_PENALTY if state.exceed_last_checkpoint else 0.0
         # )
-        penalty = lane_invasion_penalty
+        penalty = lane_invasion_penalty + state.latency_penalty
         checkpoint_score = CHECKPOINTS[-1].score
         score = max(0.0, checkpoint_score - penalty)
         return score
@@ -347,7 +396,7 @@ def compute_score(state: State):
         lane_invasion_penalty = (
             max(state.lane_invasion_count - 5, 0) * LANE_INVASION_PENALTY
         )
-        penalty = lane_invasion_penalty
+        penalty = lane_invasion_penalty + state.latency_penalty
 
         if state.checkpoint_index > 0:
             checkpoint_score = CHECKPOINTS[state.checkpoint_index - 1].score
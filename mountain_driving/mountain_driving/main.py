@@ -1,6 +1,7 @@
 import argparse
 import logging
 from .loop import game_loop
+from .latency import POLICIES
 
 
 def main():
@@ -35,6 +36,49 @@ def main():
         default="1280x768",
         help="window resolution (default: 1280x720)",
     )
+    argparser.add_argument(
+        "--hud-rate",
+        metavar="HZ",
+        default=10.0,
+        type=float,
+        help="refresh rate of the HUD info text, 0 for every frame (default: 10)",
+    )
+    argparser.add_argument(
+        "--threaded-display",
+        action="store_true",
+        help="update the window on its own thread, so that the simulation does not wait for it",
+    )
+    argparser.add_argument(
+        "--agent-process",
+        action="store_true",
+        help="run the student agent in a separate process",
+    )
+    argparser.add_argument(
+        "--step-budget-ms",
+        metavar="MS",
+        default=10.0,
+        type=float,
+        help="latency budget of a step of the agent (default: 10)",
+    )
+    argparser.add_argument(
+        "--sensor-budget-ms",
+        metavar="MS",
+        default=25.0,
+        type=float,
+        help="latency budget of a sensor callback of the agent (default: 25)",
+    )
+    argparser.add_argument(
+        "--latency-policy",
+        choices=POLICIES,
+        default="warn",
+        help="what to do when the agent overruns a budget (default: warn)",
+    )
+    argparser.add_argument(
+        "--no-debug-viewer",
+        action="store_false",
+        dest="debug_viewer",
+        help="do not show the images of the agent, which then costs nothing",
+    )
     # argparser.add_argument(
     #     "--actor-filter",
     #     metavar="PATTERN",
@@ -4,6 +4,9 @@ import pygame
 import weakref
 from ..ui import HUD
 from ..utils import get_actor_bounding_extent
+from .buffer_pool import BufferPools
+from .dvs import DvsRenderer
+from .segmentation import colorize, semantic_tags
 from carla import (
     ColorConverter as CC,
     Transform,
@@ -12,7 +15,7 @@ from carla import (
     AttachmentType,
     Vector3D,
 )
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 
 
 DEFAULT_SENSOR_CONFIGS = [
@@ -66,6 +69,91 @@ DEFAULT_SENSOR_CONFIGS = [
 ]
 
 
+# Channel masks of a 32-bit surface with the byte order of carla.Image, BGRA.
+# The alpha channel is left out so that the surface is blitted without blending.
+BGRA_MASKS = (0x00FF0000, 0x0000FF00, 0x000000FF, 0)
+
+
+class ImageSurface(object):
+    """
+    Display surfaces for BGRA camera images. A frame is copied straight into
+    the pixels of a surface with the same layout instead of being converted
+    to RGB with NumPy, and the surfaces are reused across frames. Two
+    surfaces are filled in turn so that the one on display is not
+    overwritten by the next frame.
+    """
+
+    def __init__(self):
+        self._surfaces = [None, None]
+        self._index = 0
+
+    def update(self, image: carla.Image) -> pygame.Surface:
+        surface = self._next_surface((image.width, image.height))
+
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.dtype("uint8"))
+        pixels[:] = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
+        # Unlock the surface so that it can be blitted.
+        del pixels
+
+        return surface
+
+    def draw_tags(self, tags: np.ndarray) -> pygame.Surface:
+        """
+        Color an HxW image of semantic tags with the CityScapes palette
+        straight into the pixels of the next surface.
+        """
+        height, width = tags.shape
+        surface = self._next_surface((width, height))
+
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.dtype("uint32"))
+        colorize(tags, out=pixels.reshape(height, width))
+        # Unlock the surface so that it can be blitted.
+        del pixels
+
+        return surface
+
+    def draw_events(self, renderer: DvsRenderer) -> pygame.Surface:
+        """
+        Draw the time surfaces of a DVS renderer straight into the pixels of
+        the next surface.
+        """
+        width, height = renderer.size
+        surface = self._next_surface((width, height))
+
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.dtype("uint8"))
+        renderer.render(pixels.reshape(height, width, 4))
+        # Unlock the surface so that it can be blitted.
+        del pixels
+
+        return surface
+
+    def draw_points(
+        self, size: Tuple[int, int], points: List[Tuple[np.ndarray, np.ndarray, tuple]]
+    ) -> pygame.Surface:
+        """
+        Draw pixels on black into the next surface, without an intermediate
+        RGB array. points is a list of (x, y, color), where x and y are
+        arrays of pixel coordinates. Colors of the same pixel are combined.
+        """
+        surface = self._next_surface(size)
+        surface.fill((0, 0, 0))
+        pixels = pygame.surfarray.pixels2d(surface)
+        for x, y, color in points:
+            pixels[x, y] |= surface.map_rgb(color)
+        # Unlock the surface so that it can be blitted.
+        del pixels
+
+        return surface
+
+    def _next_surface(self, size: Tuple[int, int]) -> pygame.Surface:
+        self._index = 1 - self._index
+        surface = self._surfaces[self._index]
+        if surface is None or surface.get_size() != tuple(size):
+            surface = pygame.Surface(size, 0, 32, BGRA_MASKS)
+            self._surfaces[self._index] = surface
+        return surface
+
+
 class CameraManager(object):
     def __init__(self, parent_actor, hud: HUD, gamma_correction):
         # Generate camera transformations
@@ -108,6 +196,9 @@ class CameraManager(object):
         self.sensors = sensors
         self.sensor = None
         self.surface = None
+        self.image_surface = ImageSurface()
+        self.buffer_pools = BufferPools()
+        self.event_renderer = DvsRenderer()
         self._parent = parent_actor
         self.hud = hud
         self.recording = False
@@ -142,7 +233,15 @@ class CameraManager(object):
                 return
             sensor = me.sensors[me.index]
             self.surface = CameraManager._parse_image(
-                sensor.kind, sensor.cc, image, me.hud, me.recording, me.lidar_range
+                sensor.kind,
+                sensor.cc,
+                image,
+                me.hud,
+                me.recording,
+                me.lidar_range,
+                me.image_surface,
+                me.buffer_pools,
+                me.event_renderer,
             )
 
         # We need to pass the lambda a weak reference to self to avoid
@@ -173,58 +272,52 @@ class CameraManager(object):
         hud: HUD,
         recording: bool,
         lidar_range: float,
+        image_surface: ImageSurface,
+        buffer_pools: BufferPools,
+        event_renderer: Optional[DvsRenderer] = None,
     ) -> pygame.Surface:
         if kind.startswith("sensor.lidar"):
             points = np.frombuffer(image.raw_data, dtype=np.dtype("f4"))
             points = np.reshape(points, (int(points.shape[0] / 4), 4))
-            lidar_data = np.array(points[:, :2])
-            lidar_data *= min(hud.dim) / (2.0 * lidar_range)
-            lidar_data += (0.5 * hud.dim[0], 0.5 * hud.dim[1])
-            lidar_data = np.fabs(lidar_data)  # pylint: disable=E1111
-            lidar_data = lidar_data.astype(np.int32)
-            lidar_data = np.reshape(lidar_data, (-1, 2))
-            lidar_img_size = (hud.dim[0], hud.dim[1], 3)
-            lidar_img = np.zeros((lidar_img_size), dtype=np.uint8)
-            lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
-            surface = pygame.surfarray.make_surface(lidar_img)
+            # Scale the points to pixels in recycled buffers
+            num_points = len(points)
+            pools = buffer_pools
+            data_pool = pools.get("lidar_data", (num_points, 2), np.float32, grow=True)
+            pixel_pool = pools.get("lidar_pixels", (num_points, 2), np.int32, grow=True)
+            with pixel_pool.borrow(num_points) as lidar_pixels:
+                with data_pool.borrow(num_points) as lidar_data:
+                    np.copyto(lidar_data, points[:, :2])
+                    lidar_data *= min(hud.dim) / (2.0 * lidar_range)
+                    lidar_data += (0.5 * hud.dim[0], 0.5 * hud.dim[1])
+                    np.fabs(lidar_data, out=lidar_data)
+                    np.copyto(lidar_pixels, lidar_data, casting="unsafe")
+                surface = image_surface.draw_points(
+                    hud.dim, [(lidar_pixels[:, 0], lidar_pixels[:, 1], (255, 255, 255))]
+                )
 
         elif kind.startswith("sensor.camera.dvs"):
-            # Example of converting the raw_data from a carla.DVSEventArray
-            # sensor into a NumPy array and using it as an image
-            dvs_events = np.frombuffer(
-                image.raw_data,
-                dtype=np.dtype(
-                    [
-                        ("x", np.uint16),
-                        ("y", np.uint16),
-                        ("t", np.int64),
-                        ("pol", np.bool),
-                    ]
-                ),
-            )
-            dvs_img = np.zeros((image.height, image.width, 3), dtype=np.uint8)
-            # Blue is positive, red is negative
-            dvs_img[
-                dvs_events[:]["y"], dvs_events[:]["x"], dvs_events[:]["pol"] * 2
-            ] = 255
-            surface = pygame.surfarray.make_surface(dvs_img.swapaxes(0, 1))
+            # Accumulate the events into time surfaces that fade out, blue
+            # is positive and red is negative.
+            if event_renderer is None:
+                event_renderer = DvsRenderer()
+            event_renderer.add(image)
+            surface = image_surface.draw_events(event_renderer)
+
+        elif kind.endswith("_segmentation") and cc == CC.CityScapesPalette and not recording:
+            # Color the tags with a lookup table rather than converting the
+            # image. Recorded images are still converted by CARLA.
+            pool = buffer_pools.get("tags", (image.height, image.width), np.uint8)
+            with pool.borrow() as tags:
+                surface = image_surface.draw_tags(semantic_tags(image, out=tags))
 
         elif kind.startswith("sensor.camera.optical_flow"):
             image = image.get_color_coded_flow()
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+            surface = image_surface.update(image)
 
         else:
             assert cc is not None
             image.convert(cc)
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+            surface = image_surface.update(image)
 
         if recording:
             image.save_to_disk("_out/%08d" % image.frame)
@@ -0,0 +1,207 @@
+import math
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+import carla
+import cv2
+import numpy as np
+
+# Layout of a carla.DVSEvent in DVSEventArray.raw_data. Timestamps are in
+# nanoseconds.
+DVS_EVENT_DTYPE = np.dtype(
+    [
+        ("x", np.uint16),
+        ("y", np.uint16),
+        ("t", np.int64),
+        ("pol", np.bool_),
+    ]
+)
+
+# Layout of an event in a file of EventWriter, 8 bytes instead of 13. The
+# timestamp is relative to the first event of its chunk, and the polarity
+# is the top bit of y.
+PACKED_EVENT_DTYPE = np.dtype([("x", "<u2"), ("y", "<u2"), ("dt", "<u4")])
+POLARITY_BIT = 0x8000
+
+# Header of a file and of every chunk of events in it
+FILE_MAGIC = b"DVSE0001"
+FILE_HEADER_DTYPE = np.dtype([("width", "<u4"), ("height", "<u4")])
+CHUNK_HEADER_DTYPE = np.dtype([("t0", "<i8"), ("count", "<u4")])
+
+
+def decode_events(events: carla.DVSEventArray) -> np.ndarray:
+    """
+    Return the events as a structured array with the fields of
+    DVS_EVENT_DTYPE. It is a read-only view of the raw data without copying
+    it, so it is only valid in the sensor callback.
+    """
+    return np.frombuffer(events.raw_data, dtype=DVS_EVENT_DTYPE)
+
+
+class DvsRenderer(object):
+    """
+    Accumulate the events of a DVS camera into one time surface per
+    polarity, in which older events fade out with exp(-age / decay), decay
+    in seconds, so that events stay visible across messages instead of only
+    in their own message.
+
+    The surfaces are float32 buffers allocated once per resolution, and
+    events are scattered into them with np.add.at. Fading every pixel for
+    every message would cost more than the events, so the weights are kept
+    relative to a reference time and grow with the time of the events
+    instead. They are scaled down to the current time when the surfaces are
+    read, and rebased to a new reference time once in a while before they
+    overflow.
+    """
+
+    # Age of the reference time, in units of decay, after which the weights
+    # are rebased. float32 holds up to about exp(88).
+    REBASE_AGE = 40.0
+
+    def __init__(self, decay: float = 0.1, saturation: float = 2.0):
+        self.decay = decay
+        self.saturation = saturation
+        self.size: Optional[Tuple[int, int]] = None
+        self._surfaces: Optional[np.ndarray] = None
+        self._levels: Optional[np.ndarray] = None
+        self._blank: Optional[np.ndarray] = None
+        self._origin: Optional[int] = None
+        self._time: Optional[int] = None
+
+    def reset(self):
+        if self._surfaces is not None:
+            self._surfaces.fill(0.0)
+        self._origin = None
+        self._time = None
+
+    def add(self, events: carla.DVSEventArray):
+        """Add the events of a message."""
+        size = (events.width, events.height)
+        if self.size != size:
+            self.size = size
+            self._surfaces = np.zeros((2, events.height, events.width), dtype=np.float32)
+            self._levels = np.empty((2, events.height, events.width), dtype=np.uint8)
+            self._blank = np.zeros((events.height, events.width), dtype=np.uint8)
+            self._origin = None
+            self._time = None
+
+        array = decode_events(events)
+        if len(array) == 0:
+            return
+        t = array["t"]
+        now = int(t.max())
+        if self._origin is None:
+            self._origin = self._time = now
+        self._time = max(self._time, now)
+        if self._age(self._time) > self.REBASE_AGE:
+            self._surfaces *= np.float32(math.exp(-self._age(self._time)))
+            self._origin = self._time
+
+        weights = np.exp((t - self._origin) * (1e-9 / self.decay)).astype(np.float32)
+        index = array["pol"].astype(np.intp)
+        index *= events.height
+        index += array["y"]
+        index *= events.width
+        index += array["x"]
+        np.add.at(self._surfaces.reshape(-1), index, weights)
+
+    def time_surfaces(self) -> np.ndarray:
+        """
+        Return a copy of the time surfaces at the time of the last event as
+        a 2xHxW float32 array, negative polarity first. A pixel is the sum
+        of exp(-age / decay) over its events.
+        """
+        assert self._surfaces is not None
+        return self._surfaces * np.float32(self._fade())
+
+    def render(self, out: np.ndarray):
+        """
+        Draw the time surfaces into an HxWx4 BGRA image, positive events in
+        blue and negative ones in red. A pixel is brightest from an
+        accumulated weight of `saturation` on.
+        """
+        assert self._surfaces is not None
+        scale = self._fade() * 255.0 / self.saturation
+        for polarity in (0, 1):
+            cv2.convertScaleAbs(self._surfaces[polarity], dst=self._levels[polarity], alpha=scale)
+        blank = self._blank
+        cv2.merge((self._levels[1], blank, self._levels[0], blank), dst=out)
+
+    def _age(self, time: int) -> float:
+        return (time - self._origin) * 1e-9 / self.decay
+
+    def _fade(self) -> float:
+        if self._time is None:
+            return 1.0
+        return math.exp(-self._age(self._time))
+
+
+class EventWriter(object):
+    """
+    Write the events of a DVS camera to a file for offline use. After a
+    header with the resolution, every message is a chunk with the
+    timestamp of its first event and the number of events, followed by the
+    events packed in PACKED_EVENT_DTYPE. Read them back with read_events().
+    """
+
+    def __init__(self, path: Union[str, Path], width: int, height: int):
+        assert height <= POLARITY_BIT
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(FILE_MAGIC)
+        self.file.write(np.array((width, height), dtype=FILE_HEADER_DTYPE).tobytes())
+        self._packed = np.empty(0, dtype=PACKED_EVENT_DTYPE)
+
+    def write(self, events: carla.DVSEventArray):
+        array = decode_events(events)
+        if len(array) == 0:
+            return
+        if len(self._packed) < len(array):
+            self._packed = np.empty(int(1.25 * len(array)), dtype=PACKED_EVENT_DTYPE)
+        packed = self._packed[: len(array)]
+
+        t0 = int(array["t"].min())
+        dt = array["t"] - t0
+        assert dt.max() <= np.iinfo(np.uint32).max, "a message spans more than 4 s"
+        packed["x"] = array["x"]
+        packed["y"] = array["y"]
+        packed["y"] |= array["pol"].astype(np.uint16) << 15
+        packed["dt"] = dt
+
+        self.file.write(np.array((t0, len(array)), dtype=CHUNK_HEADER_DTYPE).tobytes())
+        self.file.write(packed.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+def read_events(path: Union[str, Path]) -> Iterator[np.ndarray]:
+    """
+    Yield the chunks of a file of EventWriter as arrays of DVS_EVENT_DTYPE.
+    The resolution is in the header, see read_resolution().
+    """
+    with open(path, "rb") as fp:
+        magic = fp.read(len(FILE_MAGIC))
+        assert magic == FILE_MAGIC, "not a DVS event file: %s" % path
+        fp.read(FILE_HEADER_DTYPE.itemsize)
+
+        while True:
+            header = fp.read(CHUNK_HEADER_DTYPE.itemsize)
+            if len(header) < CHUNK_HEADER_DTYPE.itemsize:
+                return
+            t0, count = np.frombuffer(header, dtype=CHUNK_HEADER_DTYPE)[0]
+            packed = np.frombuffer(fp.read(int(count) * PACKED_EVENT_DTYPE.itemsize), PACKED_EVENT_DTYPE)
+
+            events = np.empty(len(packed), dtype=DVS_EVENT_DTYPE)
+            events["x"] = packed["x"]
+            events["y"] = packed["y"] & (POLARITY_BIT - 1)
+            events["pol"] = (packed["y"] & POLARITY_BIT) != 0
+            events["t"] = packed["dt"].astype(np.int64) + int(t0)
+            yield events
+
+
+def read_resolution(path: Union[str, Path]) -> Tuple[int, int]:
+    """Return the (width, height) of the camera of a file of EventWriter."""
+    with open(path, "rb") as fp:
+        fp.read(len(FILE_MAGIC))
+        header = np.frombuffer(fp.read(FILE_HEADER_DTYPE.itemsize), dtype=FILE_HEADER_DTYPE)[0]
+    return int(header["width"]), int(header["height"])
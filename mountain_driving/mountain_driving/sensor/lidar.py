@@ -2,13 +2,22 @@ from carla import Actor, Transform, Location, Rotation, Color, Vector3D, Attachm
 import weakref
 import math
 from ..utils import get_actor_bounding_extent
+from .lidar_sweep import SweepAssembler
+from typing import Optional
 import numpy as np
 
 
 class LidarSensor(object):
     callback = None
+    sweep_callback = None
 
-    def __init__(self, actor: Actor, range: float = 50):
+    def __init__(
+        self,
+        actor: Actor,
+        range: float = 50,
+        rotation_frequency: Optional[float] = None,
+        motion_compensation: bool = False,
+    ):
         extent = get_actor_bounding_extent(actor)
         bound_x = extent.x
         bound_y = extent.y
@@ -18,6 +27,8 @@ class LidarSensor(object):
         trans = Transform(Location(x=+0.8 * bound_x, y=+0.0 * bound_y, z=1.3 * bound_z))
         bp = world.get_blueprint_library().find("sensor.lidar.ray_cast")
         bp.set_attribute("range", str(range))
+        if rotation_frequency is not None:
+            bp.set_attribute("rotation_frequency", str(rotation_frequency))
         sensor = world.spawn_actor(
             bp,
             trans,
@@ -30,14 +41,34 @@ class LidarSensor(object):
         sensor.listen(lambda image: LidarSensor._private_callback(weak_self, image))
 
         self.sensor = sensor
+        # Mounting pose relative to the vehicle
+        self.transform = trans
+        # Room for the points of a full revolution
+        attributes = sensor.attributes
+        capacity = int(
+            float(attributes["points_per_second"]) / float(attributes["rotation_frequency"])
+        )
+        self.assembler = SweepAssembler(capacity, motion_compensation)
         self._parent = actor
 
     def __del__(self):
         self.sensor.destroy()
 
     def set_callback(self, callback):
+        """
+        Set the function called with the point cloud of every full sweep as
+        an Nx4 array. The array is recycled after the callback returns; copy
+        it to keep it.
+        """
         self.callback = callback
 
+    def set_sweep_callback(self, callback):
+        """
+        Set the function called with every full sweep as a LidarSweep, which
+        also tells the frames of the sweep.
+        """
+        self.sweep_callback = callback
+
     @staticmethod
     def _private_callback(weak_self, data):
         # return if the parent no longer exists
@@ -45,10 +76,19 @@ class LidarSensor(object):
         if not me:
             return
 
+        if me.callback is None and me.sweep_callback is None:
+            return
+
         # Parse point cloud data into Nx4 array
         points = np.frombuffer(data.raw_data, dtype=np.dtype("f4"))
         points = np.reshape(points, (int(points.shape[0] / 4), 4))
 
-        # Invoke callback
+        # Collect the points until a revolution is complete
+        sweep = me.assembler.add(points, data.frame, data.horizontal_angle, data.transform)
+        if sweep is None:
+            return
+
         if me.callback is not None:
-            me.callback(points)
+            me.callback(sweep.points)
+        if me.sweep_callback is not None:
+            me.sweep_callback(sweep)
@@ -0,0 +1,154 @@
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Tuple, Union
+
+import carla
+import cv2
+import numpy as np
+
+# Header of a file of FlowWriter and of every frame in it. The frames are
+# HxWx2 float16 arrays.
+FILE_MAGIC = b"FLOW0001"
+FILE_HEADER_DTYPE = np.dtype([("width", "<u4"), ("height", "<u4")])
+FRAME_HEADER_DTYPE = np.dtype([("frame", "<u8"), ("timestamp", "<f8")])
+STORED_DTYPE = np.dtype("<f2")
+
+
+@dataclass
+class FlowStats:
+    """
+    Statistics of a flow field, in the units of the sensor. mean is the
+    mean (x, y) flow vector. angle_histogram sums the magnitudes of the
+    flow vectors per direction, in bins of equal width from +x towards +y,
+    which is down in the image, and is normalized to sum to 1 unless there
+    is no flow.
+    """
+
+    mean: np.ndarray
+    mean_magnitude: float
+    max_magnitude: float
+    angle_histogram: np.ndarray
+
+
+def decode_flow(image: carla.OpticalFlowImage) -> np.ndarray:
+    """
+    Return the flow of an optical flow image as an HxWx2 float32 array of
+    (x, y) vectors. It is a view of the raw data without copying it, so it
+    is only valid in the sensor callback.
+    """
+    flow = np.frombuffer(image.raw_data, dtype=np.dtype("float32"))
+    return flow.reshape(image.height, image.width, 2)
+
+
+class FlowDecoder(object):
+    """
+    Downsample optical flow and compute its statistics in buffers kept per
+    shape, without the color coding of image.get_color_coded_flow().
+
+    The returned arrays are overwritten by the next call with the same
+    shape; copy them to keep them.
+    """
+
+    def __init__(self):
+        self._fields: Dict[Tuple[int, int], np.ndarray] = dict()
+        self._planes: Dict[Tuple[int, int], np.ndarray] = dict()
+
+    def downsample(self, flow: np.ndarray, factor: int) -> np.ndarray:
+        """
+        Return the mean flow of every factor x factor block of an HxWx2
+        flow field. Rows and columns beyond the last whole block are
+        dropped. A factor of 1 returns the flow as is.
+        """
+        if factor == 1:
+            return flow
+        height = flow.shape[0] // factor
+        width = flow.shape[1] // factor
+        field = self._fields.get((height, width))
+        if field is None:
+            field = self._fields[(height, width)] = np.empty((height, width, 2), np.float32)
+
+        # Area interpolation by a whole factor averages the blocks.
+        cropped = flow[: height * factor, : width * factor]
+        cv2.resize(cropped, (width, height), dst=field, interpolation=cv2.INTER_AREA)
+        return field
+
+    def stats(self, flow: np.ndarray, bins: int = 8) -> FlowStats:
+        """
+        Compute the statistics of an HxWx2 flow field. Downsample it first
+        to trade accuracy for time.
+        """
+        shape = flow.shape[:2]
+        planes = self._planes.get(shape)
+        if planes is None:
+            planes = self._planes[shape] = np.empty((4,) + shape, np.float32)
+        x, y, magnitude, angle = planes
+
+        np.copyto(x, flow[:, :, 0])
+        np.copyto(y, flow[:, :, 1])
+        cv2.cartToPolar(x, y, magnitude=magnitude, angle=angle)
+
+        # The angle is in [0, 2 pi), clamped against rounding.
+        angle *= bins / (2.0 * math.pi)
+        np.minimum(angle, bins - 1, out=angle)
+        histogram = np.bincount(
+            angle.astype(np.intp).reshape(-1), weights=magnitude.reshape(-1), minlength=bins
+        )
+        total = histogram.sum()
+        if total > 0.0:
+            histogram /= total
+
+        # cv2 sums in double precision without a float64 copy.
+        mean_x, mean_y = cv2.mean(flow)[:2]
+        return FlowStats(
+            mean=np.array([mean_x, mean_y]),
+            mean_magnitude=cv2.mean(magnitude)[0],
+            max_magnitude=cv2.minMaxLoc(magnitude)[1],
+            angle_histogram=histogram,
+        )
+
+
+class FlowWriter(object):
+    """
+    Write optical flow to a file in float16, half the size of the raw
+    data. After a header with the resolution, every image is a frame
+    header with its frame number and timestamp, followed by the HxWx2 flow.
+    The file is laid out like the DVS event files of EventWriter. Read it
+    back with read_flow().
+    """
+
+    def __init__(self, path: Union[str, Path], width: int, height: int):
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(FILE_MAGIC)
+        self.file.write(np.array((width, height), dtype=FILE_HEADER_DTYPE).tobytes())
+        self._stored = np.empty((height, width, 2), dtype=STORED_DTYPE)
+
+    def write(self, image: carla.OpticalFlowImage):
+        np.copyto(self._stored, decode_flow(image), casting="same_kind")
+        header = np.array((image.frame, image.timestamp), dtype=FRAME_HEADER_DTYPE)
+        self.file.write(header.tobytes())
+        self.file.write(self._stored.data)
+
+    def close(self):
+        self.file.close()
+
+
+def read_flow(path: Union[str, Path]) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Yield the (frame, timestamp, flow) of the images in a file of
+    FlowWriter, where flow is an HxWx2 float16 array.
+    """
+    with open(path, "rb") as fp:
+        magic = fp.read(len(FILE_MAGIC))
+        assert magic == FILE_MAGIC, "not an optical flow file: %s" % path
+        header = np.frombuffer(fp.read(FILE_HEADER_DTYPE.itemsize), dtype=FILE_HEADER_DTYPE)[0]
+        shape = (int(header["height"]), int(header["width"]), 2)
+        size = shape[0] * shape[1] * 2 * STORED_DTYPE.itemsize
+
+        while True:
+            header = fp.read(FRAME_HEADER_DTYPE.itemsize)
+            if len(header) < FRAME_HEADER_DTYPE.itemsize:
+                return
+            frame, timestamp = np.frombuffer(header, dtype=FRAME_HEADER_DTYPE)[0]
+            flow = np.frombuffer(fp.read(size), dtype=STORED_DTYPE).reshape(shape)
+            yield int(frame), float(timestamp), flow
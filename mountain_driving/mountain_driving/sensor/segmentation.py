@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import carla
+import numpy as np
+
+# Colors of the semantic tags of CARLA 0.9.14 in the CityScapes palette, as
+# image.convert(CC.CityScapesPalette) draws them. Tags beyond the palette
+# are drawn black.
+CITYSCAPES_PALETTE = (
+    (0, 0, 0),  # Unlabeled
+    (128, 64, 128),  # Roads
+    (244, 35, 232),  # SideWalks
+    (70, 70, 70),  # Building
+    (102, 102, 156),  # Wall
+    (190, 153, 153),  # Fence
+    (153, 153, 153),  # Pole
+    (250, 170, 30),  # TrafficLight
+    (220, 220, 0),  # TrafficSign
+    (107, 142, 35),  # Vegetation
+    (152, 251, 152),  # Terrain
+    (70, 130, 180),  # Sky
+    (220, 20, 60),  # Pedestrian
+    (255, 0, 0),  # Rider
+    (0, 0, 142),  # Car
+    (0, 0, 70),  # Truck
+    (0, 60, 100),  # Bus
+    (0, 80, 100),  # Train
+    (0, 0, 230),  # Motorcycle
+    (119, 11, 32),  # Bicycle
+    (110, 190, 160),  # Static
+    (170, 120, 50),  # Dynamic
+    (55, 90, 80),  # Other
+    (45, 60, 150),  # Water
+    (157, 234, 50),  # RoadLine
+    (81, 0, 81),  # Ground
+    (150, 100, 100),  # Bridge
+    (230, 150, 140),  # RailTrack
+    (180, 165, 180),  # GuardRail
+)
+
+# Number of semantic tags and instance ids that fit in their channels
+NUM_TAGS = 256
+NUM_INSTANCES = 65536
+
+
+@dataclass
+class LabelStats:
+    """
+    The labels present in a label image, in increasing order, with their
+    pixel counts and bounding boxes as (x_min, y_min, x_max, y_max) rows of
+    inclusive pixel coordinates.
+    """
+
+    labels: np.ndarray
+    counts: np.ndarray
+    boxes: np.ndarray
+
+
+@lru_cache(maxsize=None)
+def palette_lut(palette: Tuple[Tuple[int, int, int], ...] = CITYSCAPES_PALETTE) -> np.ndarray:
+    """
+    Return a 256-entry lookup table from tags to the 32-bit pixels of
+    carla.Image, i.e. BGRA bytes with an opaque alpha. The table is built
+    once per palette.
+    """
+    lut = np.zeros((NUM_TAGS, 4), dtype=np.uint8)
+    lut[:, 3] = 255
+    lut[: len(palette), 2::-1] = np.array(palette, dtype=np.uint8)
+    return lut.view(np.uint32).reshape(NUM_TAGS)
+
+
+def _bgra(image: carla.Image) -> np.ndarray:
+    array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
+    return array.reshape(image.height, image.width, 4)
+
+
+def semantic_tags(image: carla.Image, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Return the semantic tags of a semantic or instance segmentation image,
+    stored in its red channel, as an HxW uint8 array. With out, the tags
+    are copied into it.
+    """
+    tags = _bgra(image)[:, :, 2]
+    if out is None:
+        return np.ascontiguousarray(tags)
+    np.copyto(out, tags)
+    return out
+
+
+def instance_ids(image: carla.Image, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Return the object ids of an instance segmentation image as an HxW
+    uint16 array. An id is stored as G + B * 256, which is the first half
+    of a pixel read as big-endian 16-bit integers.
+    """
+    pairs = np.frombuffer(image.raw_data, dtype=np.dtype(">u2"))
+    ids = pairs.reshape(image.height, image.width, 2)[:, :, 0]
+    if out is None:
+        out = np.empty(ids.shape, dtype=np.uint16)
+    np.copyto(out, ids)
+    return out
+
+
+def colorize(
+    tags: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    lut: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Color an HxW tag image with a lookup table from palette_lut(), by
+    default the CityScapes palette. Returns HxW uint32 pixels, which have
+    the BGRA byte order of carla.Image.
+    """
+    lut = lut if lut is not None else palette_lut()
+    return np.take(lut, tags, out=out, mode="clip")
+
+
+def label_stats(labels: np.ndarray, num_labels: int) -> LabelStats:
+    """
+    Count the pixels and find the bounding box of every label of an HxW
+    image of labels below num_labels, e.g. NUM_TAGS or NUM_INSTANCES.
+
+    A label is in the rows of the horizontal runs of pixels with that
+    label, and in the columns of its vertical runs. Segmentation images
+    have far fewer runs than pixels, so the rows and columns of each label
+    are counted with bincount over the starts of the runs only.
+    """
+    height, width = labels.shape
+    counts = np.bincount(labels.reshape(-1), minlength=num_labels)
+    present = np.flatnonzero(counts)
+    num_present = len(present)
+
+    # Labels present, numbered from 0
+    compact = np.zeros(num_labels, dtype=np.intp)
+    compact[present] = np.arange(num_present)
+
+    starts = np.empty((height, width), dtype=bool)
+    starts[:, 0] = True
+    np.not_equal(labels[:, 1:], labels[:, :-1], out=starts[:, 1:])
+    index = np.flatnonzero(starts)
+    cells = compact[labels.reshape(-1)[index]] * height + index // width
+    rows = np.bincount(cells, minlength=num_present * height)
+    rows = rows.reshape(num_present, height) > 0
+
+    starts[0, :] = True
+    np.not_equal(labels[1:, :], labels[:-1, :], out=starts[1:, :])
+    index = np.flatnonzero(starts)
+    cells = compact[labels.reshape(-1)[index]] * width + index % width
+    cols = np.bincount(cells, minlength=num_present * width)
+    cols = cols.reshape(num_present, width) > 0
+
+    boxes = np.empty((num_present, 4), dtype=np.int64)
+    boxes[:, 0] = cols.argmax(axis=1)
+    boxes[:, 1] = rows.argmax(axis=1)
+    boxes[:, 2] = width - 1 - cols[:, ::-1].argmax(axis=1)
+    boxes[:, 3] = height - 1 - rows[:, ::-1].argmax(axis=1)
+    return LabelStats(present, counts[present], boxes)
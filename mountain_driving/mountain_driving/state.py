@@ -7,3 +7,4 @@ class State:
     exceed_last_checkpoint: bool = False
     checkpoint_index: int = 0
     lane_invasion_count: int = 0
+    latency_penalty: float = 0.0
@@ -42,6 +42,7 @@ class Vehicle:
         spawn_point: Optional[Transform] = None,
         actor_filter: Optional[str] = "vehicle.tesla.model3",
         actor_generation: Optional[str] = "2",
+        display: bool = True,
     ):
         # Get a blueprint.
         blueprint = random.choice(
@@ -90,8 +91,8 @@ class Vehicle:
         lidar_sensor = LidarSensor(actor)
         rgb_camera = RgbCamera(actor)
 
-        # Initialize camera manager
-        camera_manager = CameraManager(actor, hud, gamma)
+        # Initialize camera manager, which headless runs do without
+        camera_manager = CameraManager(actor, hud, gamma) if display else None
 
         # Assign fields
         self.show_vehicle_telemetry = False
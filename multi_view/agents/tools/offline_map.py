@@ -0,0 +1,503 @@
+#!/usr/bin/env python
+
+""" Module with a server-free, read-only stand-in for carla.Map.
+
+The map topology, sampled lane centerlines, lane change permissions and
+junction membership are exported once from a live carla.Map into a compressed
+.npz file. OfflineMap loads that file and implements the subset of the
+carla.Map and carla.Waypoint API used by the GlobalRoutePlanner, the
+LocalPlanner and the agents, so that routes can be planned without a running
+simulator.
+"""
+
+import argparse
+import math
+from bisect import bisect_right
+
+import numpy as np
+import carla
+
+FORMAT_VERSION = 1
+
+# Grid cell size in meters of the spatial hash used by get_waypoint()
+_CELL_SIZE = 10.0
+
+
+def _enum_values(enum_type):
+    """Map integer values back to the members of a carla enum type."""
+    values = getattr(enum_type, "values", None)
+    if values is None:
+        values = {int(member): member for member in enum_type}
+    return values
+
+
+_LANE_TYPES = _enum_values(carla.LaneType)
+_LANE_CHANGES = _enum_values(carla.LaneChange)
+
+
+# ==============================================================================
+# -- Export --------------------------------------------------------------------
+# ==============================================================================
+
+
+def _lane_key(waypoint):
+    return (waypoint.road_id, waypoint.section_id, waypoint.lane_id)
+
+
+def _lane_change_of(marking):
+    return int(marking.lane_change) if marking else 0
+
+
+def export_map(wmap, path, sampling_resolution=1.0):
+    """
+    Dump the topology of a map into a compressed file readable by OfflineMap.
+
+        :param wmap: carla.Map to export
+        :param path: output file path (.npz)
+        :param sampling_resolution: distance in meters between the samples of a lane centerline
+    """
+    topology = wmap.get_topology()
+
+    # Collect every lane that appears in the topology, keyed by (road, section, lane).
+    # Entry waypoints lie at the start of their lanes. Exit waypoints are either
+    # the start of a successor lane or the end of a dead-end entry lane.
+    lane_index = dict()
+    lane_starts = []
+    for waypoint in [entry for entry, _ in topology] + [exit for _, exit in topology]:
+        key = _lane_key(waypoint)
+        if key not in lane_index:
+            lane_index[key] = len(lane_starts)
+            lane_starts.append(waypoint)
+
+    # Sample the centerline of each lane
+    offsets = [0]
+    xyz, rot, dist, road_s, width = [], [], [], [], []
+    left_change, right_change = [], []
+    lane_type, is_junction, junction_id = [], [], []
+    left_lane, right_lane = [], []
+
+    for start in lane_starts:
+        samples = [start] + list(start.next_until_lane_end(sampling_resolution))
+        if len(samples) == 1:
+            samples.append(start)
+
+        travelled = 0.0
+        previous = None
+        for waypoint in samples:
+            loc = waypoint.transform.location
+            if previous is not None:
+                travelled += loc.distance(previous)
+            previous = loc
+
+            r = waypoint.transform.rotation
+            xyz.append((loc.x, loc.y, loc.z))
+            rot.append((r.pitch, r.yaw, r.roll))
+            dist.append(travelled)
+            road_s.append(waypoint.s)
+            width.append(waypoint.lane_width)
+            left_change.append(_lane_change_of(waypoint.left_lane_marking))
+            right_change.append(_lane_change_of(waypoint.right_lane_marking))
+        offsets.append(len(xyz))
+
+        lane_type.append(int(start.lane_type))
+        is_junction.append(start.is_junction)
+        junction_id.append(start.junction_id if start.is_junction else -1)
+
+        for neighbor, neighbors in ((start.get_left_lane(), left_lane), (start.get_right_lane(), right_lane)):
+            neighbors.append(lane_index.get(_lane_key(neighbor), -1) if neighbor is not None else -1)
+
+    # Keep yaw continuous along each lane so that it can be interpolated
+    rot = np.array(rot, dtype=np.float64).reshape(-1, 3)
+    for lo, hi in zip(offsets[:-1], offsets[1:]):
+        rot[lo:hi, 1] = np.rad2deg(np.unwrap(np.deg2rad(rot[lo:hi, 1])))
+
+    xyz = np.array(xyz, dtype=np.float32).reshape(-1, 3)
+    offsets = np.array(offsets, dtype=np.int64)
+    dist = np.array(dist, dtype=np.float32)
+
+    def locate(waypoint):
+        """Find the lane and the distance along it of a waypoint."""
+        lane = lane_index[_lane_key(waypoint)]
+        lo, hi = offsets[lane], offsets[lane + 1]
+        loc = waypoint.transform.location
+        d2 = np.sum((xyz[lo:hi] - (loc.x, loc.y, loc.z)) ** 2, axis=1)
+        return lane, dist[lo + int(np.argmin(d2))]
+
+    topology_lane, topology_dist = [], []
+    successors = [set() for _ in lane_starts]
+    for entry, exit in topology:
+        entry_lane, entry_dist = locate(entry)
+        exit_lane, exit_dist = locate(exit)
+        topology_lane.append((entry_lane, exit_lane))
+        topology_dist.append((entry_dist, exit_dist))
+        if exit_lane != entry_lane:
+            successors[entry_lane].add(exit_lane)
+
+    succ_offsets = np.cumsum([0] + [len(x) for x in successors])
+    succ = [lane for lanes in successors for lane in sorted(lanes)]
+
+    spawn_points = [
+        (t.location.x, t.location.y, t.location.z, t.rotation.pitch, t.rotation.yaw, t.rotation.roll)
+        for t in wmap.get_spawn_points()
+    ]
+
+    np.savez_compressed(
+        path,
+        version=np.int32(FORMAT_VERSION),
+        name=np.array(wmap.name),
+        lane_keys=np.array(list(lane_index.keys()), dtype=np.int32).reshape(-1, 3),
+        lane_offsets=offsets,
+        lane_type=np.array(lane_type, dtype=np.int32),
+        is_junction=np.array(is_junction, dtype=bool),
+        junction_id=np.array(junction_id, dtype=np.int32),
+        left_lane=np.array(left_lane, dtype=np.int32),
+        right_lane=np.array(right_lane, dtype=np.int32),
+        succ_offsets=np.array(succ_offsets, dtype=np.int64),
+        succ=np.array(succ, dtype=np.int32),
+        xyz=xyz,
+        rot=rot.astype(np.float32),
+        dist=dist,
+        road_s=np.array(road_s, dtype=np.float32),
+        width=np.array(width, dtype=np.float32),
+        left_change=np.array(left_change, dtype=np.uint8),
+        right_change=np.array(right_change, dtype=np.uint8),
+        topology_lane=np.array(topology_lane, dtype=np.int32).reshape(-1, 2),
+        topology_dist=np.array(topology_dist, dtype=np.float32).reshape(-1, 2),
+        spawn_points=np.array(spawn_points, dtype=np.float32).reshape(-1, 6),
+    )
+
+
+# ==============================================================================
+# -- OfflineMap ----------------------------------------------------------------
+# ==============================================================================
+
+
+class OfflineLaneMarking(object):
+    """Read-only stand-in for carla.LaneMarking. Only lane change permissions are stored."""
+
+    def __init__(self, lane_change):
+        self.lane_change = lane_change
+
+
+class OfflineWaypoint(object):
+    """
+    Read-only stand-in for carla.Waypoint. A waypoint is a position on the
+    centerline of an exported lane, given as the distance from the start of the lane.
+    """
+
+    def __init__(self, wmap, lane, dist):
+        self._map = wmap
+        self._lane = lane
+        self._dist = dist
+        self._transform = None
+
+        road_id, section_id, lane_id = wmap._lane_keys[lane]
+        self.road_id = road_id
+        self.section_id = section_id
+        self.lane_id = lane_id
+        self.is_junction = wmap._is_junction[lane]
+        self.junction_id = wmap._junction_id[lane]
+        self.lane_type = _LANE_TYPES[wmap._lane_type[lane]]
+
+    def __repr__(self):
+        return "OfflineWaypoint(road_id={}, section_id={}, lane_id={}, dist={:.2f})".format(
+            self.road_id, self.section_id, self.lane_id, self._dist)
+
+    @property
+    def id(self):
+        return hash((self._lane, round(self._dist, 3)))
+
+    @property
+    def is_intersection(self):
+        return self.is_junction
+
+    @property
+    def transform(self):
+        if self._transform is None:
+            self._transform = self._map._interpolate_transform(self._lane, self._dist)
+        return self._transform
+
+    @property
+    def s(self):
+        return self._map._sample_value(self._map._road_s, self._lane, self._dist)
+
+    @property
+    def lane_width(self):
+        return self._map._sample_value(self._map._width, self._lane, self._dist)
+
+    @property
+    def left_lane_marking(self):
+        change = self._map._sample_value(self._map._left_change, self._lane, self._dist)
+        return OfflineLaneMarking(_LANE_CHANGES[change])
+
+    @property
+    def right_lane_marking(self):
+        change = self._map._sample_value(self._map._right_change, self._lane, self._dist)
+        return OfflineLaneMarking(_LANE_CHANGES[change])
+
+    @property
+    def lane_change(self):
+        right = self._map._sample_value(self._map._right_change, self._lane, self._dist)
+        left = self._map._sample_value(self._map._left_change, self._lane, self._dist)
+        change = (right & int(carla.LaneChange.Right)) | (left & int(carla.LaneChange.Left))
+        return _LANE_CHANGES[change]
+
+    def next(self, distance):
+        return self._map._advance(self._lane, self._dist + distance)
+
+    def previous(self, distance):
+        return self._map._retreat(self._lane, self._dist - distance)
+
+    def next_until_lane_end(self, distance):
+        length = self._map._lane_length[self._lane]
+        steps = np.arange(self._dist + distance, length, distance)
+        waypoints = [OfflineWaypoint(self._map, self._lane, float(d)) for d in steps]
+        if self._dist < length:
+            waypoints.append(OfflineWaypoint(self._map, self._lane, length))
+        return waypoints
+
+    def previous_until_lane_start(self, distance):
+        steps = np.arange(self._dist - distance, 0.0, -distance)
+        waypoints = [OfflineWaypoint(self._map, self._lane, float(d)) for d in steps]
+        if self._dist > 0.0:
+            waypoints.append(OfflineWaypoint(self._map, self._lane, 0.0))
+        return waypoints
+
+    def get_left_lane(self):
+        return self._map._neighbor(self, self._map._left_lane[self._lane])
+
+    def get_right_lane(self):
+        return self._map._neighbor(self, self._map._right_lane[self._lane])
+
+
+class OfflineMap(object):
+    """
+    Read-only stand-in for carla.Map backed by a file written by export_map().
+    Waypoints are interpolated between the exported centerline samples, so the
+    accuracy is bounded by the sampling resolution used at export time.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            version = int(data["version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(
+                    "unsupported offline map format version {} (expect {})".format(version, FORMAT_VERSION))
+            arrays = {key: data[key] for key in data.files}
+
+        self.name = str(arrays["name"])
+
+        # Per-lane attributes
+        self._lane_keys = [tuple(key) for key in arrays["lane_keys"].tolist()]
+        self._offsets = arrays["lane_offsets"].tolist()
+        self._lane_type = arrays["lane_type"].tolist()
+        self._is_junction = arrays["is_junction"].tolist()
+        self._junction_id = arrays["junction_id"].tolist()
+        self._left_lane = arrays["left_lane"].tolist()
+        self._right_lane = arrays["right_lane"].tolist()
+        succ_offsets = arrays["succ_offsets"].tolist()
+        succ = arrays["succ"].tolist()
+        self._successors = [succ[lo:hi] for lo, hi in zip(succ_offsets[:-1], succ_offsets[1:])]
+        self._predecessors = [[] for _ in self._lane_keys]
+        for lane, successors in enumerate(self._successors):
+            for other in successors:
+                self._predecessors[other].append(lane)
+
+        # Per-sample attributes. Scalar lookups are faster on Python lists,
+        # while nearest-point searches use the NumPy arrays.
+        self._xyz_array = arrays["xyz"].astype(np.float64)
+        self._lane_of_sample = np.repeat(
+            np.arange(len(self._lane_keys)), np.diff(arrays["lane_offsets"]))
+        self._sample_lane_type = np.asarray(arrays["lane_type"])[self._lane_of_sample]
+        self._xyz = self._xyz_array.tolist()
+        self._rot = arrays["rot"].astype(np.float64).tolist()
+        self._dist = arrays["dist"].astype(np.float64).tolist()
+        self._road_s = arrays["road_s"].astype(np.float64).tolist()
+        self._width = arrays["width"].astype(np.float64).tolist()
+        self._left_change = arrays["left_change"].tolist()
+        self._right_change = arrays["right_change"].tolist()
+        self._lane_dist = [self._dist[lo:hi] for lo, hi in zip(self._offsets[:-1], self._offsets[1:])]
+        self._lane_length = [d[-1] for d in self._lane_dist]
+
+        self._topology_lane = arrays["topology_lane"].tolist()
+        self._topology_dist = arrays["topology_dist"].astype(np.float64).tolist()
+        self._spawn_points = arrays["spawn_points"].astype(np.float64).tolist()
+
+        self._build_grid()
+
+    def _build_grid(self):
+        """Bucket the centerline samples into a planar grid for nearest-point queries."""
+        cells = np.floor(self._xyz_array[:, :2] / _CELL_SIZE).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        sorted_cells = cells[order]
+        boundaries = np.flatnonzero(np.any(np.diff(sorted_cells, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        self._grid = {
+            (int(sorted_cells[lo, 0]), int(sorted_cells[lo, 1])): order[lo:hi]
+            for lo, hi in zip(starts, ends)
+        }
+
+    # --------------------------------------------------------------------------
+    # carla.Map API
+    # --------------------------------------------------------------------------
+
+    def get_topology(self):
+        return [
+            (OfflineWaypoint(self, entry_lane, entry_dist), OfflineWaypoint(self, exit_lane, exit_dist))
+            for (entry_lane, exit_lane), (entry_dist, exit_dist) in zip(self._topology_lane, self._topology_dist)
+        ]
+
+    def get_spawn_points(self):
+        return [
+            carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=pitch, yaw=yaw, roll=roll))
+            for x, y, z, pitch, yaw, roll in self._spawn_points
+        ]
+
+    def generate_waypoints(self, distance):
+        waypoints = []
+        for lane, length in enumerate(self._lane_length):
+            for d in np.arange(0.0, length, distance):
+                waypoints.append(OfflineWaypoint(self, lane, float(d)))
+        return waypoints
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=carla.LaneType.Driving):
+        """
+        Return the waypoint on the closest lane centerline. If project_to_road is
+        False, None is returned when the location lies outside of that lane.
+        """
+        point = np.array([location.x, location.y, location.z])
+        candidates = self._nearby_samples(point)
+        mask = (self._sample_lane_type[candidates] & int(lane_type)) != 0
+        candidates = candidates[mask]
+        if len(candidates) == 0:
+            candidates = np.flatnonzero((self._sample_lane_type & int(lane_type)) != 0)
+            if len(candidates) == 0:
+                return None
+
+        d2 = np.sum((self._xyz_array[candidates] - point) ** 2, axis=1)
+        nearest = int(candidates[np.argmin(d2)])
+        lane = int(self._lane_of_sample[nearest])
+        dist = self._project(lane, nearest, point)
+        waypoint = OfflineWaypoint(self, lane, dist)
+
+        if not project_to_road:
+            loc = waypoint.transform.location
+            if math.hypot(loc.x - location.x, loc.y - location.y) > 0.5 * waypoint.lane_width:
+                return None
+
+        return waypoint
+
+    # --------------------------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------------------------
+
+    def _nearby_samples(self, point):
+        """Return the indices of the samples that can be closest to the point."""
+        cx, cy = (int(v) for v in np.floor(point[:2] / _CELL_SIZE))
+        found = [
+            self._grid[(cx + dx, cy + dy)]
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if (cx + dx, cy + dy) in self._grid
+        ]
+        if found:
+            candidates = np.concatenate(found)
+            # A sample farther than one cell may be closer than these, so
+            # only trust the grid when a candidate lies within one cell.
+            d2 = np.sum((self._xyz_array[candidates, :2] - point[:2]) ** 2, axis=1)
+            if d2.min() <= _CELL_SIZE ** 2:
+                return candidates
+        return np.arange(len(self._xyz_array))
+
+    def _project(self, lane, sample, point):
+        """Project a point onto the centerline segments adjacent to a sample."""
+        lo, hi = self._offsets[lane], self._offsets[lane + 1]
+        best_d2, best_dist = None, self._dist[sample]
+        for a, b in ((sample - 1, sample), (sample, sample + 1)):
+            if a < lo or b >= hi:
+                continue
+            pa, pb = self._xyz_array[a], self._xyz_array[b]
+            seg = pb - pa
+            seg_len2 = float(np.dot(seg, seg))
+            t = 0.0 if seg_len2 == 0.0 else min(1.0, max(0.0, float(np.dot(point - pa, seg)) / seg_len2))
+            d2 = float(np.sum((pa + t * seg - point) ** 2))
+            if best_d2 is None or d2 < best_d2:
+                best_d2 = d2
+                best_dist = self._dist[a] + t * (self._dist[b] - self._dist[a])
+        return best_dist
+
+    def _locate(self, lane, dist):
+        """Return the sample index before dist and the interpolation ratio."""
+        lane_dist = self._lane_dist[lane]
+        i = min(max(bisect_right(lane_dist, dist) - 1, 0), len(lane_dist) - 2)
+        if i < 0:
+            return self._offsets[lane], 0.0
+        span = lane_dist[i + 1] - lane_dist[i]
+        ratio = 0.0 if span <= 0.0 else min(1.0, max(0.0, (dist - lane_dist[i]) / span))
+        return self._offsets[lane] + i, ratio
+
+    def _sample_value(self, values, lane, dist):
+        index, ratio = self._locate(lane, dist)
+        if ratio > 0.5 and index + 1 < self._offsets[lane + 1]:
+            index += 1
+        return values[index]
+
+    def _interpolate_transform(self, lane, dist):
+        index, ratio = self._locate(lane, dist)
+        a = index
+        b = min(index + 1, self._offsets[lane + 1] - 1)
+        (x0, y0, z0), (x1, y1, z1) = self._xyz[a], self._xyz[b]
+        (p0, w0, r0), (p1, w1, r1) = self._rot[a], self._rot[b]
+        return carla.Transform(
+            carla.Location(x=x0 + (x1 - x0) * ratio, y=y0 + (y1 - y0) * ratio, z=z0 + (z1 - z0) * ratio),
+            carla.Rotation(pitch=p0 + (p1 - p0) * ratio, yaw=w0 + (w1 - w0) * ratio, roll=r0 + (r1 - r0) * ratio),
+        )
+
+    def _advance(self, lane, dist):
+        length = self._lane_length[lane]
+        if dist <= length:
+            return [OfflineWaypoint(self, lane, dist)]
+        remaining = dist - length
+        waypoints = []
+        for other in self._successors[lane]:
+            waypoints.extend(self._advance(other, remaining))
+        return waypoints
+
+    def _retreat(self, lane, dist):
+        if dist >= 0.0:
+            return [OfflineWaypoint(self, lane, dist)]
+        waypoints = []
+        for other in self._predecessors[lane]:
+            waypoints.extend(self._retreat(other, self._lane_length[other] + dist))
+        return waypoints
+
+    def _neighbor(self, waypoint, lane):
+        if lane < 0:
+            return None
+        loc = waypoint.transform.location
+        point = np.array([loc.x, loc.y, loc.z])
+        lo, hi = self._offsets[lane], self._offsets[lane + 1]
+        d2 = np.sum((self._xyz_array[lo:hi] - point) ** 2, axis=1)
+        return OfflineWaypoint(self, lane, self._project(lane, lo + int(np.argmin(d2)), point))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Export a CARLA map for offline route planning")
+    argparser.add_argument("--host", default="127.0.0.1", help="IP of the host server (default: 127.0.0.1)")
+    argparser.add_argument("-p", "--port", default=2000, type=int, help="TCP port to listen to (default: 2000)")
+    argparser.add_argument("--town", default=None, help="load this map before exporting (default: current map)")
+    argparser.add_argument(
+        "--resolution", default=1.0, type=float, help="lane centerline sampling distance in meters (default: 1.0)")
+    argparser.add_argument("output", help="output file (.npz)")
+    args = argparser.parse_args()
+
+    client = carla.Client(args.host, args.port)
+    client.set_timeout(20.0)
+    world = client.load_world(args.town) if args.town else client.get_world()
+    wmap = world.get_map()
+    export_map(wmap, args.output, args.resolution)
+    print("Exported {} to {}".format(wmap.name, args.output))
+
+
+if __name__ == "__main__":
+    main()
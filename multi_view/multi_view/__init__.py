@@ -29,7 +29,7 @@ Use ARROWS or WASD keys for control.
     Z/X          : toggle right/left blinker
     I            : toggle interior light
 
-    TAB          : change sensor position
+    TAB          : toggle bird's-eye view
     ` or N       : next sensor
     [1-9]        : change to sensor [1-9]
     G            : toggle radar visualization
@@ -35,6 +35,18 @@ def main():
         default="1280x768",
         help="window resolution (default: 1280x720)",
     )
+    argparser.add_argument(
+        "--hud-rate",
+        metavar="HZ",
+        default=10.0,
+        type=float,
+        help="refresh rate of the HUD info text, 0 for every frame (default: 10)",
+    )
+    argparser.add_argument(
+        "--threaded-display",
+        action="store_true",
+        help="update the window on its own thread, so that the simulation does not wait for it",
+    )
     argparser.add_argument(
         "--record-on-start",
         action="store_true",
@@ -0,0 +1,210 @@
+import hashlib
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import carla
+import cv2
+import numpy as np
+from carla import Transform
+
+# Bumped whenever the tables are computed differently, so that stale cache
+# files are not loaded.
+TABLE_VERSION = 1
+
+# Default cache directory of the remap tables
+CACHE_DIR = Path.home() / ".cache" / "multi_view"
+
+
+@dataclass
+class CameraLayout:
+    """
+    The mounting pose of a camera relative to the vehicle, its resolution
+    and its horizontal field of view in degrees.
+    """
+
+    transform: Transform
+    width: int
+    height: int
+    fov: float
+
+    def key(self) -> str:
+        matrix = np.round(np.array(self.transform.get_matrix()), 6)
+        return "%s %d %d %.6f" % (matrix.tolist(), self.width, self.height, self.fov)
+
+
+@dataclass
+class RemapTable:
+    """
+    The fixed-point maps of cv2.remap from the pixels of a camera to its
+    part of the bird's-eye view, which is the box of rows and columns
+    [top, top + height) x [left, left + width). Pixels of the box seen by
+    another camera map outside of the image.
+    """
+
+    top: int
+    left: int
+    map1: np.ndarray
+    map2: np.ndarray
+
+
+def _ground_grid(size: Tuple[int, int], meters_per_pixel: float, ground_z: float) -> np.ndarray:
+    # The vehicle is at the center of the view, facing up.
+    width, height = size
+    rows = (np.arange(height) + 0.5 - height / 2.0) * meters_per_pixel
+    cols = (np.arange(width) + 0.5 - width / 2.0) * meters_per_pixel
+    points = np.empty((height, width, 4))
+    points[:, :, 0] = -rows[:, None]
+    points[:, :, 1] = cols[None, :]
+    points[:, :, 2] = ground_z
+    points[:, :, 3] = 1.0
+    return points
+
+
+def compute_tables(
+    cameras: List[CameraLayout],
+    size: Tuple[int, int],
+    meters_per_pixel: float,
+    ground_z: float = 0.0,
+) -> List[Optional[RemapTable]]:
+    """
+    Compute the inverse perspective mapping of every camera onto the ground
+    plane at ground_z in the vehicle frame, x forward and y right. A pixel
+    of the view is taken from the camera that sees it closest to its
+    optical axis. A camera that sees none of the view gets None.
+    """
+    width, height = size
+    ground = _ground_grid(size, meters_per_pixel, ground_z)
+
+    coords = list()
+    alignments = list()
+    for camera in cameras:
+        # Ground points in the camera frame, x forward, y right and z up
+        local = ground @ np.array(camera.transform.get_inverse_matrix()).T
+        forward = local[:, :, 0]
+        focal = camera.width / (2.0 * math.tan(math.radians(camera.fov) / 2.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = focal * local[:, :, 1] / forward + camera.width / 2.0 - 0.5
+            v = -focal * local[:, :, 2] / forward + camera.height / 2.0 - 0.5
+        visible = (forward > 0.0) & (u >= 0) & (u <= camera.width - 1)
+        visible &= (v >= 0) & (v <= camera.height - 1)
+
+        # Cosine of the angle between the ray and the optical axis
+        alignment = forward / np.linalg.norm(local[:, :, :3], axis=2)
+        alignments.append(np.where(visible, alignment, -np.inf))
+        coords.append((u, v))
+
+    owner = np.argmax(np.stack(alignments), axis=0)
+    seen = np.isfinite(np.max(np.stack(alignments), axis=0))
+
+    tables = list()
+    for index, (u, v) in enumerate(coords):
+        mine = seen & (owner == index)
+        if not mine.any():
+            tables.append(None)
+            continue
+        rows = np.flatnonzero(mine.any(axis=1))
+        cols = np.flatnonzero(mine.any(axis=0))
+        box = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+
+        map_x = np.where(mine, u, -1.0)[box].astype(np.float32)
+        map_y = np.where(mine, v, -1.0)[box].astype(np.float32)
+        map1, map2 = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+        tables.append(RemapTable(int(rows[0]), int(cols[0]), map1, map2))
+    return tables
+
+
+def load_tables(
+    cameras: List[CameraLayout],
+    size: Tuple[int, int],
+    meters_per_pixel: float,
+    ground_z: float = 0.0,
+    cache_dir: Optional[Path] = CACHE_DIR,
+) -> List[Optional[RemapTable]]:
+    """
+    Return the tables of compute_tables(), loaded from cache_dir if they
+    were computed for the same layout before, or computed and saved there.
+    """
+    if cache_dir is None:
+        return compute_tables(cameras, size, meters_per_pixel, ground_z)
+
+    key = "%d %s %s %.6f %.6f" % (
+        TABLE_VERSION,
+        [camera.key() for camera in cameras],
+        tuple(size),
+        meters_per_pixel,
+        ground_z,
+    )
+    path = Path(cache_dir) / ("birds_eye-%s.npz" % hashlib.sha1(key.encode()).hexdigest())
+
+    if path.exists():
+        with np.load(path) as data:
+            tables = list()
+            for index in range(len(cameras)):
+                if "map1_%d" % index not in data:
+                    tables.append(None)
+                    continue
+                top, left = data["box_%d" % index]
+                tables.append(
+                    RemapTable(
+                        int(top), int(left), data["map1_%d" % index], data["map2_%d" % index]
+                    )
+                )
+            return tables
+
+    tables = compute_tables(cameras, size, meters_per_pixel, ground_z)
+    arrays = dict()
+    for index, table in enumerate(tables):
+        if table is not None:
+            arrays["box_%d" % index] = np.array([table.top, table.left])
+            arrays["map1_%d" % index] = table.map1
+            arrays["map2_%d" % index] = table.map2
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **arrays)
+    return tables
+
+
+class BirdsEyeView(object):
+    """
+    A top-down view of the ground around the vehicle, stitched from the
+    images of its cameras by inverse perspective mapping. The remap tables
+    are computed once per camera layout and resolution and cached on disk,
+    so that a camera frame costs one cv2.remap into its part of the view.
+
+    The view is an HxWx4 BGRA buffer, reused for every frame, with the
+    vehicle at its center facing up. Ground not seen by any camera is black.
+    """
+
+    def __init__(
+        self,
+        cameras: List[CameraLayout],
+        size: Tuple[int, int] = (480, 480),
+        meters_per_pixel: float = 0.05,
+        ground_z: float = 0.0,
+        cache_dir: Optional[Path] = CACHE_DIR,
+    ):
+        width, height = size
+        self.size = size
+        self.meters_per_pixel = meters_per_pixel
+        self.tables = load_tables(cameras, size, meters_per_pixel, ground_z, cache_dir)
+        self.image = np.zeros((height, width, 4), dtype=np.uint8)
+        self.image[:, :, 3] = 255
+
+    def update(self, index: int, image: carla.Image):
+        """Draw the frame of the index-th camera into its part of the view."""
+        table = self.tables[index]
+        if table is None:
+            return
+        frame = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
+        frame = frame.reshape(image.height, image.width, 4)
+        rows, cols = table.map1.shape[:2]
+        dst = self.image[table.top : table.top + rows, table.left : table.left + cols]
+        cv2.remap(
+            frame,
+            table.map1,
+            table.map2,
+            cv2.INTER_LINEAR,
+            dst=dst,
+            borderMode=cv2.BORDER_TRANSPARENT,
+        )
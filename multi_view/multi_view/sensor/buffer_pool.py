@@ -0,0 +1,94 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+class BufferPool(object):
+    """
+    A fixed number of preallocated arrays of one shape and dtype, recycled
+    across the messages of a sensor stream instead of allocating new arrays
+    for every message.
+
+    A buffer is borrowed with `with pool.borrow() as buffer:` and returns to
+    the pool at the end of the block, so it must not be kept after that. If
+    every buffer is borrowed, a temporary array is allocated instead and
+    counted in `exhausted`.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype, count: int = 2, name: str = ""):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.count = count
+        self.name = name
+        self.exhausted = 0
+        self._free = [np.empty(self.shape, self.dtype) for _ in range(count)]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, rows: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Lend a buffer until the end of the with block. With rows, only the
+        first rows of the buffer are lent, e.g. for point clouds whose
+        number of points varies from message to message.
+        """
+        assert rows is None or rows <= self.shape[0]
+        with self._lock:
+            buffer = self._free.pop() if self._free else None
+            if buffer is None:
+                self.exhausted += 1
+                if self.exhausted == 1:
+                    logging.warning("buffer pool %s is exhausted", self.name or self.shape)
+
+        pooled = buffer is not None
+        if not pooled:
+            buffer = np.empty(self.shape, self.dtype)
+        try:
+            yield buffer if rows is None else buffer[:rows]
+        finally:
+            if pooled:
+                with self._lock:
+                    self._free.append(buffer)
+
+
+class BufferPools(object):
+    """
+    One buffer pool per named stream. The pool of a stream is replaced when
+    its shape or dtype changes, e.g. after switching sensors, or when it has
+    fewer rows than a message needs. It then gets 25% more rows than needed.
+    """
+
+    def __init__(self, count: int = 2):
+        self.count = count
+        self.resized = 0
+        self._pools: Dict[str, BufferPool] = dict()
+        self._exhausted = 0
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype, grow: bool = False) -> BufferPool:
+        """
+        Return the pool of a stream for buffers of shape and dtype. With
+        grow, the first dimension is the minimum number of rows.
+        """
+        dtype = np.dtype(dtype)
+        pool = self._pools.get(name)
+        if (
+            pool is None
+            or pool.dtype != dtype
+            or pool.shape[1:] != tuple(shape[1:])
+            or (pool.shape[0] < shape[0] if grow else pool.shape[0] != shape[0])
+        ):
+            if pool is not None:
+                self.resized += 1
+                self._exhausted += pool.exhausted
+            if grow:
+                shape = (int(1.25 * shape[0]),) + tuple(shape[1:])
+            pool = BufferPool(shape, dtype, self.count, name)
+            self._pools[name] = pool
+        return pool
+
+    @property
+    def exhausted(self) -> int:
+        """Number of borrows that found every buffer of their pool lent."""
+        return self._exhausted + sum(pool.exhausted for pool in self._pools.values())
@@ -1,11 +1,14 @@
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import carla
 import numpy as np
 import pygame
 import weakref
 from ..ui import HUD
 from ..utils import get_actor_bounding_extent
+from .birds_eye import BirdsEyeView, CameraLayout
+from .buffer_pool import BufferPools
+from .dvs import DvsRenderer
 import cv2
 from carla import (
     ColorConverter as CC,
@@ -15,14 +18,16 @@ from carla import (
     AttachmentType,
     Vector3D,
 )
-from typing import Optional, Dict, Tuple, Dict
+from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 import os
 from numpy.typing import ArrayLike
-from threading import Lock
+from threading import Condition, Lock, Thread
 
 VIDEO_RESOLUTION = (1920, 1080)
 FRAME_RATE = 10
+# Side of the ground square shown by the bird's-eye view, in meters
+BIRDS_EYE_RANGE = 24.0
 OUTPUT_DIR = Path("_out")
 IMG_DIR = OUTPUT_DIR / "images"
 LOG_FILE = OUTPUT_DIR / "transform_log.csv"
@@ -66,7 +71,7 @@ class DisplayPosition:
     height: int
 
 
-def sensor_callback(weak_me, weak_sensor, render_size, image):
+def sensor_callback(weak_me, weak_sensor, index, render_size, image):
     me = weak_me()
     if me is None:
         return
@@ -75,17 +80,165 @@ def sensor_callback(weak_me, weak_sensor, render_size, image):
     if sensor is None:
         return
 
-    sensor.surface = me._parse_image(
+    surface = me._parse_image(
         sensor.kind,
         sensor.cc,
         render_size,
         image,
+        sensor,
     )
 
+    # Camera frames are drawn by the tile worker, which sets the surface.
+    if surface is not None:
+        sensor.surface = surface
+
+    if me.show_birds_eye and sensor.kind.startswith("sensor.camera.rgb"):
+        me.birds_eye.update(index, image)
+
     if me.recording:
         me._record_image(sensor.name, sensor.cc, image)
 
 
+# Channel masks of a 32-bit surface with the byte order of carla.Image, BGRA.
+# The alpha channel is left out so that the surface is blitted without blending.
+BGRA_MASKS = (0x00FF0000, 0x0000FF00, 0x000000FF, 0)
+
+
+class ImageSurface(object):
+    """
+    Display surfaces for BGRA camera images. A frame is copied straight into
+    the pixels of a surface with the same layout instead of being converted
+    to RGB with NumPy, and the surfaces are reused across frames. Two
+    surfaces are filled in turn so that the one on display is not
+    overwritten by the next frame.
+
+    If a size is given, the frame is cropped around its center to the
+    aspect ratio of that size and scaled into the surface with
+    pygame.transform.smoothscale, which averages over the covered area when
+    shrinking.
+    """
+
+    def __init__(self):
+        self._surfaces = [None, None]
+        self._index = 0
+
+    def update(
+        self, image: carla.Image, size: Optional[Tuple[int, int]] = None
+    ) -> pygame.Surface:
+        image_size = (image.width, image.height)
+        width, height = size if size is not None else image_size
+        surface = self._next_surface((width, height))
+
+        if (width, height) == image_size:
+            pixels = np.frombuffer(surface.get_buffer(), dtype=np.dtype("uint8"))
+            pixels[:] = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
+            # Unlock the surface so that it can be blitted.
+            del pixels
+        else:
+            # The frame surface shares the memory of raw_data.
+            frame = pygame.image.frombuffer(image.raw_data, image_size, "BGRA")
+            frame = frame.subsurface(crop_to_aspect(image_size, (width, height)))
+            pygame.transform.smoothscale(frame, (width, height), surface)
+
+        return surface
+
+    def draw_events(self, renderer: DvsRenderer) -> pygame.Surface:
+        """
+        Draw the time surfaces of a DVS renderer straight into the pixels of
+        the next surface.
+        """
+        width, height = renderer.size
+        surface = self._next_surface((width, height))
+
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.dtype("uint8"))
+        renderer.render(pixels.reshape(height, width, 4))
+        # Unlock the surface so that it can be blitted.
+        del pixels
+
+        return surface
+
+    def draw_points(
+        self, size: Tuple[int, int], points: List[Tuple[np.ndarray, np.ndarray, tuple]]
+    ) -> pygame.Surface:
+        """
+        Draw pixels on black into the next surface, without an intermediate
+        RGB array. points is a list of (x, y, color), where x and y are
+        arrays of pixel coordinates. Colors of the same pixel are combined.
+        """
+        surface = self._next_surface(size)
+        surface.fill((0, 0, 0))
+        pixels = pygame.surfarray.pixels2d(surface)
+        for x, y, color in points:
+            pixels[x, y] |= surface.map_rgb(color)
+        # Unlock the surface so that it can be blitted.
+        del pixels
+
+        return surface
+
+    def _next_surface(self, size: Tuple[int, int]) -> pygame.Surface:
+        self._index = 1 - self._index
+        surface = self._surfaces[self._index]
+        if surface is None or surface.get_size() != tuple(size):
+            surface = pygame.Surface(size, 0, 32, BGRA_MASKS)
+            self._surfaces[self._index] = surface
+        return surface
+
+
+def crop_to_aspect(size: Tuple[int, int], aspect: Tuple[int, int]) -> pygame.Rect:
+    """Return the largest centered rectangle in size with the ratio of aspect."""
+    width, height = size
+    if width * aspect[1] > height * aspect[0]:
+        crop_w = height * aspect[0] // aspect[1]
+        return pygame.Rect((width - crop_w) // 2, 0, crop_w, height)
+    else:
+        crop_h = width * aspect[1] // aspect[0]
+        return pygame.Rect(0, (height - crop_h) // 2, width, crop_h)
+
+
+class TileWorker(object):
+    """
+    Draws camera frames into their display tiles on a worker thread, so
+    that downscaling does not hold up the sensor callbacks. pygame releases
+    the GIL while scaling. Only the latest frame of every sensor is kept.
+    If the worker falls behind, older frames are dropped from the display
+    but not from the recording, which is done in the sensor callback.
+    """
+
+    def __init__(self):
+        self._pending = dict()
+        self._running = True
+        self._cond = Condition()
+        self._thread = Thread(target=self._run, name="tile-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, sensor, image: carla.Image, size: Tuple[int, int]):
+        with self._cond:
+            self._pending[sensor.name] = (weakref.ref(sensor), image, size)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                pending = self._pending
+                self._pending = dict()
+
+            for weak_sensor, image, size in pending.values():
+                sensor = weak_sensor()
+                if sensor is None:
+                    continue
+                sensor.surface = sensor.image_surface.update(image, size)
+
+
 class CameraManager:
     def __init__(
         self,
@@ -184,27 +337,50 @@ class CameraManager:
         self.log_writer = log_writer
         self._log_file = log_file
         self.video_recorder = video_recorder
+        self.tile_worker = TileWorker()
+        self.birds_eye: Optional[BirdsEyeView] = None
+        self.birds_eye_surface: Optional[pygame.Surface] = None
+        self.show_birds_eye = False
 
         # Register sensor callbacks AFTER assigning class fields.
-        for sensor, display_pos in zip(sensors, camera_display_positions):
+        for index, (sensor, display_pos) in enumerate(zip(sensors, camera_display_positions)):
             weak_self = weakref.ref(self)
             weak_sensor = weakref.ref(sensor)
             render_size = (display_pos.width, display_pos.height)
             sensor.actor.listen(
-                lambda image, weak_self=weak_self, weak_sensor=weak_sensor, render_size=render_size: sensor_callback(
-                    weak_self, weak_sensor, render_size, image
+                lambda image, weak_self=weak_self, weak_sensor=weak_sensor, index=index, render_size=render_size: sensor_callback(
+                    weak_self, weak_sensor, index, render_size, image
                 )
             )
 
         self.set_sensor(0, notify=False)
 
     def __del__(self):
+        self.tile_worker.stop()
         del self.video_recorder
 
     def toggle_camera(self):
-        # self.transform_index = (self.transform_index + 1) % len(self._camera_transforms)
-        # self.set_sensor(self.sensor_index, notify=False)
-        pass
+        # Show or hide the bird's-eye view over the front camera. Its remap
+        # tables are built on first use.
+        if self.birds_eye is None:
+            side = self.sensors[0].display_pos.height
+            cameras = [
+                CameraLayout(
+                    sensor.transform,
+                    *VIDEO_RESOLUTION,
+                    sensor.blueprint.get_attribute("fov").as_float(),
+                )
+                for sensor in self.sensors
+            ]
+            birds_eye = BirdsEyeView(cameras, (side, side), BIRDS_EYE_RANGE / side)
+            # The surface shares the pixels of the view.
+            self.birds_eye_surface = pygame.image.frombuffer(
+                birds_eye.image, birds_eye.size, "BGRA"
+            )
+            self.birds_eye = birds_eye
+
+        self.show_birds_eye = not self.show_birds_eye
+        self.hud.notification("Bird's-eye view %s" % ("On" if self.show_birds_eye else "Off"))
 
     def set_sensor(self, index: int, notify: bool = True):
         if notify:
@@ -234,6 +410,11 @@ class CameraManager:
                 pos = (sensor.display_pos.left, sensor.display_pos.top)
                 display.blit(sensor.surface, pos)
 
+        if self.show_birds_eye:
+            front = self.sensors[0].display_pos
+            pos = (front.left + front.width - self.birds_eye.size[0], front.top)
+            display.blit(self.birds_eye_surface, pos)
+
     def _record_image(self, name: str, cc: CC, image: carla.Image):
         frame_idx = image.frame
         image.convert(cc)
@@ -249,7 +430,8 @@ class CameraManager:
         cc: Optional[CC],
         render_size: Tuple[int, int],
         image: carla.Image,
-    ) -> pygame.Surface:
+        sensor: "SensorDesc",
+    ) -> Optional[pygame.Surface]:
         recording = self.recording
         lidar_range = self.lidar_range
         size_x, size_y = render_size
@@ -258,54 +440,38 @@ class CameraManager:
         if kind.startswith("sensor.lidar"):
             points = np.frombuffer(image.raw_data, dtype=np.dtype("f4"))
             points = np.reshape(points, (int(points.shape[0] / 4), 4))
-            lidar_data = np.array(points[:, :2])
-            lidar_data *= min_size / (2.0 * lidar_range)
-            lidar_data += (0.5 * size_x, 0.5 * size_y)
-            lidar_data = np.fabs(lidar_data)  # pylint: disable=E1111
-            lidar_data = lidar_data.astype(np.int32)
-            lidar_data = np.reshape(lidar_data, (-1, 2))
-            lidar_img_size = (size_x, size_y, 3)
-            lidar_img = np.zeros((lidar_img_size), dtype=np.uint8)
-            lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
-            surface = pygame.surfarray.make_surface(lidar_img)
+            # Scale the points to pixels in recycled buffers
+            num_points = len(points)
+            pools = sensor.buffer_pools
+            data_pool = pools.get("lidar_data", (num_points, 2), np.float32, grow=True)
+            pixel_pool = pools.get("lidar_pixels", (num_points, 2), np.int32, grow=True)
+            with pixel_pool.borrow(num_points) as lidar_pixels:
+                with data_pool.borrow(num_points) as lidar_data:
+                    np.copyto(lidar_data, points[:, :2])
+                    lidar_data *= min_size / (2.0 * lidar_range)
+                    lidar_data += (0.5 * size_x, 0.5 * size_y)
+                    np.fabs(lidar_data, out=lidar_data)
+                    np.copyto(lidar_pixels, lidar_data, casting="unsafe")
+                surface = sensor.image_surface.draw_points(
+                    render_size, [(lidar_pixels[:, 0], lidar_pixels[:, 1], (255, 255, 255))]
+                )
 
         elif kind.startswith("sensor.camera.dvs"):
-            # Example of converting the raw_data from a carla.DVSEventArray
-            # sensor into a NumPy array and using it as an image
-            dvs_events = np.frombuffer(
-                image.raw_data,
-                dtype=np.dtype(
-                    [
-                        ("x", np.uint16),
-                        ("y", np.uint16),
-                        ("t", np.int64),
-                        ("pol", np.bool),
-                    ]
-                ),
-            )
-            dvs_img = np.zeros((image.height, image.width, 3), dtype=np.uint8)
-            # Blue is positive, red is negative
-            dvs_img[
-                dvs_events[:]["y"], dvs_events[:]["x"], dvs_events[:]["pol"] * 2
-            ] = 255
-            surface = pygame.surfarray.make_surface(dvs_img.swapaxes(0, 1))
+            # Accumulate the events into time surfaces that fade out, blue
+            # is positive and red is negative.
+            sensor.event_renderer.add(image)
+            surface = sensor.image_surface.draw_events(sensor.event_renderer)
 
         elif kind.startswith("sensor.camera.optical_flow"):
             image = image.get_color_coded_flow()
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+            self.tile_worker.submit(sensor, image, render_size)
+            surface = None
 
         else:
             assert cc is not None
             image.convert(cc)
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+            self.tile_worker.submit(sensor, image, render_size)
+            surface = None
 
         if recording:
             frame_idx = "%08d" % image.frame
@@ -350,6 +516,9 @@ class SensorDesc:
     transform: Transform
     attachment_type: AttachmentType
     display_pos: DisplayPosition
+    image_surface: ImageSurface = field(default_factory=ImageSurface)
+    buffer_pools: BufferPools = field(default_factory=BufferPools)
+    event_renderer: DvsRenderer = field(default_factory=DvsRenderer)
 
 
 def generate_vehicle_transforms(extent: Vector3D):
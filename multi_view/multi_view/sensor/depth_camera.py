@@ -0,0 +1,63 @@
+from carla import (
+    Actor,
+    Transform,
+    Location,
+    AttachmentType,
+)
+import weakref
+from ..utils import get_actor_bounding_extent
+from .depth import DepthDecoder
+
+
+class DepthCamera(object):
+    callback = None
+
+    def __init__(self, actor: Actor, stride: int = 1):
+        extent = get_actor_bounding_extent(actor)
+        bound_x = extent.x
+        bound_y = extent.y
+        bound_z = extent.z
+
+        # Mounted with the RGB camera, so that their pixels match
+        world = actor.get_world()
+        trans = Transform(Location(x=+0.8 * bound_x, y=+0.0 * bound_y, z=1.3 * bound_z))
+        bp = world.get_blueprint_library().find("sensor.camera.depth")
+        sensor = world.spawn_actor(
+            bp,
+            trans,
+            attach_to=actor,
+            attachment_type=AttachmentType.Rigid,
+        )
+
+        # We need a weak reference to self to avoid circular reference.
+        weak_self = weakref.ref(self)
+        sensor.listen(lambda image: DepthCamera._private_callback(weak_self, image))
+
+        self.sensor = sensor
+        self.decoder = DepthDecoder()
+        self.stride = stride
+        self._parent = actor
+
+    def __del__(self):
+        self.sensor.destroy()
+
+    def set_callback(self, callback):
+        """
+        Set the function called with the depth of every image in meters, as
+        an HxW float32 array of every stride-th pixel. The array is recycled
+        after the callback returns; copy it to keep it. Point clouds are
+        decoded with DepthDecoder.point_cloud().
+        """
+        self.callback = callback
+
+    @staticmethod
+    def _private_callback(weak_self, image):
+        # return if the parent no longer exists
+        me = weak_self()
+        if not me:
+            return
+
+        if me.callback is None:
+            return
+
+        me.callback(me.decoder.decode(image, me.stride))
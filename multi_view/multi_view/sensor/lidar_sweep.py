@@ -0,0 +1,169 @@
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from carla import Transform
+
+# Slack on a full revolution, for the rounding of horizontal angles
+ANGLE_EPSILON = 1e-4
+
+
+@dataclass
+class LidarSweep:
+    """
+    The points of a full revolution of a lidar, from the measurements of
+    frames start_frame to end_frame. With motion compensation, the points
+    are in the sensor frame at `transform`, the sensor pose of the last
+    measurement.
+    """
+
+    points: np.ndarray
+    start_frame: int
+    end_frame: int
+    transform: Optional[Transform] = None
+
+
+class SweepAssembler(object):
+    """
+    Assemble the partial revolutions that a ray-cast lidar delivers per
+    tick, when its rotation frequency is below the tick rate, into full
+    sweeps. The progress of a revolution is tracked with the horizontal
+    angle of the measurements, and a sweep is complete when its
+    measurements cover 360 degrees. The first measurement only sets the
+    starting angle and is dropped.
+
+    A sweep is exactly one revolution. When the rotation per tick does not
+    divide 360 degrees, the measurement that completes a sweep is split by
+    the azimuth of its points at the angle where the sweep started, and the
+    points past it start the next sweep.
+
+    The points are copied into a preallocated buffer of `capacity` points,
+    e.g. points_per_second / rotation_frequency of the lidar, which is
+    reused for the next sweep, so a sweep must be copied to keep it. The
+    buffer grows to 25% more points than needed when a sweep does not fit.
+
+    With motion_compensation, the points of every measurement are moved
+    from the sensor pose of that measurement to the pose of the last one,
+    so that the vehicle motion during a revolution does not smear them.
+    """
+
+    def __init__(self, capacity: int = 0, motion_compensation: bool = False):
+        self.motion_compensation = motion_compensation
+        self.resized = 0
+        self._buffer = np.empty((capacity, 4), np.float32)
+        self._rows = 0
+        self._angle: Optional[float] = None
+        self._progress = 0.0
+        self._start_frame: Optional[int] = None
+        # Points and pose of the part of a measurement past the end of the
+        # last sweep, which are added with the next measurement
+        self._carry: Optional[Tuple[np.ndarray, Optional[Transform]]] = None
+        # Row offsets and local-to-world matrices of the measurements of the
+        # current sweep, for motion compensation
+        self._offsets: List[int] = list()
+        self._matrices: List[np.ndarray] = list()
+
+    def reset(self):
+        """Drop the partial sweep, e.g. after the lidar was teleported."""
+        self._rows = 0
+        self._angle = None
+        self._progress = 0.0
+        self._start_frame = None
+        self._carry = None
+        self._offsets.clear()
+        self._matrices.clear()
+
+    def add(
+        self,
+        points: np.ndarray,
+        frame: int,
+        horizontal_angle: float,
+        transform: Optional[Transform] = None,
+    ) -> Optional[LidarSweep]:
+        """
+        Add the Nx4 points of a measurement, taken at the end of a rotation
+        to horizontal_angle in radians. Returns the sweep that this
+        measurement completes, or None. transform is the sensor pose of the
+        measurement, which is needed for motion compensation.
+        """
+        if self._angle is None:
+            self._angle = horizontal_angle
+            return None
+
+        # A measurement of a whole revolution ends at the angle it started.
+        start_angle = self._angle
+        step = (horizontal_angle - start_angle) % (2.0 * math.pi)
+        if step < ANGLE_EPSILON or step > 2.0 * math.pi - ANGLE_EPSILON:
+            step = 2.0 * math.pi
+        self._angle = horizontal_angle
+
+        if self._carry is not None:
+            # The points past the end of the last sweep, which was still in
+            # the buffer until now
+            self._append(*self._carry)
+            self._carry = None
+        if self._start_frame is None:
+            self._start_frame = frame
+
+        remaining = 2.0 * math.pi - self._progress
+        self._progress += step
+        if self._progress > 2.0 * math.pi + ANGLE_EPSILON:
+            # Split the measurement at the angle where the sweep started.
+            azimuth = np.arctan2(points[:, 1], points[:, 0])
+            before = (azimuth - start_angle) % (2.0 * math.pi) < remaining
+            self._carry = (points[~before], transform)
+            points = points[before]
+        self._append(points, transform)
+
+        if self._progress < 2.0 * math.pi - ANGLE_EPSILON:
+            return None
+
+        sweep_points = self._buffer[: self._rows]
+        if self.motion_compensation:
+            self._compensate(sweep_points, np.array(transform.get_inverse_matrix()))
+        sweep = LidarSweep(sweep_points, self._start_frame, frame, transform)
+
+        # Start the next sweep, with the rest of this measurement if any.
+        self._rows = 0
+        self._start_frame = None
+        self._offsets.clear()
+        self._matrices.clear()
+        if self._carry is not None:
+            self._progress = step - remaining
+            self._start_frame = frame
+        else:
+            self._progress = 0.0
+        return sweep
+
+    def _append(self, points: np.ndarray, transform: Optional[Transform]):
+        if self.motion_compensation:
+            assert transform is not None
+            self._matrices.append(np.array(transform.get_matrix(), dtype=np.float64))
+
+        buffer = self._buffer
+        rows = self._rows + len(points)
+        if rows > len(buffer):
+            grown = np.empty((int(1.25 * rows), 4), np.float32)
+            grown[: self._rows] = buffer[: self._rows]
+            self._buffer = buffer = grown
+            self.resized += 1
+
+        buffer[self._rows : rows] = points
+        self._offsets.append(self._rows)
+        self._rows = rows
+
+    def _compensate(self, points: np.ndarray, world_to_end: np.ndarray):
+        # The last measurement is already at the last pose.
+        ends = self._offsets[1:]
+        for start, end, local_to_world in zip(self._offsets, ends, self._matrices):
+            # Rigid transform from the pose of the measurement to the last
+            # pose, applied to whole rows so that the intensity passes through
+            m = world_to_end @ local_to_world
+            rotation = np.eye(4, dtype=np.float32)
+            rotation[:3, :3] = m[:3, :3].T
+            translation = np.zeros(4, dtype=np.float32)
+            translation[:3] = m[:3, 3]
+            block = points[start:end]
+            np.matmul(block, rotation, out=block)
+            block += translation
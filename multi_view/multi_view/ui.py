@@ -1,5 +1,8 @@
 import pygame
 import os
+import threading
+import time
+from .utils import NearbyVehicles
 # from .utils import get_actor_display_name
 # import math
 # import datetime
@@ -33,7 +36,8 @@ class FadingText(object):
         self.surface.set_alpha(500.0 * self.seconds_left)
 
     def render(self, display):
-        display.blit(self.surface, self.pos)
+        if self.seconds_left > 0.0:
+            display.blit(self.surface, self.pos)
 
 
 # ==============================================================================
@@ -73,8 +77,15 @@ class HelpText(object):
 # ==============================================================================
 
 
+# Width of the info panel on the left
+INFO_WIDTH = 220
+
+# Rendered text lines kept by the HUD. The cache is cleared when it is full.
+LINE_CACHE_SIZE = 512
+
+
 class HUD(object):
-    def __init__(self, width, height):
+    def __init__(self, width, height, info_rate: float = 10.0):
         self.dim = (width, height)
         font = pygame.font.Font(pygame.font.get_default_font(), 20)
         font_name = "courier" if os.name == "nt" else "mono"
@@ -86,12 +97,28 @@ class HUD(object):
         self._notifications = FadingText(font, (width, 40), (0, height - 40))
         self.help = HelpText(pygame.font.Font(mono, 16), width, height)
         self.server_fps = 0
+        self.display_fps = None
         self.frame = 0
         self.simulation_time = 0
         self._show_info = True
         self._info_text = []
         self._server_clock = pygame.time.Clock()
 
+        # The info text is refreshed info_rate times per second, or on every
+        # frame if it is not positive. It is drawn onto a transparent layer,
+        # which is redrawn only after a refresh, over a reused background.
+        # Only the area covered by the text is cleared and blitted.
+        self.info_rate = info_rate
+        self.render_time = 0.0
+        self._info_refreshed_at = None
+        self._info_background = pygame.Surface((INFO_WIDTH, height))
+        self._info_background.set_alpha(100)
+        self._info_layer = pygame.Surface((width, height), pygame.SRCALPHA)
+        self._info_rect = pygame.Rect(0, 0, 0, 0)
+        self._info_dirty = True
+        self._line_cache = dict()
+        self.nearby_vehicles = NearbyVehicles()
+
     def on_world_tick(self, timestamp):
         self._server_clock.tick()
         self.server_fps = self._server_clock.get_fps()
@@ -174,6 +201,33 @@ class HUD(object):
     def toggle_info(self):
         self._show_info = not self._show_info
 
+    def info_due(self) -> bool:
+        """Return True and restart the period if the info text should be refreshed."""
+        now = time.monotonic()
+        if (
+            self.info_rate > 0
+            and self._info_refreshed_at is not None
+            and now - self._info_refreshed_at < 1.0 / self.info_rate
+        ):
+            return False
+        self._info_refreshed_at = now
+        self._info_dirty = True
+        return True
+
+    def render_line(self, text: str) -> pygame.Surface:
+        """Render a line of the info text, reusing the surface of an identical line."""
+        surface = self._line_cache.get(text)
+        if surface is None:
+            if len(self._line_cache) >= LINE_CACHE_SIZE:
+                self._line_cache.clear()
+            surface = self._font_mono.render(text, True, (255, 255, 255))
+            self._line_cache[text] = surface
+        return surface
+
+    def add_render_time(self, seconds: float):
+        # Exponential moving average in milliseconds
+        self.render_time += 0.05 * (1e3 * seconds - self.render_time)
+
     def notification(self, text, seconds=2.0):
         self._notifications.set_text(text, seconds=seconds)
 
@@ -229,3 +283,60 @@ class HUD(object):
     #             v_offset += 18
     #     self._notifications.render(display)
     #     self.help.render(display)
+
+
+# ==============================================================================
+# -- DisplayThread -------------------------------------------------------------
+# ==============================================================================
+
+
+class DisplayThread(threading.Thread):
+    """
+    Show rendered frames on the window from its own thread, so that a slow
+    flip, e.g. on a remote X display, does not hold up the simulation.
+
+    Frames are rendered on `surface` and handed over with present(). The
+    thread shows the latest frame presented and skips the older ones. The
+    two frame surfaces are swapped under a lock, so that the one being
+    rendered is never the one being shown.
+    """
+
+    def __init__(self, display: pygame.Surface):
+        super().__init__(name="display", daemon=True)
+        self._display = display
+        self._back = pygame.Surface(display.get_size(), 0, display)
+        self._front = pygame.Surface(display.get_size(), 0, display)
+        self._condition = threading.Condition()
+        self._fresh = False
+        self._running = True
+        self._clock = pygame.time.Clock()
+        self.fps = 0.0
+
+    @property
+    def surface(self) -> pygame.Surface:
+        return self._back
+
+    def present(self):
+        with self._condition:
+            self._back, self._front = self._front, self._back
+            self._fresh = True
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.join()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._fresh:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                self._display.blit(self._front, (0, 0))
+                self._fresh = False
+            pygame.display.flip()
+            self._clock.tick()
+            self.fps = self._clock.get_fps()